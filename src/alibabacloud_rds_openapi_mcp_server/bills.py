@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Billing-cycle fetching and caching for describe_bills.
+
+DescribeInstanceBill pages through a billing cycle with ``NextToken``, so the
+pages of one cycle are sequential, but different cycles are independent and
+are fetched concurrently. Pages use the maximum page size and the instance
+filter is sent with the request instead of being applied afterwards.
+
+A billing cycle stops changing once it has been settled, a few days into the
+following month. Settled cycles are kept in a SQLite table as zlib-compressed
+columnar JSON. Entries are keyed by (account, cycle, is_billing_item,
+instance), where the instance is empty for a whole cycle. A whole-cycle entry
+also answers instance-filtered queries.
+
+The account is the Alibaba Cloud account ID reported by DescribeInstanceBill,
+so rotated STS tokens and other AccessKeys of the same account share entries.
+Bill permissions are not scoped to resources, so a credential is resolved to its
+account with a one-item DescribeInstanceBill call; the answer is remembered per
+credential. Entries older than ``BILL_CACHE_MAX_AGE`` are deleted.
+
+Tuning (environment variables):
+    BILL_CACHE: set to "off" to disable the cache.
+    BILL_CACHE_PATH: SQLite file (default: bills.sqlite3 in RDS_MCP_CACHE_DIR).
+    BILL_CACHE_MAX_AGE: seconds a cached cycle is kept (default 30 days).
+    BILL_SETTLE_DAYS: day of the month after which the previous cycle is final (default 5).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from alibabacloud_rds_openapi_mcp_server.core.lazy_import import lazy_module
+from alibabacloud_rds_openapi_mcp_server.core.openapi_executor import call_openapi, run_blocking
+from alibabacloud_rds_openapi_mcp_server.core.storage import cache_path
+
+bss_open_api_20171214_models = lazy_module('alibabacloud_bssopenapi20171214.models')
+
+logger = logging.getLogger(__name__)
+
+BILL_CACHE_ENABLED = os.getenv('BILL_CACHE', 'on').lower() != 'off'
+BILL_CACHE_MAX_AGE = int(os.getenv('BILL_CACHE_MAX_AGE', 30 * 86400))
+BILL_SETTLE_DAYS = int(os.getenv('BILL_SETTLE_DAYS', 5))
+BILL_PAGE_SIZE = 300
+BILL_FETCH_CONCURRENCY = 6
+# Credentials whose account ID is remembered.
+ACCOUNT_MEMO_SIZE = 256
+
+# Output column -> DescribeInstanceBill item attribute.
+BILL_FIELDS = (
+    ("Item", "item"),
+    ("AfterDiscountAmount", "after_discount_amount"),
+    ("InstanceID", "instance_id"),
+    ("BillingDate", "billing_date"),
+    ("InvoiceDiscount", "invoice_discount"),
+    ("SubscriptionType", "subscription_type"),
+    ("PretaxGrossAmount", "pretax_gross_amount"),
+    ("Currency", "currency"),
+    ("CommodityCode", "commodity_code"),
+    ("CostUnit", "cost_unit"),
+    ("NickName", "nick_name"),
+    ("PretaxAmount", "pretax_amount"),
+    ("BillingItem", "billing_item"),
+    ("BillingItemPriceUnit", "list_price_unit"),
+    ("BillingItemUsage", "usage"),
+)
+
+BillKey = Tuple[str, str, bool, str]
+
+
+def is_settled_cycle(billing_cycle: str, today: Optional[date] = None) -> bool:
+    """Whether the bill of ``billing_cycle`` (YYYY-MM) can no longer change."""
+    today = today or date.today()
+    try:
+        year, month = (int(part) for part in billing_cycle.split('-'))
+    except ValueError:
+        return False
+    months_ago = (today.year - year) * 12 + (today.month - month)
+    return months_ago >= 2 or (months_ago == 1 and today.day > BILL_SETTLE_DAYS)
+
+
+def bill_row(item: Any) -> Dict[str, Any]:
+    return {column: getattr(item, attribute) for column, attribute in BILL_FIELDS}
+
+
+def filter_instance(rows: List[Dict[str, Any]], db_instance_id: Optional[str]) -> List[Dict[str, Any]]:
+    """Keeps rows of ``db_instance_id``; InstanceID may list several IDs separated by ';'."""
+    if not db_instance_id:
+        return rows
+    return [row for row in rows if db_instance_id in (row["InstanceID"] or "").split(";")]
+
+
+def _encode(rows: List[Dict[str, Any]]) -> bytes:
+    columns = [column for column, _ in BILL_FIELDS]
+    payload = {"columns": columns, "rows": [[row.get(c) for c in columns] for row in rows]}
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def _decode(blob: bytes) -> List[Dict[str, Any]]:
+    payload = json.loads(zlib.decompress(blob))
+    return [dict(zip(payload["columns"], values)) for values in payload["rows"]]
+
+
+class BillCache:
+    """Compressed rows of settled billing cycles."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._conn:
+            # Rows of the first format were keyed by credential, including the STS token.
+            self._conn.execute('DROP TABLE IF EXISTS bills')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS account_bills ('
+                'account TEXT NOT NULL, cycle TEXT NOT NULL, billing_item INTEGER NOT NULL, instance TEXT NOT NULL, '
+                'data BLOB NOT NULL, stored_at REAL NOT NULL, '
+                'PRIMARY KEY (account, cycle, billing_item, instance)) WITHOUT ROWID'
+            )
+        self.prune()
+
+    def get(self, key: BillKey) -> Optional[List[Dict[str, Any]]]:
+        account, cycle, is_billing_item, instance = key
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM account_bills WHERE account = ? AND cycle = ? AND billing_item = ? AND instance = ?',
+                (account, cycle, int(is_billing_item), instance),
+            ).fetchone()
+        return _decode(row[0]) if row else None
+
+    def put(self, key: BillKey, rows: List[Dict[str, Any]]):
+        account, cycle, is_billing_item, instance = key
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO account_bills VALUES (?, ?, ?, ?, ?, ?)',
+                               (account, cycle, int(is_billing_item), instance, _encode(rows), time.time()))
+        self.prune()
+
+    def prune(self, max_age: Optional[float] = None):
+        """Deletes entries stored more than ``max_age`` (default BILL_CACHE_MAX_AGE) seconds ago."""
+        cutoff = time.time() - (BILL_CACHE_MAX_AGE if max_age is None else max_age)
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM account_bills WHERE stored_at < ?', (cutoff,))
+
+    def lookup(self, account: str, cycle: str, is_billing_item: bool,
+               db_instance_id: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """Returns cached rows for the query, preferring an exact entry over filtering a whole cycle."""
+        if db_instance_id:
+            rows = self.get((account, cycle, is_billing_item, db_instance_id))
+            if rows is not None:
+                return rows
+        rows = self.get((account, cycle, is_billing_item, ''))
+        return None if rows is None else filter_instance(rows, db_instance_id)
+
+
+_cache: Optional[BillCache] = None
+_cache_lock = threading.Lock()
+# Account ID by credential scope, most recently used last.
+_accounts: "OrderedDict[str, str]" = OrderedDict()
+
+
+def get_bill_cache() -> Optional[BillCache]:
+    """Returns the process-wide bill cache, or None when it is disabled or unavailable."""
+    global _cache
+    if not BILL_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            path = os.getenv('BILL_CACHE_PATH') or cache_path('bills.sqlite3')
+            try:
+                _cache = BillCache(path)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Bill cache at {path} is unavailable, using memory instead: {e}")
+                _cache = BillCache(':memory:')
+    return _cache
+
+
+def _bill_request(billing_cycle: str, is_billing_item: bool, db_instance_id: Optional[str],
+                  max_results: int, next_token: Optional[str] = None):
+    return bss_open_api_20171214_models.DescribeInstanceBillRequest(
+        billing_cycle=billing_cycle,
+        product_code='rds',
+        is_billing_item=is_billing_item,
+        instance_id=db_instance_id,
+        max_results=max_results,
+        next_token=next_token
+    )
+
+
+async def account_of(client, credential: str, billing_cycle: str) -> Optional[str]:
+    """
+    Returns the account ID whose bills ``credential`` reads, or None if it is not reported.
+
+    Calling DescribeInstanceBill also checks that the credential may read bills
+    at all, so cached entries are only served to callers that could fetch them.
+    """
+    with _cache_lock:
+        account = _accounts.get(credential)
+        if account is not None:
+            _accounts.move_to_end(credential)
+            return account
+    response = await call_openapi(client.describe_instance_bill, _bill_request(billing_cycle, False, None, 1))
+    data = response.body.data
+    account = getattr(data, 'account_id', None) if data else None
+    if account:
+        with _cache_lock:
+            _accounts[credential] = account
+            while len(_accounts) > ACCOUNT_MEMO_SIZE:
+                _accounts.popitem(last=False)
+    return account
+
+
+async def fetch_cycle(client, billing_cycle: str, is_billing_item: bool,
+                      db_instance_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Pages through one billing cycle of RDS."""
+    rows = []
+    next_token = None
+    while True:
+        request = _bill_request(billing_cycle, is_billing_item, db_instance_id, BILL_PAGE_SIZE, next_token)
+        response = await call_openapi(client.describe_instance_bill, request)
+        data = response.body.data
+        if not data:
+            break
+        rows.extend(bill_row(item) for item in data.items or [])
+        next_token = data.next_token
+        if not next_token or not next_token.strip():
+            break
+    # The server-side filter matches the instance; keep the exact-ID check for
+    # rows whose InstanceID lists several resources.
+    return filter_instance(rows, db_instance_id)
+
+
+async def describe_bill_cycles(client, credential: str, billing_cycles: Sequence[str], is_billing_item: bool,
+                               db_instance_id: Optional[str] = None,
+                               cache: Optional[BillCache] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Returns the rows of every cycle, fetching uncached cycles concurrently.
+
+    ``credential`` identifies the caller's credential (see `credential_scope`);
+    cached cycles are shared by all credentials of the same account.
+    """
+    cache = cache or get_bill_cache()
+    limiter = asyncio.Semaphore(BILL_FETCH_CONCURRENCY)
+    settled_cycles = [c for c in billing_cycles if is_settled_cycle(c)]
+    account = None
+    if cache is not None and settled_cycles:
+        account = await account_of(client, credential, settled_cycles[0])
+
+    async def _cycle(billing_cycle):
+        settled = account is not None and billing_cycle in settled_cycles
+        if settled:
+            rows = await run_blocking(cache.lookup, account, billing_cycle, is_billing_item, db_instance_id)
+            if rows is not None:
+                return rows
+        async with limiter:
+            rows = await fetch_cycle(client, billing_cycle, is_billing_item, db_instance_id)
+        if settled:
+            await run_blocking(cache.put, (account, billing_cycle, is_billing_item, db_instance_id or ''), rows)
+        return rows
+
+    results = await asyncio.gather(*(_cycle(c) for c in billing_cycles))
+    return dict(zip(billing_cycles, results))
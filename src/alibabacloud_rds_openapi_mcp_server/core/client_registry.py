@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide registry for Alibaba Cloud SDK clients.
+
+Building an SDK client resolves the endpoint, sets up the credential provider
+and validates the config, and a fresh client cannot benefit from connections
+warmed up by earlier calls. The registry keeps constructed clients around so
+repeated tool invocations with the same credential reuse them.
+
+Entries are keyed by ``(service, region, access_key_id, secret_digest)``. The
+digest covers both the AccessKey secret and the STS token, so a client is never
+handed to a caller presenting different secrets, and a rotated STS token
+produces a new key. When that happens the entries built with the previous token
+are dropped eagerly instead of waiting for LRU/TTL eviction.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+def credential_digest(access_key_secret: Optional[str], security_token: Optional[str]) -> str:
+    """Returns a short, non-reversible fingerprint of the secret parts of a credential."""
+    h = hashlib.sha256()
+    h.update((access_key_secret or '').encode('utf-8'))
+    h.update(b'\0')
+    h.update((security_token or '').encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def credential_scope(access_key_id: Optional[str], access_key_secret: Optional[str],
+                     security_token: Optional[str]) -> str:
+    """Returns a short fingerprint of a whole credential, usable as a cache namespace or file name."""
+    h = hashlib.sha256()
+    h.update((access_key_id or '').encode('utf-8'))
+    h.update(b'\0')
+    h.update(credential_digest(access_key_secret, security_token).encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+class ClientRegistry:
+    """
+    A thread-safe LRU cache with per-entry TTL for SDK client instances.
+
+    Keys are tuples whose last element is the credential digest. All preceding
+    elements form the "owner" of the entry; when a new digest shows up for an
+    owner (e.g. an STS token was refreshed), the stale entries of that owner
+    are invalidated.
+    """
+
+    def __init__(self, max_size: int = 64, ttl: float = 1800):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Tuple[Hashable, ...], factory: Callable[[], Any]) -> Any:
+        """Returns the cached client for ``key``, building it with ``factory`` on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                client, created_at = entry
+                if now - created_at < self._ttl:
+                    self._entries.move_to_end(key)
+                    return client
+                del self._entries[key]
+
+        # Build outside the lock: client construction may be slow and must not
+        # serialize lookups for unrelated keys.
+        client = factory()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Another thread won the race; keep a single instance per key.
+                self._entries.move_to_end(key)
+                return entry[0]
+            self._drop_rotated(key)
+            self._entries[key] = (client, now)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+        return client
+
+    def invalidate(self, predicate: Optional[Callable[[Tuple[Hashable, ...]], bool]] = None) -> int:
+        """Drops all entries (or those whose key matches ``predicate``). Returns the number removed."""
+        with self._lock:
+            if predicate is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            stale = [k for k in self._entries if predicate(k)]
+            for k in stale:
+                del self._entries[k]
+            return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop_rotated(self, key: Tuple[Hashable, ...]) -> None:
+        owner, digest = key[:-1], key[-1]
+        stale = [k for k in self._entries if k[:-1] == owner and k[-1] != digest]
+        for k in stale:
+            del self._entries[k]
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Cross-process log of cache invalidations.
+
+Worker processes each keep their own in-memory caches. When a worker changes
+an instance it invalidates its own cache and appends the invalidation to a
+SQLite table (WAL mode) shared by all workers; the other workers poll the
+table before answering from their caches and drop every cell fetched before
+the invalidation. Only invalidations travel between processes, never values,
+so a worker can at worst refetch something another worker already has.
+
+Entries older than ``RETENTION`` seconds are pruned.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Tuple
+
+RETENTION = 24 * 3600
+
+
+class InvalidationLog:
+    """Invalidations of one cache scope, shared through a SQLite file."""
+
+    def __init__(self, path: str, scope: str):
+        self.scope = scope
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS invalidations ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, scope TEXT NOT NULL, key TEXT NOT NULL, '
+            'columns TEXT NOT NULL, at REAL NOT NULL)'
+        )
+        # Earlier invalidations predate everything this process will cache.
+        self._last_id = self._conn.execute('SELECT COALESCE(MAX(id), 0) FROM invalidations').fetchone()[0]
+        self._conn.execute('DELETE FROM invalidations WHERE at < ?', (time.time() - RETENTION,))
+
+    def publish(self, keys: Iterable[str], columns: Iterable[str]):
+        now = time.time()
+        joined = ','.join(columns)
+        with self._lock:
+            self._conn.executemany('INSERT INTO invalidations (scope, key, columns, at) VALUES (?, ?, ?, ?)',
+                                   [(self.scope, key, joined, now) for key in keys])
+
+    def poll(self) -> List[Tuple[str, Tuple[str, ...], float]]:
+        """Returns the ``(key, columns, at)`` invalidations published since the last poll."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, scope, key, columns, at FROM invalidations WHERE id > ? ORDER BY id', (self._last_id,)
+            ).fetchall()
+            if rows:
+                self._last_id = rows[-1][0]
+        return [(key, tuple(columns.split(',')), at) for _, scope, key, columns, at in rows if scope == self.scope]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Deferred imports that keep server start-up cheap.
+
+Two things dominate the import time of the server: the generated Alibaba Cloud
+SDK packages (the RDS, VPC, BSS and DAS ``models`` modules alone take about a
+second) and the tool modules of groups that are never enabled. Both are
+deferred here:
+
+* `lazy_module` returns a stand-in for an SDK module that imports it on the
+  first attribute access, so ``rds_20140815_models.DescribeDBInstancesRequest``
+  keeps working while a process that never calls RDS never loads it.
+* `scan_groups` reads the group names of the ``@tool``/``@prompt`` decorators
+  in a package's modules from their source, without executing them. `RdsMCP`
+  uses the resulting group -> modules manifest to import only the modules of
+  the groups being activated.
+"""
+
+import ast
+import importlib
+import logging
+import pkgutil
+import threading
+from types import ModuleType
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class LazyModule:
+    """A module imported on first attribute access; attributes are then cached on the stand-in."""
+
+    def __init__(self, name: str):
+        self.__name = name
+        self.__module: Optional[ModuleType] = None
+        self.__lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self.__module is None:
+            with self.__lock:
+                if self.__module is None:
+                    self.__module = importlib.import_module(self.__name)
+        return self.__module
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._load(), attr)
+        setattr(self, attr, value)
+        return value
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__module is not None else 'not loaded'
+        return f"<lazy module {self.__name!r} ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    """Returns a stand-in for module ``name`` that imports it when first used."""
+    return LazyModule(name)
+
+
+def _decorator_group(node: ast.expr, decorator: str, constants: Dict[str, str], default: str) -> Optional[str]:
+    """The group of a ``@decorator``/``@decorator(group=...)`` node, '' if it is not that decorator, None if unknown."""
+    call = node if isinstance(node, ast.Call) else None
+    target = call.func if call else node
+    name = target.attr if isinstance(target, ast.Attribute) else getattr(target, 'id', None)
+    if name != decorator:
+        return ''
+    for keyword in call.keywords if call else ():
+        if keyword.arg == 'group':
+            if isinstance(keyword.value, ast.Constant) and isinstance(keyword.value.value, str):
+                return keyword.value.value
+            if isinstance(keyword.value, ast.Name):
+                return constants.get(keyword.value.id)
+            return None
+    return default
+
+
+def module_groups(source: str, decorator: str, default: str = 'rds') -> Optional[Set[str]]:
+    """
+    Returns the groups a module registers components in, read from its source.
+
+    Groups may be string literals or module-level string constants. Returns
+    None when a group cannot be determined statically; such modules have to
+    be imported to find out.
+    """
+    tree = ast.parse(source)
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) \
+                and isinstance(node.value.value, str):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    constants[target.id] = node.value.value
+
+    groups = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator_node in node.decorator_list:
+            group = _decorator_group(decorator_node, decorator, constants, default)
+            if group is None:
+                return None
+            if group:
+                groups.add(group)
+    return groups
+
+
+def scan_groups(path: Iterable[str], package: str, decorator: str) -> Dict[Optional[str], List[str]]:
+    """
+    Maps each group to the modules of ``package`` that register components in it.
+
+    Modules whose groups cannot be read statically are listed under None.
+    Modules registering nothing (helpers) are left out; they are imported by
+    the modules that use them.
+    """
+    manifest: Dict[Optional[str], List[str]] = {}
+    for module_info in pkgutil.iter_modules(path, package + '.'):
+        spec = module_info.module_finder.find_spec(module_info.name)
+        try:
+            source = spec.loader.get_source(module_info.name) if spec and spec.loader else None
+            groups = module_groups(source, decorator) if source is not None else None
+        except (OSError, SyntaxError, ImportError) as e:
+            logger.warning(f"Cannot read the groups of {module_info.name}, it will be imported eagerly: {e}")
+            groups = None
+        for group in (groups if groups is not None else [None]):
+            manifest.setdefault(group, []).append(module_info.name)
+    return manifest
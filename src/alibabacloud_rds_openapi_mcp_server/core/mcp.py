@@ -1,15 +1,24 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import importlib
+import time
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from mcp.server.fastmcp import FastMCP
 import os
 from enum import Enum
 
 from mcp.server.fastmcp.prompts import Prompt
+from mcp.types import Tool as MCPTool
 from .context import set_mcp_instance
+from .tool_cache import CachingToolManager, default_schema_cache
+from .metrics import TOOL_CALLS, TOOL_ERRORS, TOOL_IN_FLIGHT, TOOL_LATENCY, TOOL_PAYLOAD_BYTES, payload_size
+from . import tracing
+
+# Tool arguments copied onto tool spans.
+_TRACED_ARGUMENTS = ('region_id', 'db_instance_id', 'dbinstance_id', 'instance_id')
 
 
 class _ComponentType(Enum):
@@ -47,13 +56,25 @@ class RdsMCP(FastMCP):
     2.  Define components using decorators: `@mcp.tool(...)`
     3.  Finalize the setup by calling the activation method:
         `mcp.activate(enabled_groups=['group1', 'group2'])`
+
+    Component modules can also be registered with `defer_modules`; they are
+    only imported, and their components defined, when a group they define is
+    activated.
     """
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         """Initializes the engine with an internal list for pending registrations."""
         self._pending_registrations: List[_RegistrableItem] = []
+        # Component modules not imported yet, by the groups they define.
+        self._deferred_modules: Dict[str, List[str]] = {}
         self._is_activated = False
         super().__init__(*args, **kwargs)
+        # Tool schemas are restored from an on-disk cache; see core/tool_cache.py.
+        self._tool_manager = CachingToolManager(
+            default_schema_cache(),
+            tools=self._tool_manager.list_tools(),
+            warn_on_duplicate_tools=self._tool_manager.warn_on_duplicate_tools,
+        )
         set_mcp_instance(self)
 
 
@@ -106,6 +127,35 @@ class RdsMCP(FastMCP):
 
         return decorator
 
+    def defer_modules(self, manifest: Dict[Optional[str], List[str]]) -> None:
+        """
+        Records component modules to import when one of their groups is activated.
+
+        ``manifest`` maps group names to module names, as built by
+        `lazy_import.scan_groups`. Modules listed under None (groups unknown
+        until executed) are imported right away.
+        """
+        for group, module_names in manifest.items():
+            if group is None:
+                for module_name in module_names:
+                    self._import_module(module_name)
+                continue
+            deferred = self._deferred_modules.setdefault(group, [])
+            deferred.extend(name for name in module_names if name not in deferred)
+
+    def _import_module(self, module_name: str) -> None:
+        try:
+            importlib.import_module(module_name)
+            print(f"  ✓ Loaded component module: {module_name}")
+        except Exception as e:
+            print(f"  ✗ Failed to load component module {module_name}: {e}")
+
+    def _import_deferred(self, enabled_groups: list[str]) -> None:
+        """Imports the deferred modules of the enabled groups, which registers their components."""
+        for group in enabled_groups:
+            for module_name in self._deferred_modules.pop(group, []):
+                self._import_module(module_name)
+
     def activate(self, enabled_groups: list[str]) -> None:
         """
         Finalizes the setup by activating all deferred components.
@@ -115,6 +165,7 @@ class RdsMCP(FastMCP):
             return
 
         self._validate_groups(enabled_groups)
+        self._import_deferred(enabled_groups)
         print(f"\n--- Activating Component Groups: {enabled_groups} ---")
 
         activated_items: List[_RegistrableItem] = []
@@ -137,13 +188,63 @@ class RdsMCP(FastMCP):
 
                 activated_items.append(item)
 
+        if self._tool_manager.cache is not None:
+            self._tool_manager.cache.save()
         self._is_activated = True
         print("--- Activation Complete ---")
         self._run_debug_output(enabled_groups, activated_items)
 
+    async def list_tools(self) -> list[MCPTool]:
+        """Lists the tools, reusing the rendered list until tools are added or removed."""
+        if self._tool_manager.listing is None:
+            self._tool_manager.listing = await super().list_tools()
+        return list(self._tool_manager.listing)
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> Sequence[Any] | dict[str, Any]:
+        """Calls a tool inside a trace span, recording its latency, outcome and payload sizes."""
+        TOOL_PAYLOAD_BYTES.observe(payload_size(arguments), tool=name, direction='request')
+        start = time.perf_counter()
+        status = 'ok'
+        span_attributes = self._span_attributes(name, arguments) if tracing.enabled() else {}
+        try:
+            with TOOL_IN_FLIGHT.track(tool=name), tracing.start_span(f"tool {name}", **span_attributes):
+                result = await super().call_tool(name, arguments)
+        except Exception as e:
+            status = 'error'
+            # FastMCP wraps failures in ToolError; the cause is the useful class.
+            TOOL_ERRORS.inc(tool=name, error=type(e.__cause__ or e).__name__)
+            raise
+        finally:
+            TOOL_LATENCY.observe(time.perf_counter() - start, tool=name)
+            TOOL_CALLS.inc(tool=name, status=status)
+        TOOL_PAYLOAD_BYTES.observe(payload_size(result), tool=name, direction='response')
+        return result
+
+    def _span_attributes(self, name: str, arguments: dict[str, Any]) -> Dict[str, Any]:
+        attributes: Dict[str, Any] = {'mcp.tool.name': name}
+        for key in _TRACED_ARGUMENTS:
+            if isinstance(arguments.get(key), str):
+                attributes[f'rds.{key}'] = arguments[key]
+        try:
+            context = self.get_context()
+            attributes['mcp.request.id'] = str(context.request_id)
+            request = context.request_context.request
+        except ValueError:
+            # Not inside an MCP request, e.g. a direct call in tests.
+            return attributes
+        # The same headers VerifyHeaderMiddleware exposes as current_request_headers.
+        headers = getattr(request, 'headers', None)
+        if headers is not None:
+            attributes['mcp.session.id'] = headers.get('mcp-session-id')
+            attributes['http.request.id'] = headers.get('x-request-id')
+        return attributes
+
+    def _defined_groups(self) -> set[str]:
+        return {item.group for item in self._pending_registrations} | set(self._deferred_modules)
+
     def _validate_groups(self, enabled_groups: list[str]) -> None:
         """Checks if all requested groups are valid before activation."""
-        all_defined_groups = {item.group for item in self._pending_registrations}
+        all_defined_groups = self._defined_groups()
         invalid_groups = set(enabled_groups) - all_defined_groups
         if invalid_groups:
             raise ValueError(
@@ -154,7 +255,7 @@ class RdsMCP(FastMCP):
     def _run_debug_output(self, enabled_groups: list[str], activated_items: list[_RegistrableItem]):
         """Prints debug information for all component types if the env var is set."""
         if os.getenv('TOOLSET_DEBUG', '').lower() in ('1', 'true', 'yes', 'on'):
-            all_groups = sorted(list({item.group for item in self._pending_registrations}))
+            all_groups = sorted(self._defined_groups())
 
             print("\n--- COMPONENT DEBUG OUTPUT ---")
             print(f"All defined groups: {all_groups}")
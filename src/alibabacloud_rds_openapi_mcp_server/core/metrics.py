@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+In-process metrics exposed in the Prometheus text format.
+
+A minimal registry of counters, gauges and histograms with labels, enough to
+serve ``GET /metrics`` from the HTTP transports without an extra dependency.
+Updates are thread-safe, so metrics can be recorded from the event loop and
+from the OpenAPI / database worker threads alike.
+
+The server's own metrics are defined at the bottom of this module:
+
+* tool calls: counts by status, latency, in-flight calls, error classes and
+  request/response payload sizes per tool;
+* upstream OpenAPI calls: latency, in-flight calls, errors and client-side
+  rate-limit queueing delay per (service, action);
+* DBService phases (topology lookup, temporary account creation/deletion,
+  connection, query) and DAS async jobs;
+* output rendering per format.
+
+With several worker processes each worker has its own registry. Every worker
+then writes a snapshot of its metrics, labelled ``worker="<pid>"``, to a
+shared directory every few seconds; `exposition` serves the merged snapshots
+of all live workers, so any worker can answer the scrape.
+
+Tuning (environment variables):
+    METRICS_WORKER_DIR: directory of the per-worker snapshots; set by the
+        multi-worker mode of ``main()``.
+"""
+
+import glob
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(10))  # 256 B .. 64 MiB
+
+WORKER_SNAPSHOT_INTERVAL = 5
+WORKER_SNAPSHOT_MAX_AGE = 60
+
+ConstLabels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _samples(self, const: ConstLabels) -> List[str]:
+        raise NotImplementedError
+
+    def render(self, const: ConstLabels = ()) -> str:
+        lines = [f'# HELP {self.name} {_escape(self.documentation)}', f'# TYPE {self.name} {self.type_name}']
+        with self._lock:
+            lines.extend(self._samples(const))
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """A monotonically increasing value."""
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._children.get(self._key(labels), 0.0)
+
+    def _samples(self, const: ConstLabels) -> List[str]:
+        names = tuple(n for n, _ in const) + self.labelnames
+        values = tuple(v for _, v in const)
+        return [f'{self.name}{_format_labels(names, values + k)} {_format_value(v)}'
+                for k, v in sorted(self._children.items())]
+
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+    type_name = 'gauge'
+
+    def dec(self, amount: float = 1, **labels: Any):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = float(value)
+
+    @contextmanager
+    def track(self, **labels: Any) -> Iterator[None]:
+        """Increments the gauge for the duration of the block."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class _HistogramChild:
+    __slots__ = ('counts', 'sum')
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, plus their sum and count."""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = _HistogramChild(len(self.buckets))
+            child.counts[index] += 1
+            child.sum += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observes the wall-clock duration of the block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            child = self._children.get(self._key(labels))
+            return sum(child.counts) if child else 0
+
+    def _samples(self, const: ConstLabels) -> List[str]:
+        lines = []
+        names = tuple(n for n, _ in const) + self.labelnames
+        bucket_labels = names + ('le',)
+        for key, child in sorted(self._children.items()):
+            key = tuple(v for _, v in const) + key
+            cumulative = 0
+            for bound, count in zip(self.buckets, child.counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(bucket_labels, key + (_format_value(bound),))} '
+                             f'{cumulative}')
+            labels = _format_labels(names, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(child.sum)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Duplicate metric: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self, const: ConstLabels = ()) -> str:
+        """Renders every metric; ``const`` labels are prepended to every sample."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return ''.join(metric.render(const) + '\n' for metric in metrics)
+
+
+REGISTRY = Registry()
+
+
+def merge_expositions(texts: Sequence[str]) -> str:
+    """Merges text expositions of the same metrics, grouping the samples of each family."""
+    families: Dict[str, List[str]] = {}
+    headers: Dict[str, List[str]] = {}
+    for text in texts:
+        family = None
+        for line in text.splitlines():
+            if line.startswith('# HELP ') or line.startswith('# TYPE '):
+                family = line.split(' ', 3)[2]
+                header = headers.setdefault(family, [])
+                if len(header) < 2 and line not in header:
+                    header.append(line)
+                families.setdefault(family, [])
+            elif line and family is not None:
+                families[family].append(line)
+    return ''.join('\n'.join(headers[name] + samples) + '\n' for name, samples in families.items())
+
+
+def _snapshot_path(directory: str, worker: str) -> str:
+    return os.path.join(directory, f'{worker}.prom')
+
+
+def write_worker_snapshot(directory: str, worker: Optional[str] = None):
+    """Writes this worker's metrics, labelled with its ID (the PID by default), into ``directory``."""
+    worker = worker or str(os.getpid())
+    path = _snapshot_path(directory, worker)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(REGISTRY.render((('worker', worker),)))
+    os.replace(tmp, path)
+
+
+def clear_worker_snapshots(directory: str):
+    """Removes the snapshots left by previous runs."""
+    for path in glob.glob(os.path.join(directory, '*.prom')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def collect_worker_snapshots(directory: str, max_age: float = WORKER_SNAPSHOT_MAX_AGE) -> str:
+    """Merges the snapshots of all live workers; snapshots of workers gone for ``max_age`` are removed."""
+    texts = []
+    now = time.time()
+    for path in sorted(glob.glob(os.path.join(directory, '*.prom'))):
+        try:
+            if now - os.path.getmtime(path) > max_age:
+                os.remove(path)
+                continue
+            with open(path, encoding='utf-8') as f:
+                texts.append(f.read())
+        except OSError:
+            # Replaced or removed by its worker in the meantime.
+            continue
+    return merge_expositions(texts)
+
+
+def start_worker_snapshots(directory: str, interval: float = WORKER_SNAPSHOT_INTERVAL) -> threading.Thread:
+    """Writes this worker's snapshot every ``interval`` seconds from a daemon thread."""
+    def _loop():
+        while True:
+            try:
+                write_worker_snapshot(directory)
+            except OSError as e:
+                logger.warning(f"Cannot write worker metrics snapshot: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=_loop, name='metrics-snapshot', daemon=True)
+    thread.start()
+    return thread
+
+
+def exposition() -> str:
+    """The metrics served at /metrics: this process, or all workers in multi-worker mode."""
+    directory = os.getenv('METRICS_WORKER_DIR')
+    if not directory:
+        return REGISTRY.render()
+    write_worker_snapshot(directory)
+    return collect_worker_snapshots(directory)
+
+
+def payload_size(payload: Any) -> int:
+    """Approximate encoded size in bytes of a tool argument map or result."""
+    if payload is None:
+        return 0
+    if isinstance(payload, (bytes, bytearray)):
+        return len(payload)
+    if isinstance(payload, str):
+        return len(payload.encode('utf-8'))
+    if isinstance(payload, (list, tuple)):
+        return sum(payload_size(item) for item in payload)
+    text = getattr(payload, 'text', None)
+    if isinstance(text, str):
+        return len(text.encode('utf-8'))
+    if hasattr(payload, 'model_dump'):
+        payload = payload.model_dump(mode='json')
+    return len(json.dumps(payload, default=str, ensure_ascii=False).encode('utf-8'))
+
+
+TOOL_CALLS = REGISTRY.register(Counter(
+    'rds_mcp_tool_calls_total', 'Tool calls by outcome.', ('tool', 'status')))
+TOOL_LATENCY = REGISTRY.register(Histogram(
+    'rds_mcp_tool_duration_seconds', 'Tool call latency.', ('tool',)))
+TOOL_IN_FLIGHT = REGISTRY.register(Gauge(
+    'rds_mcp_tool_in_flight', 'Tool calls currently running.', ('tool',)))
+TOOL_ERRORS = REGISTRY.register(Counter(
+    'rds_mcp_tool_errors_total', 'Failed tool calls by exception class.', ('tool', 'error')))
+TOOL_PAYLOAD_BYTES = REGISTRY.register(Histogram(
+    'rds_mcp_tool_payload_bytes', 'Size of tool arguments (request) and results (response).',
+    ('tool', 'direction'), buckets=SIZE_BUCKETS))
+
+OPENAPI_LATENCY = REGISTRY.register(Histogram(
+    'rds_mcp_openapi_duration_seconds', 'Upstream OpenAPI call latency, per attempt.', ('service', 'action')))
+OPENAPI_IN_FLIGHT = REGISTRY.register(Gauge(
+    'rds_mcp_openapi_in_flight', 'Upstream OpenAPI calls currently running.', ('service',)))
+OPENAPI_ERRORS = REGISTRY.register(Counter(
+    'rds_mcp_openapi_errors_total', 'Failed upstream OpenAPI attempts by error code or class.',
+    ('service', 'action', 'error')))
+OPENAPI_QUEUE_DELAY = REGISTRY.register(Histogram(
+    'rds_mcp_openapi_queue_delay_seconds', 'Time spent waiting for a client-side rate-limit token.',
+    ('service', 'action')))
+
+DB_PHASE_LATENCY = REGISTRY.register(Histogram(
+    'rds_mcp_db_phase_duration_seconds',
+    'DBService phases: topology, account_create, account_delete, connect, query.', ('phase',)))
+DAS_JOB_LATENCY = REGISTRY.register(Histogram(
+    'rds_mcp_das_job_duration_seconds', 'DAS async jobs from submission to completion.', ('action', 'status')))
+RENDER_LATENCY = REGISTRY.register(Histogram(
+    'rds_mcp_render_duration_seconds', 'Rendering of tabular tool output.', ('format',)))
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Non-blocking execution layer for Alibaba Cloud SDK calls.
+
+Tools are coroutines served by a single event loop, so a synchronous SDK call
+made directly inside a tool stalls every other session for the whole round
+trip. All OpenAPI calls should go through `call_openapi`:
+
+    response = await call_openapi(client.describe_dbinstances, request)
+
+If the SDK offers an ``<method>_async`` variant it is awaited directly;
+otherwise the synchronous method runs on a bounded thread pool. In both cases
+the number of in-flight calls per endpoint is capped so a burst of tool calls
+cannot open an unbounded number of upstream requests.
+
+Identical read-only calls (Describe*/Get*/List*/Query* actions) that are in
+flight at the same time share one upstream request. Calls are identical when
+they go through the same credential to the same endpoint with the same action
+and the same normalized parameters.
+
+Each call is also paced by a client-side token bucket per (service, action,
+region) and retried with backoff on throttling and transient errors; see
+`rate_limit`.
+
+Tuning (environment variables):
+    OPENAPI_EXECUTOR_WORKERS: size of the thread pool for sync calls (default 64).
+    OPENAPI_ENDPOINT_CONCURRENCY: max in-flight calls per endpoint (default 32).
+    OPENAPI_SINGLE_FLIGHT: set to "off" to disable coalescing of identical calls.
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from alibabacloud_rds_openapi_mcp_server.core import rate_limit, tracing
+from alibabacloud_rds_openapi_mcp_server.core.metrics import (OPENAPI_ERRORS, OPENAPI_IN_FLIGHT, OPENAPI_LATENCY,
+                                                              OPENAPI_QUEUE_DELAY)
+from alibabacloud_rds_openapi_mcp_server.core.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_WORKERS = int(os.getenv('OPENAPI_EXECUTOR_WORKERS', 64))
+ENDPOINT_CONCURRENCY = int(os.getenv('OPENAPI_ENDPOINT_CONCURRENCY', 32))
+SINGLE_FLIGHT_ENABLED = os.getenv('OPENAPI_SINGLE_FLIGHT', 'on').lower() != 'off'
+
+READ_ONLY_PREFIXES = ('describe', 'get', 'list', 'query')
+
+_executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix='openapi')
+
+# asyncio primitives are bound to the loop they are first used on, so the
+# per-endpoint semaphores are kept per event loop.
+_endpoint_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = \
+    weakref.WeakKeyDictionary()
+
+_single_flight = SingleFlight()
+
+
+def _endpoint_of(client: Any) -> str:
+    endpoint = getattr(client, '_endpoint', None)
+    return endpoint or type(client).__module__
+
+
+def _endpoint_semaphore(endpoint: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    limits = _endpoint_limits.setdefault(loop, {})
+    semaphore = limits.get(endpoint)
+    if semaphore is None:
+        semaphore = limits[endpoint] = asyncio.Semaphore(ENDPOINT_CONCURRENCY)
+    return semaphore
+
+
+def action_of(method: Callable, args: tuple) -> str:
+    """Returns the API action of a call: the method name, or ``Params.action`` for generic ``call_api``."""
+    if method.__name__ == 'call_api' and args and getattr(args[0], 'action', None):
+        return args[0].action
+    return method.__name__
+
+
+def _normalize(value: Any) -> Any:
+    if hasattr(value, 'to_map'):
+        return value.to_map()
+    return value
+
+
+def is_read_only(action: str) -> bool:
+    return action.lower().startswith(READ_ONLY_PREFIXES)
+
+
+def _flight_key(client: Any, method: Callable, args: tuple, kwargs: dict) -> Optional[Hashable]:
+    action = action_of(method, args)
+    if not is_read_only(action):
+        return None
+    try:
+        params = json.dumps([[_normalize(a) for a in args], {k: _normalize(v) for k, v in kwargs.items()}],
+                            sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        return None
+    # SDK clients are built per credential, so their credential provider
+    # identifies the caller; it is kept in the key (a strong reference) while
+    # the call is in flight.
+    credential = getattr(client, '_credential', None) or client
+    return credential, _endpoint_of(client), action, params
+
+
+async def run_blocking(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Runs a blocking callable on the OpenAPI thread pool, preserving contextvars."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, ctx.run, functools.partial(func, *args, **kwargs))
+
+
+async def call_openapi(method: Callable, *args: Any, **kwargs: Any) -> Any:
+    """
+    Awaits an SDK client method without blocking the event loop.
+
+    Args:
+        method: A bound SDK client method, e.g. ``client.describe_dbinstances``.
+        *args, **kwargs: Forwarded to the method (request model, runtime options, ...).
+
+    Returns:
+        Whatever the SDK method returns.
+    """
+    client = getattr(method, '__self__', None)
+    key = _flight_key(client, method, args, kwargs) if SINGLE_FLIGHT_ENABLED and client is not None else None
+    with tracing.start_span(f"openapi {action_of(method, args)}", **{
+            'rpc.system': 'aliyun_openapi', 'rpc.service': _endpoint_of(client), 'rpc.method': action_of(method, args),
+            'openapi.coalescable': key is not None}):
+        if key is None:
+            return await _invoke(client, method, args, kwargs)
+        return await _single_flight.do(key, lambda: _invoke(client, method, args, kwargs))
+
+
+async def _invoke(client: Any, method: Callable, args: tuple, kwargs: dict) -> Any:
+    action = action_of(method, args)
+    service = rate_limit.service_of(client) if client is not None else type(method).__module__
+    bucket = None
+    if rate_limit.RATE_LIMIT_ENABLED and client is not None:
+        region = getattr(client, '_region_id', None) or ''
+        bucket = rate_limit.bucket_for(service, action, region)
+    attempt = 0
+    while True:
+        wait = await bucket.acquire() if bucket is not None else 0.0
+        if bucket is not None:
+            OPENAPI_QUEUE_DELAY.observe(wait, service=service, action=action)
+        start = time.perf_counter()
+        try:
+            with OPENAPI_IN_FLIGHT.track(service=service), tracing.start_span(
+                    f"http {_endpoint_of(client)}", **{'server.address': _endpoint_of(client),
+                                                       'openapi.attempt': attempt + 1,
+                                                       'openapi.queue_delay_s': wait}):
+                return await _call(client, method, args, kwargs)
+        except Exception as e:
+            error = e
+        finally:
+            OPENAPI_LATENCY.observe(time.perf_counter() - start, service=service, action=action)
+        code = getattr(error, 'code', None) or type(error).__name__
+        OPENAPI_ERRORS.inc(service=service, action=action, error=code)
+        kind = rate_limit.classify_error(error)
+        retry = (kind is not None and attempt < rate_limit.MAX_RETRIES
+                 and (kind != rate_limit.TRANSIENT or is_read_only(action)))
+        if bucket is not None and kind is not None:
+            bucket.record_failure(throttled=kind == rate_limit.THROTTLED, retried=retry)
+        if not retry:
+            raise error
+        retry_after = rate_limit.retry_after_of(error)
+        delay = max(rate_limit.backoff_delay(attempt), retry_after)
+        if bucket is not None and kind == rate_limit.THROTTLED:
+            bucket.pause(retry_after or delay)
+        logger.info(f"{action} failed ({kind}: {code}), retry {attempt + 1}/{rate_limit.MAX_RETRIES} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def _call(client: Any, method: Callable, args: tuple, kwargs: dict) -> Any:
+    async_method = getattr(client, method.__name__ + '_async', None) if client is not None else None
+    async with _endpoint_semaphore(_endpoint_of(client)):
+        if async_method is not None:
+            return await async_method(*args, **kwargs)
+        return await run_blocking(method, *args, **kwargs)
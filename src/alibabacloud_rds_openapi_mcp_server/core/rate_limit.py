@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Client-side rate limiting and throttling-aware retry for OpenAPI calls.
+
+Alibaba Cloud enforces per-account QPS quotas per API action. A burst of tool
+calls fanned out by an agent easily exceeds them; the rejected calls then come
+back as ``Throttling.User`` errors that the model retries blindly, in waves.
+Instead, every call first takes a token from a bucket keyed by
+(service, action, region) whose rate is the action's quota, so callers queue
+locally and sustained throughput stays at the quota ceiling.
+
+`TokenBucket` hands out reservations: a caller that finds the bucket empty is
+told how long to wait for its token, so waiting callers are served in arrival
+order without polling. Buckets are thread-safe and not bound to an event loop.
+
+Calls that are still rejected are retried with full-jitter exponential backoff
+(`backoff_delay`), but only when the failure is known to be retryable
+(`classify_error`):
+
+* ``throttled``: throttling errors and HTTP 429. The request was rejected, so
+  any action is retried; the bucket is also paused for the server-requested
+  wait so that queued callers back off together.
+* ``unavailable``: ``ServiceUnavailable`` and HTTP 503. Also safe for any action.
+* ``transient``: other 5xx errors, timeouts and connection errors. The request
+  may have been executed, so only read-only actions are retried.
+
+Every other error is raised immediately.
+
+Tuning (environment variables):
+    OPENAPI_RATE_LIMIT: set to "off" to disable the client-side limiter.
+    OPENAPI_RATE_LIMITS: quota overrides as ``key=qps`` pairs separated by
+        commas, where key is ``*``, ``<service>`` or ``<service>:<Action>``,
+        e.g. ``rds=100,das:GetPerformanceMetrics=5``.
+    OPENAPI_MAX_RETRIES: retries per call for retryable errors (default 4).
+    OPENAPI_RETRY_BASE_DELAY: first backoff ceiling in seconds (default 0.2).
+    OPENAPI_RETRY_MAX_DELAY: upper bound of a single backoff in seconds (default 10).
+"""
+
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+
+RATE_LIMIT_ENABLED = os.getenv('OPENAPI_RATE_LIMIT', 'on').lower() != 'off'
+MAX_RETRIES = int(os.getenv('OPENAPI_MAX_RETRIES', 4))
+RETRY_BASE_DELAY = float(os.getenv('OPENAPI_RETRY_BASE_DELAY', 0.2))
+RETRY_MAX_DELAY = float(os.getenv('OPENAPI_RETRY_MAX_DELAY', 10))
+
+# Default per-account QPS quotas, looked up as service:action, then service,
+# then '*'. Accounts with a
+# raised quota can override them with OPENAPI_RATE_LIMITS.
+DEFAULT_QUOTAS = {
+    '*': 20,
+    'rds': 50,
+    'rds:describeregions': 10,
+    'rds:describedbinstances': 20,
+    'rds:describedbinstanceperformance': 20,
+    'rds:describeslowlogrecords': 10,
+    'das': 10,
+    'das:getperformancemetrics': 10,
+    'bssopenapi': 10,
+    'bssopenapi:describeinstancebill': 10,
+    'vpc': 20,
+}
+
+THROTTLED, UNAVAILABLE, TRANSIENT = 'throttled', 'unavailable', 'transient'
+
+_SDK_MODULE = re.compile(r'^alibabacloud_([a-z]+?)\d{8}')
+
+
+def _quota_key(key: str) -> str:
+    return key.strip().lower().replace('_', '')
+
+
+def parse_quotas(spec: Optional[str]) -> Dict[str, float]:
+    """Parses ``key=qps`` pairs separated by commas; malformed pairs are ignored."""
+    quotas = {}
+    for pair in (spec or '').split(','):
+        key, _, value = pair.partition('=')
+        try:
+            qps = float(value)
+        except ValueError:
+            continue
+        if key.strip() and qps > 0:
+            quotas[_quota_key(key)] = qps
+    return quotas
+
+
+QUOTAS = {**DEFAULT_QUOTAS, **parse_quotas(os.getenv('OPENAPI_RATE_LIMITS'))}
+
+
+def quota_for(service: str, action: str, quotas: Optional[Dict[str, float]] = None) -> float:
+    """Returns the QPS quota of ``service:action``, falling back to the service and then ``*``."""
+    quotas = QUOTAS if quotas is None else quotas
+    service, action = _quota_key(service), _quota_key(action)
+    for key in (f'{service}:{action}', service, '*'):
+        if key in quotas:
+            return quotas[key]
+    return DEFAULT_QUOTAS['*']
+
+
+def service_of(client: Any) -> str:
+    """Returns the product code of an SDK client, e.g. ``rds`` for ``alibabacloud_rds20140815``."""
+    match = _SDK_MODULE.match(type(client).__module__)
+    if match:
+        return match.group(1)
+    endpoint = getattr(client, '_endpoint', None) or ''
+    return endpoint.split('.', 1)[0] or type(client).__module__
+
+
+@dataclass
+class LimiterStats:
+    """Counters of one bucket; waits are in seconds."""
+    calls: int = 0
+    delayed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    throttled: int = 0
+    retries: int = 0
+
+
+class TokenBucket:
+    """A token bucket refilled at ``rate`` tokens per second, holding at most ``burst`` tokens."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self.stats = LimiterStats()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Takes a token and returns how many seconds the caller must wait before using it."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            stats = self.stats
+            stats.calls += 1
+            if wait > 0:
+                stats.delayed += 1
+                stats.total_wait += wait
+                stats.max_wait = max(stats.max_wait, wait)
+            return wait
+
+    def pause(self, seconds: float):
+        """Hands out no token for the next ``seconds``, e.g. after the server asked to back off."""
+        with self._lock:
+            self._refill(self._clock())
+            # Callers throttled together pause the bucket once, not once each.
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def record_failure(self, throttled: bool, retried: bool):
+        with self._lock:
+            self.stats.throttled += throttled
+            self.stats.retries += retried
+
+    async def acquire(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+_buckets: Dict[Tuple[str, str, str], TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket_for(service: str, action: str, region: str) -> TokenBucket:
+    key = (service, _quota_key(action), region)
+    bucket = _buckets.get(key)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.get(key)
+            if bucket is None:
+                bucket = _buckets[key] = TokenBucket(quota_for(service, action))
+    return bucket
+
+
+def rate_limit_stats() -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+    """Snapshot of the counters of every bucket, keyed by (service, action, region)."""
+    with _buckets_lock:
+        buckets = dict(_buckets)
+    return {key: asdict(bucket.stats) for key, bucket in buckets.items()}
+
+
+def _status_of(error: BaseException) -> Optional[int]:
+    status = getattr(error, 'status_code', None)
+    if status is None and isinstance(getattr(error, 'data', None), dict):
+        status = error.data.get('statusCode')
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error: BaseException) -> Optional[str]:
+    """Returns THROTTLED, UNAVAILABLE or TRANSIENT for retryable errors, None otherwise."""
+    code = str(getattr(error, 'code', None) or '')
+    status = _status_of(error)
+    if code.startswith('Throttling') or status == 429:
+        return THROTTLED
+    if code == 'ServiceUnavailable' or status == 503:
+        return UNAVAILABLE
+    if status is not None and status >= 500:
+        return TRANSIENT
+    # The SDK wraps network failures in UnretryableException.
+    inner = getattr(error, 'inner_exception', None)
+    if isinstance(inner, BaseException) and inner is not error:
+        return classify_error(inner)
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return TRANSIENT
+    return None
+
+
+def retry_after_of(error: BaseException) -> float:
+    """Seconds the server asked to wait (``x-acs-retry-after`` is in milliseconds), 0 when unset."""
+    try:
+        return max(float(getattr(error, 'retry_after', None) or 0) / 1000, 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def backoff_delay(attempt: int, base: Optional[float] = None, cap: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff for the ``attempt``-th retry (0-based)."""
+    base = RETRY_BASE_DELAY if base is None else base
+    cap = RETRY_MAX_DELAY if cap is None else cap
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Request coalescing ("single flight") for identical concurrent calls.
+
+In streamable_http mode several sessions often issue the very same read-only
+OpenAPI request within milliseconds (a dashboard and an assistant looking at
+the same instance). `SingleFlight.do` runs the first call for a key and lets
+every caller that arrives while it is in flight wait for the same result
+instead of issuing its own upstream request. Nothing is cached: once the call
+finishes, the next caller for the key starts a new one.
+
+The shared call runs as its own task, so a caller that is cancelled does not
+cancel the call for the others. Followers receive a deep copy of the result so
+callers can never observe each other's mutations.
+"""
+
+import asyncio
+import copy
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key, per event loop."""
+
+    def __init__(self):
+        self._flights: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Task]]" = \
+            weakref.WeakKeyDictionary()
+        self.coalesced = 0
+
+    def in_flight(self) -> int:
+        loop = asyncio.get_running_loop()
+        return len(self._flights.get(loop, {}))
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Awaits ``func()``, or the in-flight call started by another caller with the same key."""
+        flights = self._flights.setdefault(asyncio.get_running_loop(), {})
+        task = flights.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(func())
+        flights[key] = task
+
+        def _done(t: asyncio.Task):
+            if flights.get(key) is t:
+                del flights[key]
+            if not t.cancelled():
+                # Mark the exception as retrieved even if every caller was cancelled.
+                t.exception()
+
+        task.add_done_callback(_done)
+        return await asyncio.shield(task)
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Location of the server's on-disk caches.
+
+Caches live under ``RDS_MCP_CACHE_DIR`` (default
+``~/.cache/alibabacloud-rds-openapi-mcp-server``). They only hold data that can
+be fetched again, so deleting the directory is always safe.
+
+With several worker processes (``SERVER_WORKERS`` > 1) the SQLite caches are
+shared through their files. In-memory caches that must stay consistent across
+workers additionally publish invalidations through a shared log
+(`core.invalidation_log`); ``SHARED_CACHE`` turns that on or off explicitly.
+"""
+
+import os
+from pathlib import Path
+
+CACHE_DIR = os.getenv(
+    'RDS_MCP_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'alibabacloud-rds-openapi-mcp-server'),
+)
+
+SERVER_WORKERS = max(int(os.getenv('SERVER_WORKERS', 1)), 1)
+SHARED_CACHE_ENABLED = os.getenv('SHARED_CACHE', 'on' if SERVER_WORKERS > 1 else 'off').lower() != 'off'
+
+
+def cache_path(name: str) -> str:
+    """Returns the path of cache file ``name``, creating the cache directory if needed."""
+    directory = Path(CACHE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return str(directory / name)
+
+
+def cache_dir(name: str) -> str:
+    """Returns the path of cache subdirectory ``name``, creating it if needed."""
+    path = Path(cache_path(name))
+    path.mkdir(exist_ok=True)
+    return str(path)
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk cache of tool metadata and JSON schemas.
+
+`FastMCP.add_tool` introspects every tool function: it resolves the type
+hints, builds a pydantic model of the arguments and renders its JSON schema.
+For the 50+ tools of this server that costs a noticeable part of every stdio
+start. `CachingToolManager` stores what it derived (description, input and
+output schemas, context parameter) in a JSON file and restores tools from it
+on the next start, building the argument model only when a tool is first
+called.
+
+Entries are keyed by tool and validated against a hash of the source file
+defining the function (plus the mcp and pydantic versions and the
+registration options), so editing a tool module invalidates its tools. The
+file is rewritten after activation when new entries were computed; running
+the server once, e.g. while building an image, prepares it.
+
+`CachingToolManager` also keeps the rendered `tools/list` result until the
+set of tools changes, so listing tools does not rebuild it per request.
+
+Restoring tools relies on `Tool` fields and `Tool.from_function` options of
+recent mcp releases. On older releases the cache is turned off and tools are
+added by the stock `ToolManager`.
+
+Tuning (environment variables):
+    TOOL_SCHEMA_CACHE: path of the cache file (default: tool_schemas.json in RDS_MCP_CACHE_DIR);
+        "off" disables it.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Callable, Dict, List, Optional
+
+from mcp.server.fastmcp.tools import Tool, ToolManager
+from mcp.server.fastmcp.utilities.func_metadata import FuncMetadata, func_metadata
+from pydantic import Field
+
+from alibabacloud_rds_openapi_mcp_server.core.storage import cache_path
+
+try:
+    from mcp.shared.tool_name_validation import validate_and_warn_tool_name
+except ImportError:  # older mcp releases do not validate tool names
+    validate_and_warn_tool_name = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT = 1
+
+# Tool.from_function options a cached tool is rebuilt with.
+_RESTORE_OPTIONS = ('title', 'annotations', 'icons', 'meta', 'structured_output')
+
+
+def _cache_supported() -> bool:
+    """Whether the installed mcp has the Tool APIs cached tools are restored through."""
+    options = inspect.signature(Tool.from_function).parameters
+    return (all(option in options for option in _RESTORE_OPTIONS) and hasattr(Tool, 'output_schema')
+            and 'convert_result' in inspect.signature(Tool.run).parameters)
+
+
+def _package_version(name: str) -> str:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return ''
+
+
+class CachedTool(Tool):
+    """A tool restored from the schema cache; its argument model is built on the first call."""
+
+    fn_metadata: Optional[FuncMetadata] = Field(default=None, exclude=True)
+    cached_output_schema: Optional[Dict[str, Any]] = Field(default=None, exclude=True)
+    structured_output: Optional[bool] = Field(default=None, exclude=True)
+
+    @property
+    def output_schema(self) -> Optional[Dict[str, Any]]:
+        return self.cached_output_schema
+
+    async def run(self, arguments: Dict[str, Any], context: Any = None, convert_result: bool = False) -> Any:
+        if self.fn_metadata is None:
+            self.fn_metadata = func_metadata(
+                self.fn,
+                skip_names=[self.context_kwarg] if self.context_kwarg is not None else [],
+                structured_output=self.structured_output,
+            )
+        return await super().run(arguments, context=context, convert_result=convert_result)
+
+
+class ToolSchemaCache:
+    """Tool metadata by tool, persisted as one JSON file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._dirty = False
+        self._file_hashes: Dict[str, Optional[str]] = {}
+        self._environment = f"mcp={_package_version('mcp')};pydantic={_package_version('pydantic')}"
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    data = json.load(f)
+                self._entries = data['tools'] if data.get('format') == CACHE_FORMAT else {}
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError, KeyError, AttributeError) as e:
+                logger.warning(f"Ignoring unreadable tool schema cache {self.path}: {e}")
+                self._entries = {}
+        return self._entries
+
+    def _file_hash(self, filename: str) -> Optional[str]:
+        if filename not in self._file_hashes:
+            try:
+                with open(filename, 'rb') as f:
+                    self._file_hashes[filename] = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                self._file_hashes[filename] = None
+        return self._file_hashes[filename]
+
+    def _key(self, fn: Callable, options: Dict[str, Any]) -> Optional[tuple]:
+        code = getattr(fn, '__code__', None)
+        file_hash = self._file_hash(code.co_filename) if code is not None else None
+        if file_hash is None:
+            return None
+        key = f"{fn.__module__}:{fn.__qualname__}:{options.get('name') or fn.__name__}"
+        source_hash = hashlib.sha256(
+            f"{file_hash};{self._environment};{sorted(options.items())!r}".encode('utf-8')).hexdigest()
+        return key, source_hash
+
+    def load(self, fn: Callable, options: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Returns the cached metadata of ``fn`` registered with ``options``, if still valid."""
+        key = self._key(fn, options)
+        with self._lock:
+            entry = self._load().get(key[0]) if key else None
+            if entry is not None and entry.get('source_hash') == key[1]:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def store(self, fn: Callable, options: Dict[str, Any], tool: Tool):
+        key = self._key(fn, options)
+        if key is None:
+            return
+        entry = {
+            'source_hash': key[1],
+            'name': tool.name,
+            'title': tool.title,
+            'description': tool.description,
+            'parameters': tool.parameters,
+            'output_schema': tool.output_schema,
+            'is_async': tool.is_async,
+            'context_kwarg': tool.context_kwarg,
+        }
+        with self._lock:
+            self._load()[key[0]] = entry
+            self._dirty = True
+
+    def save(self):
+        """Writes the cache file if entries were added since it was read."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps({'format': CACHE_FORMAT, 'tools': self._entries}, sort_keys=True,
+                              separators=(',', ':'))
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp, self.path)
+                self._dirty = False
+            except OSError as e:
+                logger.warning(f"Failed to write tool schema cache {self.path}: {e}")
+
+
+def default_schema_cache() -> Optional[ToolSchemaCache]:
+    """The cache configured by TOOL_SCHEMA_CACHE, or None when it is turned off or unusable."""
+    path = os.getenv('TOOL_SCHEMA_CACHE', '')
+    if path.lower() == 'off':
+        return None
+    if not _cache_supported():
+        logger.info(f"Tool schema cache is not supported by mcp {_package_version('mcp')}, tools will be introspected")
+        return None
+    try:
+        return ToolSchemaCache(path or cache_path('tool_schemas.json'))
+    except OSError as e:
+        logger.warning(f"Tool schema cache is unavailable, tools will be introspected: {e}")
+        return None
+
+
+class CachingToolManager(ToolManager):
+    """A ToolManager that restores tools from a `ToolSchemaCache` instead of introspecting them."""
+
+    def __init__(self, cache: Optional[ToolSchemaCache], **kwargs: Any):
+        super().__init__(**kwargs)
+        self.cache = cache
+        # Rendered tools/list result, dropped whenever tools are added or removed.
+        self.listing: Optional[List[Any]] = None
+
+    def add_tool(self, fn: Callable[..., Any], **kwargs: Any) -> Tool:
+        # Options are passed through as given, so the stock ToolManager of any
+        # mcp release accepts them when the cache is off.
+        if self.cache is None:
+            tool = super().add_tool(fn, **kwargs)
+            self.listing = None
+            return tool
+
+        name, title, description = kwargs.get('name'), kwargs.get('title'), kwargs.get('description')
+        annotations, icons, meta = kwargs.get('annotations'), kwargs.get('icons'), kwargs.get('meta')
+        structured_output = kwargs.get('structured_output')
+        options = {'name': name, 'title': title, 'description': description, 'structured_output': structured_output}
+        entry = self.cache.load(fn, options)
+        if entry is not None:
+            if validate_and_warn_tool_name is not None:
+                validate_and_warn_tool_name(entry['name'])
+            tool = CachedTool(
+                fn=fn,
+                name=entry['name'],
+                title=entry['title'],
+                description=entry['description'],
+                parameters=entry['parameters'],
+                cached_output_schema=entry['output_schema'],
+                is_async=entry['is_async'],
+                context_kwarg=entry['context_kwarg'],
+                structured_output=structured_output,
+                annotations=annotations,
+                icons=icons,
+                meta=meta,
+            )
+        else:
+            tool = Tool.from_function(fn, name=name, title=title, description=description, annotations=annotations,
+                                      icons=icons, meta=meta, structured_output=structured_output)
+            self.cache.store(fn, options, tool)
+
+        existing = self._tools.get(tool.name)
+        if existing:
+            if self.warn_on_duplicate_tools:
+                logger.warning(f"Tool already exists: {tool.name}")
+            return existing
+        self._tools[tool.name] = tool
+        self.listing = None
+        return tool
+
+    def remove_tool(self, name: str) -> None:
+        super().remove_tool(name)
+        self.listing = None
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+OpenTelemetry-compatible tracing of tool calls, OpenAPI actions and DB work.
+
+`start_span` opens a span as a child of the current one, so a tool call
+produces a tree such as::
+
+    tool show_engine_innodb_status
+    ├── openapi DescribeDBInstanceAttribute
+    │   └── http rds.aliyuncs.com            (one per attempt)
+    ├── db.connect
+    └── db.query
+
+Tool spans are started by `RdsMCP.call_tool` and carry the MCP session and
+request IDs, so individual tools need no tracing code.
+
+Two exporters are available:
+
+* ``file``: spans are appended as JSON lines using OTLP/JSON field names
+  (traceId, spanId, parentSpanId, startTimeUnixNano, ...). No extra
+  dependency is needed.
+* ``otlp``: spans are sent through the OpenTelemetry SDK and its OTLP/HTTP
+  exporter, configured with the standard ``OTEL_EXPORTER_OTLP_*`` variables.
+  It requires the ``tracing`` extra (``opentelemetry-sdk`` and
+  ``opentelemetry-exporter-otlp-proto-http``); without it the file exporter
+  is used.
+
+Tracing is off by default and then costs one flag check per span.
+
+Tuning (environment variables):
+    TRACING_EXPORTER: "none" (default), "file" or "otlp".
+    TRACING_FILE: output of the file exporter (default: traces.jsonl in RDS_MCP_CACHE_DIR).
+    OTEL_SERVICE_NAME: service name of the exported spans.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from alibabacloud_rds_openapi_mcp_server.core.storage import cache_path
+
+logger = logging.getLogger(__name__)
+
+EXPORTERS = ('none', 'file', 'otlp')
+SERVICE_NAME = os.getenv('OTEL_SERVICE_NAME', 'alibabacloud-rds-openapi-mcp-server')
+
+
+class Span:
+    """A finished-or-running span of the built-in tracer, mirroring the OpenTelemetry span API."""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_ns', 'end_ns', 'attributes', 'status',
+                 'status_message', 'events')
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else ''
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.status = 'UNSET'
+        self.status_message = ''
+        self.events = []
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException):
+        self.status = 'ERROR'
+        self.status_message = str(exception)
+        self.events.append({'name': 'exception', 'timeUnixNano': time.time_ns(),
+                            'attributes': {'exception.type': type(exception).__name__,
+                                           'exception.message': str(exception)}})
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id,
+            'name': self.name,
+            'startTimeUnixNano': self.start_ns,
+            'endTimeUnixNano': self.end_ns,
+            'attributes': self.attributes,
+            'events': self.events,
+            'status': {'code': self.status, 'message': self.status_message},
+            'resource': {'service.name': SERVICE_NAME},
+        }
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_exception(self, exception: BaseException):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class FileSpanExporter:
+    """Appends finished spans to a file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8', buffering=1 << 16)
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_json(), default=str, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+
+    def shutdown(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('rds_mcp_current_span', default=None)
+
+_setup_lock = threading.Lock()
+_configured = False
+_exporter: Optional[FileSpanExporter] = None
+_otel_tracer = None
+
+
+def _otel_setup():
+    from opentelemetry import trace
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    provider = TracerProvider(resource=Resource.create({'service.name': SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    atexit.register(provider.shutdown)
+    return trace.get_tracer(__name__)
+
+
+def configure(exporter: Optional[str] = None, path: Optional[str] = None):
+    """(Re)configures tracing; by default from TRACING_EXPORTER and TRACING_FILE."""
+    global _configured, _exporter, _otel_tracer
+    exporter = (exporter or os.getenv('TRACING_EXPORTER') or 'none').lower()
+    if exporter not in EXPORTERS:
+        logger.warning(f"Unknown TRACING_EXPORTER {exporter!r}, tracing is disabled. Supported: {', '.join(EXPORTERS)}")
+        exporter = 'none'
+    with _setup_lock:
+        if _exporter is not None:
+            _exporter.shutdown()
+        _exporter, _otel_tracer = None, None
+        if exporter == 'otlp':
+            try:
+                _otel_tracer = _otel_setup()
+            except ImportError as e:
+                logger.warning(f"OpenTelemetry SDK is not installed ({e}); writing spans to a file instead.")
+                exporter = 'file'
+        if exporter == 'file':
+            _exporter = FileSpanExporter(path or os.getenv('TRACING_FILE') or cache_path('traces.jsonl'))
+        _configured = True
+
+
+def _ensure_configured():
+    if not _configured:
+        configure()
+
+
+def enabled() -> bool:
+    _ensure_configured()
+    return _exporter is not None or _otel_tracer is not None
+
+
+@contextmanager
+def start_span(name: str, **attributes: Any) -> Iterator[Any]:
+    """
+    Runs the block inside a span named ``name``, child of the current span.
+
+    Exceptions raised by the block are recorded on the span and re-raised.
+    Yields the span (or a no-op stand-in when tracing is off), which supports
+    ``set_attribute`` and ``record_exception``.
+    """
+    if not enabled():
+        yield _NOOP_SPAN
+        return
+    if _otel_tracer is not None:
+        with _otel_tracer.start_as_current_span(
+                name, attributes={k: v for k, v in attributes.items() if v is not None}) as otel_span:
+            yield otel_span
+        return
+
+    span = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_exception(e)
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        _current_span.reset(token)
+        exporter = _exporter
+        if exporter is not None:
+            exporter.export(span)
+
+
+def _shutdown():
+    if _exporter is not None:
+        _exporter.shutdown()
+
+
+atexit.register(_shutdown)
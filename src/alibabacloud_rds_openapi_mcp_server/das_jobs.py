@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for calling DAS (Database Autonomy Service) RPC actions.
+
+Several DAS actions, e.g. DescribeSqlInsightStatistic, are asynchronous jobs:
+the first call returns ``State: RUNNING`` together with a ``ResultId`` and the
+caller has to re-issue the request with ``JobId=<ResultId>`` until the job
+leaves the RUNNING state. `poll_das_job` does this without blocking the event
+loop, backing off exponentially with jitter between polls.
+"""
+
+import asyncio
+import random
+from typing import Any, Dict
+
+from alibabacloud_rds_openapi_mcp_server.core.lazy_import import lazy_module
+from alibabacloud_rds_openapi_mcp_server.core.metrics import DAS_JOB_LATENCY
+from alibabacloud_rds_openapi_mcp_server.core.openapi_executor import call_openapi
+
+open_api_models = lazy_module('alibabacloud_tea_openapi.models')
+openapi_util = lazy_module('alibabacloud_openapi_util.client')
+util_models = lazy_module('alibabacloud_tea_util.models')
+
+DAS_API_VERSION = '2020-01-16'
+
+
+class DasJobError(Exception):
+    """Raised when a DAS async job fails or does not finish in time."""
+    pass
+
+
+def das_api_params(action: str) -> "open_api_models.Params":
+    return open_api_models.Params(
+        action=action,
+        version=DAS_API_VERSION,
+        protocol='HTTPS',
+        pathname='/',
+        method='POST',
+        auth_type='AK',
+        style='RPC',
+        req_body_type='formData',
+        body_type='json'
+    )
+
+
+async def call_das_api(client, action: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Calls a DAS RPC action and returns the response body."""
+    req = open_api_models.OpenApiRequest(
+        query=openapi_util.Client.query({}),
+        body=openapi_util.Client.parse_to_map(body)
+    )
+    response = await call_openapi(client.call_api, das_api_params(action), req, util_models.RuntimeOptions())
+    return response['body']
+
+
+async def poll_das_job(client,
+                       action: str,
+                       body: Dict[str, Any],
+                       initial_delay: float = 0.5,
+                       max_delay: float = 5.0,
+                       timeout: float = 60.0) -> Dict[str, Any]:
+    """
+    Submits a DAS async job and polls it until it leaves the RUNNING state.
+
+    Args:
+        client: DAS SDK client.
+        action: The DAS action name, e.g. 'DescribeSqlInsightStatistic'.
+        body: Request body without ``JobId``.
+        initial_delay: Delay before the first re-poll, in seconds.
+        max_delay: Upper bound of the backoff delay, in seconds.
+        timeout: Overall time budget for the job, in seconds.
+
+    Returns:
+        The ``Data`` object of the finished job.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + timeout
+    delay = initial_delay
+    job_id = ""
+    status = "error"
+    try:
+        while True:
+            data = (await call_das_api(client, action, {**body, "JobId": job_id}))['Data']
+            state = data.get('State')
+            if state == "SUCCESS":
+                status = "ok"
+                return data
+            if state != "RUNNING":
+                raise DasJobError(f"DAS job {action} ended in state {state}: {data.get('Message') or data}")
+            job_id = data.get('ResultId') or job_id
+            # "Equal jitter": wait at least half of the current delay so polls of
+            # concurrent jobs spread out without collapsing to zero.
+            sleep_for = delay / 2 + random.uniform(0, delay / 2)
+            if loop.time() + sleep_for > deadline:
+                raise DasJobError(f"DAS job {action} did not finish within {timeout}s")
+            await asyncio.sleep(sleep_for)
+            delay = min(delay * 2, max_delay)
+    finally:
+        DAS_JOB_LATENCY.observe(loop.time() - started, action=action, status=status)
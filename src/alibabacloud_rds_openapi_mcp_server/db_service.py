@@ -1,13 +1,70 @@
 import asyncio
+import atexit
+import contextvars
+import csv
+import io
 import json
+import logging
+import os
 import random
-import socket
+import signal
 import string
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
 
 import pymysql
-from alibabacloud_rds20140815 import models as rds_20140815_models
 
-from utils import get_rds_client, get_rds_account
+from utils import get_rds_client, get_rds_account, get_aksk
+from alibabacloud_rds_openapi_mcp_server.core.client_registry import credential_digest, credential_scope
+from alibabacloud_rds_openapi_mcp_server.core.lazy_import import lazy_module
+from alibabacloud_rds_openapi_mcp_server.core.metrics import DB_PHASE_LATENCY
+from alibabacloud_rds_openapi_mcp_server.core.openapi_executor import call_openapi
+from alibabacloud_rds_openapi_mcp_server.core.storage import cache_path
+from alibabacloud_rds_openapi_mcp_server.core.tracing import start_span
+from alibabacloud_rds_openapi_mcp_server.inventory import get_inventory
+
+rds_20140815_models = lazy_module('alibabacloud_rds20140815.models')
+
+logger = logging.getLogger(__name__)
+
+# Temporary accounts are kept for reuse across DBService sessions. An account
+# idle for ACCOUNT_IDLE_TIMEOUT seconds, or older than ACCOUNT_MAX_LIFETIME,
+# is deleted by the reaper once no session is using it. Accounts created with
+# an STS token live at most ACCOUNT_STS_MAX_LIFETIME seconds, so they are
+# deleted before the shortest STS token (900s) has expired. Accounts whose
+# deletion failed are recorded and retried every ORPHAN_RETRY_INTERVAL seconds,
+# also by later runs.
+ACCOUNT_IDLE_TIMEOUT = int(os.getenv("DB_ACCOUNT_IDLE_TIMEOUT", 600))
+ACCOUNT_MAX_LIFETIME = int(os.getenv("DB_ACCOUNT_MAX_LIFETIME", 3600))
+ACCOUNT_STS_MAX_LIFETIME = int(os.getenv("DB_ACCOUNT_STS_MAX_LIFETIME", 600))
+ACCOUNT_REAP_INTERVAL = 30
+ORPHAN_RETRY_INTERVAL = 600
+
+# Database connections are pooled per instance. At most DB_POOL_MAX_PER_INSTANCE
+# connections are open against one instance; idle ones are closed after
+# DB_POOL_MAX_IDLE seconds.
+DB_POOL_MAX_PER_INSTANCE = int(os.getenv("DB_POOL_MAX_PER_INSTANCE", 8))
+DB_POOL_MAX_IDLE = int(os.getenv("DB_POOL_MAX_IDLE", 300))
+DB_POOL_ACQUIRE_TIMEOUT = 30
+
+# Result size limits applied by DBService.execute_sql.
+QUERY_MAX_ROWS = int(os.getenv("DB_QUERY_MAX_ROWS", 1000))
+QUERY_MAX_BYTES = int(os.getenv("DB_QUERY_MAX_BYTES", 1024 * 1024))
+FETCH_BATCH_SIZE = 500
+
+# How long a resolved instance engine/endpoint is trusted before re-probing.
+TOPOLOGY_TTL = int(os.getenv("DB_TOPOLOGY_TTL", 300))
+
+
+@contextmanager
+def _phase(phase, instance_id, db_system=None):
+    """Times a DBService phase and traces it as a ``db.<phase>`` span."""
+    with DB_PHASE_LATENCY.time(phase=phase), \
+            start_span(f"db.{phase}", **{'db.instance_id': instance_id, 'db.system': db_system}):
+        yield
 
 
 def random_str(length=8):
@@ -34,17 +91,332 @@ def random_password(length=32):
     return pw
 
 
-def test_connect(host, port, timeout=1):
+async def _probe(host, port, timeout):
+    _, writer = await asyncio.wait_for(asyncio.open_connection(host, int(port)), timeout)
+    writer.close()
+    return host, int(port)
+
+
+async def race_endpoints(endpoints, timeout=1):
+    """Probes all endpoints concurrently and returns the first (host, port) that accepts a TCP connection."""
+    tasks = [asyncio.create_task(_probe(host, port, timeout)) for host, port in endpoints]
     try:
-        with socket.create_connection((host, int(port)), timeout):
-            return True
-    except Exception:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                return await next_done
+            except Exception:
+                continue
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@dataclass
+class _InstanceTopology:
+    db_type: str
+    host: str
+    port: int
+    resolved_at: float = field(default_factory=time.monotonic)
+
+
+class _TopologyCache:
+    """Caches the engine and reachable endpoint of instances for TOPOLOGY_TTL seconds."""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[Any, ...], _InstanceTopology] = {}
+
+    def get(self, key) -> Optional[_InstanceTopology]:
+        topology = self._entries.get(key)
+        if topology is not None and time.monotonic() - topology.resolved_at > TOPOLOGY_TTL:
+            del self._entries[key]
+            return None
+        return topology
+
+    def put(self, key, topology: _InstanceTopology) -> None:
+        self._entries[key] = topology
+
+    def invalidate(self, key) -> None:
+        self._entries.pop(key, None)
+
+
+_topology_cache = _TopologyCache()
+
+
+@dataclass(eq=False)
+class _LeasedAccount:
+    key: Tuple[Any, ...]
+    region_id: str
+    instance_id: str
+    account_name: str
+    account_password: str
+    client: Any
+    # Inventory index whose cached account list the account shows up in.
+    inventory: Any = None
+    # Created with an STS token, which expires.
+    temporary_credential: bool = False
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    leases: int = 0
+    retired: bool = False
+
+    def expired(self, now: float) -> bool:
+        lifetime = ACCOUNT_MAX_LIFETIME
+        if self.temporary_credential:
+            lifetime = min(lifetime, ACCOUNT_STS_MAX_LIFETIME)
+        return self.retired or now - self.created_at > lifetime
+
+
+class _TempAccountPool:
+    """
+    Shares temporary read-only accounts between DBService sessions.
+
+    Accounts are keyed by (credential, instance, database). A session leases the
+    current account for its key, creating one on first use; concurrent sessions
+    share it. Accounts are deleted when idle, past their max lifetime, or at
+    process exit (including SIGTERM, see `handle_sigterm`).
+
+    The credential an account was created with may have expired by the time it
+    is deleted, so deletion also tries the client of the latest session on the
+    instance and the server's own credentials. Accounts that still cannot be
+    deleted are recorded in the cache directory and retried later.
+    """
+
+    def __init__(self):
+        self._accounts: Dict[Tuple[Any, ...], _LeasedAccount] = {}
+        self._retired: list[_LeasedAccount] = []
+        self._locks: Dict[Tuple[Any, ...], asyncio.Lock] = {}
+        # Client of the latest session, by (region, instance).
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        # Accounts whose deletion failed, as (region, instance, account name); loaded on first use.
+        self._orphans: Optional[list[Tuple[str, str, str]]] = None
+        self._orphans_retried_at = float('-inf')
+        self._reaper: Optional[asyncio.Task] = None
+
+    async def acquire(self, key, region_id, instance_id, client, create_account, inventory=None,
+                      temporary_credential=False) -> _LeasedAccount:
+        self._ensure_reaper()
+        self._clients[(region_id, instance_id)] = client
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            account = self._accounts.get(key)
+            if account is not None and account.expired(time.monotonic()):
+                self._retire(account)
+                account = None
+            if account is None:
+                account_name, account_password = await create_account()
+                account = _LeasedAccount(key, region_id, instance_id, account_name, account_password, client,
+                                         inventory, temporary_credential)
+                previous = self._accounts.get(key)
+                if previous is not None:
+                    # Created concurrently under a lock the reaper had just pruned.
+                    self._retire(previous)
+                self._accounts[key] = account
+                _invalidate_accounts(account)
+            account.leases += 1
+            return account
+
+    async def release(self, account: _LeasedAccount, discard: bool = False) -> None:
+        account.leases -= 1
+        account.last_used = time.monotonic()
+        if discard:
+            self._retire(account)
+        if account.retired and account.leases == 0:
+            await self._delete(account)
+
+    def _retire(self, account: _LeasedAccount) -> None:
+        account.retired = True
+        if self._accounts.get(account.key) is account:
+            del self._accounts[account.key]
+            self._retired.append(account)
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.get_running_loop().create_task(self._reap_loop())
+
+    async def _reap_loop(self) -> None:
+        while True:
+            await asyncio.sleep(ACCOUNT_REAP_INTERVAL)
+            await self.reap()
+
+    async def reap(self) -> None:
+        now = time.monotonic()
+        for account in list(self._accounts.values()):
+            if account.leases == 0 and (account.expired(now) or now - account.last_used > ACCOUNT_IDLE_TIMEOUT):
+                self._retire(account)
+        for account in list(self._retired):
+            if account.leases == 0:
+                await self._delete(account)
+        if now - self._orphans_retried_at >= ORPHAN_RETRY_INTERVAL:
+            self._orphans_retried_at = now
+            await self._retry_orphans()
+        self._prune()
+
+    def _prune(self) -> None:
+        """Drops the locks and clients of keys and instances that no longer have an account."""
+        for key, lock in list(self._locks.items()):
+            if key not in self._accounts and not lock.locked():
+                del self._locks[key]
+        in_use = {(a.region_id, a.instance_id) for a in list(self._accounts.values()) + self._retired}
+        in_use.update((region_id, instance_id) for region_id, instance_id, _ in self._orphans or ())
+        for instance in list(self._clients):
+            if instance not in in_use:
+                del self._clients[instance]
+
+    def _candidate_clients(self, region_id, instance_id, client=None) -> list:
+        """Clients to delete an account with: latest session's, the creator's, then the server's own."""
+        candidates = []
+        for candidate in (self._clients.get((region_id, instance_id)), client, _default_client(region_id)):
+            if candidate is not None and all(candidate is not c for c in candidates):
+                candidates.append(candidate)
+        return candidates
+
+    async def _delete(self, account: _LeasedAccount) -> None:
+        if account in self._retired:
+            self._retired.remove(account)
+        await asyncio.to_thread(_connection_pool.discard, account.instance_id, account.account_name)
+        with _phase('account_delete', account.instance_id):
+            deleted = await self._delete_account(account.region_id, account.instance_id, account.account_name,
+                                                 account.client)
+        if not deleted:
+            await asyncio.to_thread(self._record_orphan, account.region_id, account.instance_id,
+                                    account.account_name)
+        _invalidate_accounts(account)
+
+    async def _delete_account(self, region_id, instance_id, account_name, client=None) -> bool:
+        request = _delete_account_request(instance_id, account_name)
+        error = None
+        for candidate in self._candidate_clients(region_id, instance_id, client):
+            try:
+                await call_openapi(candidate.delete_account, request)
+                return True
+            except Exception as e:
+                if _account_gone(e):
+                    return True
+                error = e
+        logger.warning(f"Failed to delete temporary account {account_name} of {instance_id}: {error}")
         return False
 
+    async def _retry_orphans(self) -> None:
+        orphans = await asyncio.to_thread(self._load_orphans)
+        for orphan in list(orphans):
+            if await self._delete_account(*orphan):
+                await asyncio.to_thread(self._forget_orphan, orphan)
+
+    def close_all(self) -> None:
+        """Deletes every pooled account synchronously; registered to run at process exit."""
+        accounts = list(self._accounts.values()) + self._retired
+        self._accounts.clear()
+        self._retired.clear()
+        _connection_pool.close_all()
+        for account in accounts:
+            request = _delete_account_request(account.instance_id, account.account_name)
+            error = None
+            for candidate in self._candidate_clients(account.region_id, account.instance_id, account.client):
+                try:
+                    candidate.delete_account(request)
+                    break
+                except Exception as e:
+                    if _account_gone(e):
+                        break
+                    error = e
+            else:
+                logger.warning(f"Failed to delete temporary account {account.account_name}: {error}")
+                self._record_orphan(account.region_id, account.instance_id, account.account_name)
+
+    # The record of orphaned accounts is shared by runs, so every change is
+    # written through to disk. These methods block.
+
+    def _load_orphans(self) -> list:
+        if self._orphans is None:
+            self._orphans = []
+            try:
+                with open(_orphans_path(), encoding='utf-8') as f:
+                    self._orphans = [tuple(orphan) for orphan in json.load(f)]
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable record of orphaned temporary accounts: {e}")
+        return self._orphans
+
+    def _record_orphan(self, region_id, instance_id, account_name) -> None:
+        orphans = self._load_orphans()
+        if (region_id, instance_id, account_name) not in orphans:
+            orphans.append((region_id, instance_id, account_name))
+            self._save_orphans()
+
+    def _forget_orphan(self, orphan) -> None:
+        if orphan in self._load_orphans():
+            self._orphans.remove(orphan)
+            self._save_orphans()
+
+    def _save_orphans(self) -> None:
+        try:
+            path = _orphans_path()
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._orphans, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Failed to record orphaned temporary accounts {self._orphans}: {e}")
+
+
+def _invalidate_accounts(account: _LeasedAccount) -> None:
+    """Drops the cached account list of the instance, which now lacks or has an extra account."""
+    if account.inventory is not None:
+        account.inventory.invalidate([account.instance_id], ('accounts',))
+
+
+def _delete_account_request(instance_id, account_name):
+    return rds_20140815_models.DeleteAccountRequest(
+        dbinstance_id=instance_id,
+        account_name=account_name
+    )
+
+
+def _account_gone(error: Exception) -> bool:
+    """Whether a DeleteAccount failure means the account does not exist (anymore)."""
+    return 'NotFound' in str(getattr(error, 'code', ''))
+
+
+def _default_client(region_id):
+    """An RDS client with the server's own credentials, whatever request the caller runs in."""
+    try:
+        return contextvars.Context().run(get_rds_client, region_id)
+    except Exception:
+        return None
+
+
+def _orphans_path():
+    return cache_path('orphaned_accounts.json')
+
+
+_account_pool = _TempAccountPool()
+atexit.register(_account_pool.close_all)
+
+
+def _delete_accounts_and_terminate(signum, frame):
+    _account_pool.close_all()
+    signal.signal(signum, signal.SIG_DFL)
+    os.kill(os.getpid(), signum)
+
+
+def handle_sigterm() -> None:
+    """
+    Deletes the pooled temporary accounts before the process is terminated by SIGTERM.
+
+    atexit handlers do not run on SIGTERM, so without this a server stopped by
+    its host (e.g. a stdio client closing) leaks every leased account. Does
+    nothing when another SIGTERM handler is installed or off the main thread.
+    """
+    if threading.current_thread() is threading.main_thread() and \
+            signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+        signal.signal(signal.SIGTERM, _delete_accounts_and_terminate)
+
 
 class DBService:
     """
-    Create a read-only account, execute the SQL statements, and automatically delete the account afterward.
+    Lease a temporary read-only account, execute the SQL statements, and return the account to the pool afterward.
     """
     def __init__(self,
                  region_id,
@@ -56,95 +428,123 @@ class DBService:
 
         self.__db_type = None
         self.__account_name, self.__account_password = get_rds_account()
+        ak, sk, sts = get_aksk()
+        self.__credential = (ak, credential_digest(sk, sts))
+        # Pooled connections are only handed to callers presenting the same cloud credential.
+        self.credential_scope = credential_scope(ak, sk, sts)
         self.__host = None
         self.__port = None
         self.__client = get_rds_client(region_id)
         self.__db_conn = None
+        self.__lease = None
 
     async def __aenter__(self):
-        await asyncio.to_thread(self._get_db_instance_info)
+        await self._get_db_instance_info()
         if not self.__account_name or not self.__account_password:
-            await asyncio.to_thread(self._create_temp_account)
-            if self.database:
-                await asyncio.to_thread(self._grant_privilege)
+            key = (*self.__credential, self.instance_id, self.database)
+            ak, sk, sts = get_aksk()
+            self.__lease = await _account_pool.acquire(
+                key, self.region_id, self.instance_id, self.__client, self._create_temp_account,
+                get_inventory(ak, sk, sts), temporary_credential=bool(sts)
+            )
+            self.account_name = self.__lease.account_name
+            self.account_password = self.__lease.account_password
         else:
             self.account_name = self.__account_name
             self.account_password = self.__account_password
-        self.__db_conn = DBConn(self)
-        await asyncio.to_thread(self.__db_conn.connect)
+        try:
+            with _phase('connect', self.instance_id, db_system=self.db_type):
+                self.__db_conn = await asyncio.to_thread(_connection_pool.acquire, self)
+        except Exception:
+            _topology_cache.invalidate(self._topology_key)
+            await self._release_account(discard=True)
+            raise
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.__db_conn is not None:
-            await asyncio.to_thread(self.__db_conn.close)
-        if not self.__account_name or not self.__account_password:
-            await asyncio.to_thread(self._delete_account)
+            conn, self.__db_conn = self.__db_conn, None
+            await asyncio.to_thread(_connection_pool.release, conn, exc_type is not None)
+        await self._release_account()
         self.__client = None
 
-    def _get_db_instance_info(self):
-        req = rds_20140815_models.DescribeDBInstanceAttributeRequest(
-            dbinstance_id=self.instance_id,
-        )
-        self.__client.describe_dbinstance_attribute(req)
-        resp = self.__client.describe_dbinstance_attribute(req)
-        self.db_type = resp.body.items.dbinstance_attribute[0].engine.lower()
+    async def _release_account(self, discard=False):
+        if self.__lease is not None:
+            lease, self.__lease = self.__lease, None
+            await _account_pool.release(lease, discard=discard)
 
-        req = rds_20140815_models.DescribeDBInstanceNetInfoRequest(
-            dbinstance_id=self.instance_id,
+    @property
+    def _topology_key(self):
+        return (*self.__credential, self.region_id, self.instance_id)
+
+    async def _get_db_instance_info(self):
+        topology = _topology_cache.get(self._topology_key)
+        if topology is None:
+            with _phase('topology', self.instance_id):
+                topology = await self._resolve_topology()
+            _topology_cache.put(self._topology_key, topology)
+        self.db_type = topology.db_type
+        self.host = topology.host
+        self.port = topology.port
+
+    async def _resolve_topology(self) -> _InstanceTopology:
+        attribute_resp, net_info_resp = await asyncio.gather(
+            call_openapi(
+                self.__client.describe_dbinstance_attribute,
+                rds_20140815_models.DescribeDBInstanceAttributeRequest(dbinstance_id=self.instance_id)
+            ),
+            call_openapi(
+                self.__client.describe_dbinstance_net_info,
+                rds_20140815_models.DescribeDBInstanceNetInfoRequest(dbinstance_id=self.instance_id)
+            )
         )
-        resp = self.__client.describe_dbinstance_net_info(req)
-
-        # 取支持的地址:
-        vpc_host, vpc_port, public_host, public_port, dbtype = None, None, None, None, None
-        net_infos = resp.body.dbinstance_net_infos.dbinstance_net_info
-        for item in net_infos:
-            if 'Private' == item.iptype:
-                vpc_host = item.connection_string
-                vpc_port = int(item.port)
-            elif 'Public' in item.iptype:
-                public_host = item.connection_string
-                public_port = int(item.port)
-
-        if vpc_host and test_connect(vpc_host, vpc_port):
-            self.host = vpc_host
-            self.port = vpc_port
-        elif public_host and test_connect(public_host, public_port):
-            self.host = public_host
-            self.port = public_port
-        else:
+        db_type = attribute_resp.body.items.dbinstance_attribute[0].engine.lower()
+
+        # 取支持的地址: VPC 与公网地址并发探测，最先连通者胜出
+        endpoints = []
+        for item in net_info_resp.body.dbinstance_net_infos.dbinstance_net_info:
+            if 'Private' == item.iptype or 'Public' in item.iptype:
+                endpoints.append((item.connection_string, int(item.port)))
+        reachable = await race_endpoints(endpoints) if endpoints else None
+        if reachable is None:
             raise Exception('connection db failed.')
+        host, port = reachable
+        return _InstanceTopology(db_type, host, port)
 
-    def _create_temp_account(self):
-        self.account_name = 'mcp_' + random_str(10)
-        self.account_password = random_password(32)
+    async def _create_temp_account(self):
+        with _phase('account_create', self.instance_id):
+            return await self._create_and_grant_account()
+
+    async def _create_and_grant_account(self):
+        account_name = 'mcp_' + random_str(10)
+        account_password = random_password(32)
         request = rds_20140815_models.CreateAccountRequest(
             dbinstance_id=self.instance_id,
-            account_name=self.account_name,
-            account_password=self.account_password,
+            account_name=account_name,
+            account_password=account_password,
             account_description="Created by mcp for execute sql."
         )
-        self.__client.create_account(request)
-
-    def _grant_privilege(self):
-        req = rds_20140815_models.GrantAccountPrivilegeRequest(
-            dbinstance_id=self.instance_id,
-            account_name=self.account_name,
-            dbname=self.database,
-            account_privilege="ReadOnly" if self.db_type.lower() in ('mysql', 'postgresql') else "DBOwner"
-        )
-        self.__client.grant_account_privilege(req)
-
-    def _delete_account(self):
-        if not self.account_name:
-            return
-        req = rds_20140815_models.DeleteAccountRequest(
-            dbinstance_id=self.instance_id,
-            account_name=self.account_name
-        )
-        self.__client.delete_account(req)
+        await call_openapi(self.__client.create_account, request)
+        if self.database:
+            req = rds_20140815_models.GrantAccountPrivilegeRequest(
+                dbinstance_id=self.instance_id,
+                account_name=account_name,
+                dbname=self.database,
+                account_privilege="ReadOnly" if self.db_type.lower() in ('mysql', 'postgresql') else "DBOwner"
+            )
+            try:
+                await call_openapi(self.__client.grant_account_privilege, req)
+            except Exception:
+                await call_openapi(
+                    self.__client.delete_account,
+                    rds_20140815_models.DeleteAccountRequest(dbinstance_id=self.instance_id, account_name=account_name)
+                )
+                raise
+        return account_name, account_password
 
-    async def execute_sql(self, sql):
-        return await asyncio.to_thread(self.__db_conn.execute_sql, sql)
+    async def execute_sql(self, sql, max_rows=QUERY_MAX_ROWS, max_bytes=QUERY_MAX_BYTES, output_format='json'):
+        with _phase('query', self.instance_id, db_system=self.db_type):
+            return await asyncio.to_thread(self.__db_conn.execute_sql, sql, max_rows, max_bytes, output_format)
 
     @property
     def user(self):
@@ -155,6 +555,68 @@ class DBService:
         return self.account_password
 
 
+class _ResultWriter:
+    """Incrementally encodes result rows as a JSON array, JSON lines or CSV, enforcing row/byte limits."""
+
+    FORMATS = ('json', 'jsonl', 'csv')
+
+    def __init__(self, output_format='json', max_rows=None, max_bytes=None):
+        if output_format not in self.FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}. Supported: {', '.join(self.FORMATS)}")
+        self.output_format = output_format
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.row_count = 0
+        self.byte_count = 0
+        self.truncated_by = None
+        self._buffer = io.StringIO()
+        self._csv = None
+
+    def write(self, row: dict) -> bool:
+        """Appends a row; returns False (and drops the row) once a limit is reached."""
+        if self.max_rows is not None and self.row_count >= self.max_rows:
+            self.truncated_by = f"max_rows={self.max_rows}"
+            return False
+        chunk = self._encode(row)
+        size = len(chunk.encode('utf-8'))
+        if self.max_bytes is not None and self.byte_count + size > self.max_bytes and self.row_count > 0:
+            self.truncated_by = f"max_bytes={self.max_bytes}"
+            return False
+        self._buffer.write(chunk)
+        self.row_count += 1
+        self.byte_count += size
+        return True
+
+    def _encode(self, row: dict) -> str:
+        if self.output_format == 'csv':
+            line = io.StringIO()
+            if self._csv is None:
+                self._csv = list(row.keys())
+                csv.writer(line).writerow(self._csv)
+            csv.writer(line).writerow(['' if v is None else v for v in row.values()])
+            return line.getvalue()
+        encoded = json.dumps(row, ensure_ascii=False, default=str)
+        if self.output_format == 'jsonl':
+            return encoded + '\n'
+        return encoded if self.row_count == 0 else ', ' + encoded
+
+    def getvalue(self) -> str:
+        body = self._buffer.getvalue()
+        if self.output_format == 'json':
+            body = '[' + body + ']'
+            if self.truncated_by:
+                return (f'{{"rows": {body}, "truncated": true, '
+                        f'"returned_rows": {self.row_count}, "limit": "{self.truncated_by}"}}')
+            return body
+        if self.truncated_by:
+            note = {"truncated": True, "returned_rows": self.row_count, "limit": self.truncated_by}
+            if self.output_format == 'jsonl':
+                body += json.dumps(note) + '\n'
+            else:
+                body += f"# truncated: returned {self.row_count} rows ({self.truncated_by})\n"
+        return body
+
+
 class DBConn:
     def __init__(self, db_service: DBService):
         self.dbtype = db_service.db_type
@@ -163,6 +625,11 @@ class DBConn:
         self.user = db_service.user
         self.password = db_service.password
         self.database = db_service.database
+        self.instance_id = db_service.instance_id
+        # The password digest keeps a caller with the right user name but a wrong
+        # password from being handed a connection another caller opened.
+        self.pool_key = (self.instance_id, self.host, self.port, self.user, self.database,
+                         credential_digest(self.password, None), db_service.credential_scope)
         self.conn = None
 
     def connect(self):
@@ -174,7 +641,8 @@ class DBConn:
                 host=self.host, port=self.port,
                 user=self.user, password=self.password,
                 db=self.database, charset='utf8mb4',
-                cursorclass=pymysql.cursors.DictCursor
+                cursorclass=pymysql.cursors.DictCursor,
+                autocommit=True
             )
         elif self.dbtype == 'postgresql' or self.dbtype == 'pg':
             import psycopg2
@@ -183,6 +651,7 @@ class DBConn:
                 user=self.user, password=self.password,
                 dbname=self.database
             )
+            self.conn.autocommit = True
         elif self.dbtype == 'sqlserver':
             import pyodbc
             driver = 'ODBC Driver 17 for SQL Server'
@@ -190,10 +659,26 @@ class DBConn:
                 f'DRIVER={{{driver}}};SERVER={self.host},{self.port};'
                 f'UID={self.user};PWD={self.password};DATABASE={self.database}'
             )
-            self.conn = pyodbc.connect(conn_str)
+            self.conn = pyodbc.connect(conn_str, autocommit=True)
         else:
             raise ValueError('Unsupported dbtype')
 
+    def ping(self):
+        """Returns True if the connection is still usable."""
+        if self.conn is None:
+            return False
+        try:
+            if self.dbtype == 'mysql':
+                self.conn.ping(reconnect=False)
+            else:
+                cursor = self.conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
     def close(self):
         if self.conn is not None:
             try:
@@ -202,21 +687,166 @@ class DBConn:
                 print(e)
             self.conn = None
 
-    def execute_sql(self, sql):
-        cursor = self.conn.cursor()
-        cursor.execute(sql)
-        columns = [desc[0] for desc in cursor.description]
-        rows = cursor.fetchall()
+    def _open_cursor(self, sql):
+        """Opens a cursor that streams rows from the server instead of buffering the whole result."""
         if self.dbtype == 'mysql':
-            result = [dict(row) for row in rows]
-        elif self.dbtype == 'postgresql' or self.dbtype == 'pg':
-            result = [dict(zip(columns, row)) for row in rows]
-        elif self.dbtype == 'sqlserver':
-            result = [dict(zip(columns, row)) for row in rows]
-        else:
-            result = []
-        cursor.close()
+            return self.conn.cursor(pymysql.cursors.SSDictCursor)
+        words = sql.split(None, 1)
+        if self.dbtype in ('postgresql', 'pg') and words and words[0].lower() in ('select', 'with', 'values'):
+            # Named cursors (DECLARE ... CURSOR) only accept queries; WITH HOLD is
+            # required because pooled connections run in autocommit mode.
+            return self.conn.cursor(name='mcp_' + random_str(10), withhold=True)
+        # pyodbc cursors are forward-only and fetch lazily by default.
+        return self.conn.cursor()
+
+    def execute_sql(self, sql, max_rows=None, max_bytes=None, output_format='json'):
+        """
+        Executes ``sql`` and encodes the rows incrementally.
+
+        Rows are fetched in batches and written straight into the output, so
+        memory use is bounded by ``max_rows``/``max_bytes`` rather than by the
+        size of the result set. When a limit is hit the result is truncated and
+        the output carries a note saying so.
+        """
+        writer = _ResultWriter(output_format, max_rows, max_bytes)
+        cursor = self._open_cursor(sql)
+        truncated = False
         try:
-            return json.dumps(result, ensure_ascii=False)
-        except Exception as e:
-            return str(result)
+            cursor.execute(sql)
+            # A PostgreSQL named cursor only sends DECLARE on execute(); its
+            # description is filled in by the first fetch.
+            rows = cursor.fetchmany(FETCH_BATCH_SIZE) if getattr(cursor, 'name', None) else None
+            if cursor.description is None:
+                return writer.getvalue()
+            columns = [desc[0] for desc in cursor.description]
+            while not truncated:
+                if rows is None:
+                    rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    if not writer.write(row if isinstance(row, dict) else dict(zip(columns, row))):
+                        truncated = True
+                        break
+                rows = None
+        finally:
+            if truncated and self.dbtype == 'mysql':
+                # Closing an unbuffered MySQL cursor drains the remaining rows;
+                # dropping the connection is cheaper. The pool notices and forgets it.
+                self.close()
+            else:
+                cursor.close()
+        return writer.getvalue()
+
+
+class _ConnectionPool:
+    """
+    Keeps DBConn instances open between DBService sessions.
+
+    Idle connections are keyed by (instance, host, port, account, database,
+    password digest, cloud credential scope); the size cap applies per instance across all keys. Connections are
+    health-checked when borrowed and closed after DB_POOL_MAX_IDLE seconds of
+    idleness. Methods are blocking and meant to be called via asyncio.to_thread.
+    """
+
+    def __init__(self):
+        self._idle: Dict[Tuple[Any, ...], list[Tuple["DBConn", float]]] = {}
+        self._open: Dict[str, int] = {}
+        self._cond = threading.Condition()
+
+    def acquire(self, db_service: DBService) -> "DBConn":
+        candidate = DBConn(db_service)
+        key, instance_id = candidate.pool_key, candidate.instance_id
+        deadline = time.monotonic() + DB_POOL_ACQUIRE_TIMEOUT
+        while True:
+            conn = None
+            to_close = []
+            with self._cond:
+                while True:
+                    to_close.extend(self._evict_idle())
+                    if self._idle.get(key):
+                        conn = self._idle[key].pop()[0]
+                        break
+                    if self._open.get(instance_id, 0) < DB_POOL_MAX_PER_INSTANCE:
+                        self._open[instance_id] = self._open.get(instance_id, 0) + 1
+                        break
+                    victim = self._pop_idle_of_instance(instance_id)
+                    if victim is not None:
+                        # Make room by closing a connection opened with another account/database.
+                        to_close.append(victim)
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No database connection available for {instance_id}")
+                    self._cond.wait(remaining)
+            for stale in to_close:
+                stale.close()
+            if conn is not None:
+                if conn.ping():
+                    return conn
+                self._forget(conn)
+                continue
+            try:
+                candidate.connect()
+            except Exception:
+                self._forget(candidate)
+                raise
+            return candidate
+
+    def release(self, conn: "DBConn", discard: bool = False) -> None:
+        if discard or conn.conn is None:
+            self._forget(conn)
+            return
+        with self._cond:
+            self._idle.setdefault(conn.pool_key, []).append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def discard(self, instance_id: str, account_name: str) -> None:
+        """Closes the idle connections opened with the given account."""
+        with self._cond:
+            stale = []
+            for key in [k for k in self._idle if k[0] == instance_id and k[3] == account_name]:
+                stale.extend(conn for conn, _ in self._idle.pop(key))
+        for conn in stale:
+            self._forget(conn)
+
+    def close_all(self) -> None:
+        with self._cond:
+            stale = [conn for conns in self._idle.values() for conn, _ in conns]
+            self._idle.clear()
+        for conn in stale:
+            self._forget(conn)
+
+    def _forget(self, conn: "DBConn") -> None:
+        conn.close()
+        with self._cond:
+            self._open[conn.instance_id] = max(self._open.get(conn.instance_id, 0) - 1, 0)
+            self._cond.notify()
+
+    def _evict_idle(self) -> list["DBConn"]:
+        # Caller holds the lock; the returned connections must be closed outside it.
+        now = time.monotonic()
+        evicted = []
+        for key, conns in list(self._idle.items()):
+            keep = [(c, since) for c, since in conns if now - since <= DB_POOL_MAX_IDLE]
+            evicted.extend(c for c, since in conns if now - since > DB_POOL_MAX_IDLE)
+            if keep:
+                self._idle[key] = keep
+            else:
+                del self._idle[key]
+        for conn in evicted:
+            self._open[conn.instance_id] = max(self._open.get(conn.instance_id, 0) - 1, 0)
+        return evicted
+
+    def _pop_idle_of_instance(self, instance_id: str) -> Optional["DBConn"]:
+        for key, conns in self._idle.items():
+            if key[0] == instance_id and conns:
+                conn = conns.pop(0)[0]
+                if not conns:
+                    del self._idle[key]
+                # The victim's slot in _open is handed over to the caller.
+                return conn
+        return None
+
+
+_connection_pool = _ConnectionPool()
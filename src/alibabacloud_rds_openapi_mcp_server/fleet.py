@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Fleet-wide DescribeDBInstances.
+
+DescribeDBInstances returns at most 100 instances per page and works on one
+region at a time. `fan_out_instances` discovers the regions when asked for
+"all", pages through every region (the remaining pages of a region are fetched
+concurrently once the first page reports the total), and yields each region's
+rows as soon as that region completes. All requests of one fan-out share a
+single concurrency limit.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence, Union
+
+from alibabacloud_rds_openapi_mcp_server.core.lazy_import import lazy_module
+from alibabacloud_rds_openapi_mcp_server.core.openapi_executor import call_openapi
+
+rds_20140815_models = lazy_module('alibabacloud_rds20140815.models')
+
+logger = logging.getLogger(__name__)
+
+DESCRIBE_INSTANCES_PAGE_SIZE = 100
+# Upper bound on DescribeDBInstances requests in flight across all regions of one call.
+FAN_OUT_CONCURRENCY = 16
+# DescribeRegions is not region specific; any public endpoint answers it.
+DISCOVERY_REGION = 'cn-hangzhou'
+
+
+@dataclass
+class RegionInstances:
+    """The outcome of listing the instances of one region."""
+    region_id: str
+    instances: List[Any] = field(default_factory=list)
+    error: Optional[Exception] = None
+
+
+def parse_regions(region_id: Union[str, Sequence[str]]) -> List[str]:
+    """Normalizes ``"cn-hangzhou"``, ``"cn-hangzhou,cn-beijing"`` or a list into region IDs."""
+    if isinstance(region_id, str):
+        region_id = region_id.split(',')
+    regions = []
+    for region in region_id:
+        region = region.strip()
+        if region and region not in regions:
+            regions.append(region)
+    return regions
+
+
+async def list_regions(client) -> List[str]:
+    """Returns the IDs of all regions RDS is available in."""
+    response = await call_openapi(client.describe_regions, rds_20140815_models.DescribeRegionsRequest())
+    regions = []
+    for item in response.body.regions.rdsregion:
+        if item.region_id not in regions:
+            regions.append(item.region_id)
+    return regions
+
+
+async def describe_region_instances(client, region_id: str, limiter: asyncio.Semaphore,
+                                    page_size: int = DESCRIBE_INSTANCES_PAGE_SIZE) -> List[Any]:
+    """Returns every instance in ``region_id``."""
+
+    async def _page(page_number):
+        request = rds_20140815_models.DescribeDBInstancesRequest(
+            region_id=region_id,
+            page_size=page_size,
+            page_number=page_number
+        )
+        async with limiter:
+            response = await call_openapi(client.describe_dbinstances, request)
+        return response.body
+
+    first = await _page(1)
+    instances = list(first.items.dbinstance)
+    total = first.total_record_count or len(instances)
+    pages = -(-total // page_size)
+    for body in await asyncio.gather(*(_page(n) for n in range(2, pages + 1))):
+        instances.extend(body.items.dbinstance)
+    return instances
+
+
+async def fan_out_instances(regions: Sequence[str], get_client: Callable[[str], Any],
+                            concurrency: int = FAN_OUT_CONCURRENCY) -> AsyncIterator[RegionInstances]:
+    """
+    Lists the instances of every region, yielding each region as it completes.
+
+    A failing region is yielded with its ``error`` set instead of aborting the
+    whole fan-out.
+    """
+    limiter = asyncio.Semaphore(concurrency)
+
+    async def _region(region_id):
+        try:
+            return RegionInstances(region_id, await describe_region_instances(get_client(region_id), region_id, limiter))
+        except Exception as e:
+            logger.warning(f"DescribeDBInstances failed in {region_id}: {e}")
+            return RegionInstances(region_id, error=e)
+
+    for finished in asyncio.as_completed([_region(region_id) for region_id in regions]):
+        yield await finished
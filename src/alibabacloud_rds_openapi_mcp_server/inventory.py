@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+Fleet inventory snapshot.
+
+The same instances are described again and again within a session
+(attribute, net info, accounts, databases). `InventoryIndex` keeps the last
+answer of each of those calls per instance, in a columnar table: one list per
+column, one row per instance ID, and a fetch time for every cell. Read tools
+answer from a cell while it is younger than ``INVENTORY_TTL``; mutation tools
+invalidate the row of the instance they touch.
+
+DescribeDBInstances carries no modification time, so a change is detected from
+a fingerprint of the listing fields that change with the instance (status,
+class, version, lock, description, ...). With ``INVENTORY_REFRESH`` turned on, a
+background task lists the regions the index has seen every
+``INVENTORY_REFRESH_INTERVAL`` seconds: rows whose fingerprint is unchanged keep
+their attribute fresh, changed or vanished rows are invalidated, and tags are
+reloaded with one DescribeTags call per region. The task stops once the index
+has not been read for ``INVENTORY_REFRESH_IDLE`` seconds and is started again by
+the next read.
+
+There is one index per AccessKey pair, persisted as gzipped JSON in the cache
+directory. The STS token is not part of the key, so a refreshed token keeps its
+index. At most ``INVENTORY_MAX_INDEXES`` indexes are kept; the least recently
+used one is dropped together with its snapshot file, and snapshot files left
+unused for ``INVENTORY_SNAPSHOT_MAX_AGE`` seconds are deleted. With several worker processes, invalidations are also published
+through an `InvalidationLog`, so a mutation served by one worker is not
+answered from another worker's stale cell.
+
+Tuning (environment variables):
+    INVENTORY_TTL: seconds a cached cell is served for (default 300).
+    INVENTORY_REFRESH: set to "on" to refresh indexes in the background (default off).
+    INVENTORY_REFRESH_INTERVAL: seconds between background refreshes (default 120).
+    INVENTORY_REFRESH_IDLE: seconds without reads after which the refresh stops (default 900).
+    INVENTORY_MAX_INDEXES: credentials with an index in memory (default 16).
+    INVENTORY_SNAPSHOT_MAX_AGE: seconds after which an unused snapshot file is deleted (default 7 days).
+"""
+
+import asyncio
+import atexit
+import copy
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from alibabacloud_rds_openapi_mcp_server.core.client_registry import credential_scope
+from alibabacloud_rds_openapi_mcp_server.core.invalidation_log import InvalidationLog
+from alibabacloud_rds_openapi_mcp_server.core.lazy_import import lazy_module
+from alibabacloud_rds_openapi_mcp_server.core.openapi_executor import call_openapi, run_blocking
+from alibabacloud_rds_openapi_mcp_server.core.storage import SHARED_CACHE_ENABLED, cache_path
+from alibabacloud_rds_openapi_mcp_server.fleet import describe_region_instances
+
+rds_20140815_models = lazy_module('alibabacloud_rds20140815.models')
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_TTL = int(os.getenv('INVENTORY_TTL', 300))
+INVENTORY_REFRESH_ENABLED = os.getenv('INVENTORY_REFRESH', 'off').lower() == 'on'
+INVENTORY_REFRESH_INTERVAL = int(os.getenv('INVENTORY_REFRESH_INTERVAL', 120))
+INVENTORY_REFRESH_IDLE = int(os.getenv('INVENTORY_REFRESH_IDLE', 900))
+INVENTORY_MAX_INDEXES = int(os.getenv('INVENTORY_MAX_INDEXES', 16))
+INVENTORY_SNAPSHOT_MAX_AGE = int(os.getenv('INVENTORY_SNAPSHOT_MAX_AGE', 7 * 86400))
+REFRESH_CONCURRENCY = 4
+
+# Cached per-instance API answers; `region_id` and `fingerprint` are bookkeeping.
+DATA_COLUMNS = ('attribute', 'net_info', 'accounts', 'databases', 'tags')
+COLUMNS = ('region_id', 'fingerprint') + DATA_COLUMNS
+# Columns fully described by the listing fingerprint; the rest only age out.
+LISTED_COLUMNS = ('attribute',)
+
+_FINGERPRINT_FIELDS = ('DBInstanceStatus', 'DBInstanceClass', 'DBInstanceDescription', 'EngineVersion',
+                       'LockMode', 'LockReason', 'ExpireTime', 'ConnectionString', 'DBInstanceStorageType',
+                       'DBInstanceNetType', 'ReadOnlyDBInstanceIds', 'ZoneId')
+
+
+def listing_fingerprint(item: Any) -> str:
+    """Fingerprints the mutable fields of a DescribeDBInstances item."""
+    item = item if isinstance(item, dict) else item.to_map()
+    payload = json.dumps([item.get(f) for f in _FINGERPRINT_FIELDS], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class InventoryIndex:
+    """Columnar per-instance snapshot with a fetch time per cell."""
+
+    def __init__(self, path: Optional[str] = None, shared: Optional[InvalidationLog] = None):
+        self._path = path
+        self._shared = shared
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._columns: Dict[str, List[Any]] = {c: [] for c in COLUMNS}
+        self._fetched_at: Dict[str, List[float]] = {c: [] for c in COLUMNS}
+        self._dirty = False
+        self._refresher: Optional[asyncio.Task] = None
+        self._last_read = time.monotonic()
+        if path and os.path.exists(path):
+            try:
+                self._load()
+            except (OSError, EOFError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable inventory snapshot {path}: {e}")
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _row(self, instance_id: str) -> int:
+        row = self._rows.get(instance_id)
+        if row is None:
+            row = self._rows[instance_id] = len(self._ids)
+            self._ids.append(instance_id)
+            for column in COLUMNS:
+                self._columns[column].append(None)
+                self._fetched_at[column].append(0.0)
+        return row
+
+    def get(self, instance_id: str, column: str, max_age: float = INVENTORY_TTL) -> Optional[Any]:
+        """Returns a copy of the cell, or None when it is missing or older than ``max_age``."""
+        if self._shared is not None:
+            self._apply_shared_invalidations()
+        with self._lock:
+            row = self._rows.get(instance_id)
+            if row is None or time.time() - self._fetched_at[column][row] > max_age:
+                return None
+            value = self._columns[column][row]
+        return copy.deepcopy(value)
+
+    def put(self, instance_id: str, column: str, value: Any, region_id: Optional[str] = None):
+        with self._lock:
+            row = self._row(instance_id)
+            now = time.time()
+            self._columns[column][row] = copy.deepcopy(value)
+            self._fetched_at[column][row] = now
+            if region_id:
+                self._columns['region_id'][row] = region_id
+                self._fetched_at['region_id'][row] = now
+            self._dirty = True
+
+    def invalidate(self, instance_ids: Iterable[str], columns: Iterable[str] = DATA_COLUMNS):
+        """Marks the given cells stale, so the next read refetches them."""
+        instance_ids, columns = list(instance_ids), tuple(columns)
+        if self._shared is not None:
+            try:
+                self._shared.publish(instance_ids, columns)
+            except sqlite3.Error as e:
+                logger.warning(f"Cannot publish inventory invalidation to other workers: {e}")
+        with self._lock:
+            for instance_id in instance_ids:
+                row = self._rows.get(instance_id)
+                if row is None:
+                    continue
+                for column in columns:
+                    self._fetched_at[column][row] = 0.0
+                self._dirty = True
+
+    def _apply_shared_invalidations(self):
+        try:
+            entries = self._shared.poll()
+        except sqlite3.Error as e:
+            logger.warning(f"Cannot read shared inventory invalidations: {e}")
+            return
+        with self._lock:
+            for instance_id, columns, at in entries:
+                row = self._rows.get(instance_id)
+                if row is None:
+                    continue
+                for column in columns:
+                    if column in self._fetched_at and self._fetched_at[column][row] <= at:
+                        self._fetched_at[column][row] = 0.0
+
+    def regions(self) -> List[str]:
+        with self._lock:
+            return sorted({r for r in self._columns['region_id'] if r})
+
+    def apply_listing(self, region_id: str, items: Iterable[Any]):
+        """
+        Reconciles the rows of ``region_id`` with a fresh DescribeDBInstances listing.
+
+        Unchanged rows get their cached attribute re-stamped as fresh; changed
+        rows and rows that are no longer listed are invalidated.
+        """
+        listed = {}
+        for item in items:
+            item_map = item if isinstance(item, dict) else item.to_map()
+            listed[item_map['DBInstanceId']] = listing_fingerprint(item_map)
+        now = time.time()
+        with self._lock:
+            for instance_id, fingerprint in listed.items():
+                row = self._row(instance_id)
+                self._columns['region_id'][row] = region_id
+                previous = self._columns['fingerprint'][row]
+                self._columns['fingerprint'][row] = fingerprint
+                if previous is None:
+                    # First listing of a row filled by read tools: nothing to compare with.
+                    continue
+                for column in DATA_COLUMNS:
+                    if previous != fingerprint:
+                        self._fetched_at[column][row] = 0.0
+                    elif column in LISTED_COLUMNS and self._fetched_at[column][row]:
+                        self._fetched_at[column][row] = now
+            for instance_id, row in self._rows.items():
+                if self._columns['region_id'][row] == region_id and instance_id not in listed:
+                    for column in DATA_COLUMNS:
+                        self._fetched_at[column][row] = 0.0
+            self._dirty = True
+
+    def apply_tags(self, region_id: str, tag_infos: Iterable[Any]):
+        """Stores the DescribeTags results of a region as ``{TagKey: TagValue}`` per instance."""
+        tags: Dict[str, Dict[str, str]] = {}
+        for info in tag_infos:
+            for instance_id in info.dbinstance_ids.dbinstance_ids or []:
+                tags.setdefault(instance_id, {})[info.tag_key] = info.tag_value
+        with self._lock:
+            in_region = [i for i, row in self._rows.items() if self._columns['region_id'][row] == region_id]
+        for instance_id in set(in_region) | set(tags):
+            self.put(instance_id, 'tags', tags.get(instance_id, {}), region_id=region_id)
+
+    def save(self):
+        """Writes the snapshot to disk if it changed since the last save."""
+        if not self._path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps({'ids': self._ids, 'columns': self._columns, 'fetched_at': self._fetched_at})
+            self._dirty = False
+        tmp = f"{self._path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp, self._path)
+
+    def close(self, delete_snapshot: bool = False):
+        """Stops the background refresh and optionally deletes the snapshot file."""
+        task, self._refresher = self._refresher, None
+        if task is not None and not task.done():
+            try:
+                task.get_loop().call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # The loop is already closed.
+        if delete_snapshot and self._path:
+            path, self._path = self._path, None
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Failed to delete inventory snapshot {path}: {e}")
+
+    def _load(self):
+        with gzip.open(self._path, 'rt', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        ids = snapshot['ids']
+        columns = {c: snapshot['columns'].get(c, [None] * len(ids)) for c in COLUMNS}
+        fetched_at = {c: snapshot['fetched_at'].get(c, [0.0] * len(ids)) for c in COLUMNS}
+        if any(len(v) != len(ids) for v in list(columns.values()) + list(fetched_at.values())):
+            raise ValueError("column length mismatch")
+        self._ids, self._columns, self._fetched_at = ids, columns, fetched_at
+        self._rows = {instance_id: row for row, instance_id in enumerate(ids)}
+
+    async def refresh_region(self, region_id: str, client):
+        """Lists ``region_id`` and its tags and reconciles the index with them."""
+        limiter = asyncio.Semaphore(REFRESH_CONCURRENCY)
+        instances, tags = await asyncio.gather(
+            describe_region_instances(client, region_id, limiter),
+            call_openapi(client.describe_tags, rds_20140815_models.DescribeTagsRequest(region_id=region_id)),
+        )
+        self.apply_listing(region_id, instances)
+        self.apply_tags(region_id, tags.body.items.tag_infos or [])
+
+    def ensure_refresher(self, get_client: Callable[[str], Any]):
+        """
+        Records a read and, when INVENTORY_REFRESH is on, starts the background
+        refresh task on the running loop unless it is already running.
+        """
+        self._last_read = time.monotonic()
+        if not INVENTORY_REFRESH_ENABLED or (self._refresher is not None and not self._refresher.done()):
+            return
+        self._refresher = asyncio.get_running_loop().create_task(self._refresh_loop(get_client))
+
+    async def _refresh_loop(self, get_client: Callable[[str], Any]):
+        # The task inherits the credentials of the request that started it; it
+        # stops on the first failure (e.g. an expired STS token) or when the
+        # index is no longer read, and is started again by the next request.
+        while True:
+            await asyncio.sleep(INVENTORY_REFRESH_INTERVAL)
+            if time.monotonic() - self._last_read > INVENTORY_REFRESH_IDLE:
+                return
+            try:
+                for region_id in self.regions():
+                    await self.refresh_region(region_id, get_client(region_id))
+                await run_blocking(self.save)
+            except Exception as e:
+                logger.warning(f"Inventory refresh stopped: {e}")
+                return
+
+
+_indexes: "OrderedDict[str, InventoryIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+_snapshots_pruned = False
+
+
+def _prune_snapshots(directory: str):
+    """Deletes snapshot files not written for INVENTORY_SNAPSHOT_MAX_AGE, e.g. of expired STS credentials."""
+    cutoff = time.time() - INVENTORY_SNAPSHOT_MAX_AGE
+    for path in glob.glob(os.path.join(directory, 'inventory-*.json.gz')):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def get_inventory(ak: Optional[str], sk: Optional[str], sts: Optional[str]) -> InventoryIndex:
+    """Returns the inventory index of a credential, loading its snapshot on first use."""
+    global _snapshots_pruned
+    # Keyed without the STS token, so a token refresh does not start a new index.
+    scope = credential_scope(ak, sk, None)
+    evicted = []
+    with _indexes_lock:
+        index = _indexes.get(scope)
+        if index is not None:
+            _indexes.move_to_end(scope)
+            return index
+        path, shared = None, None
+        try:
+            path = cache_path(f"inventory-{scope}.json.gz")
+            if not _snapshots_pruned:
+                _snapshots_pruned = True
+                _prune_snapshots(os.path.dirname(path))
+            if SHARED_CACHE_ENABLED:
+                shared = InvalidationLog(cache_path('invalidations.sqlite3'), scope)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Inventory snapshot is not persisted or shared: {e}")
+        index = _indexes[scope] = InventoryIndex(path, shared)
+        while len(_indexes) > INVENTORY_MAX_INDEXES:
+            evicted.append(_indexes.popitem(last=False)[1])
+    for old in evicted:
+        old.close(delete_snapshot=True)
+    return index
+
+
+def save_all():
+    for index in list(_indexes.values()):
+        try:
+            index.save()
+        except OSError as e:
+            logger.warning(f"Failed to persist inventory snapshot: {e}")
+
+
+atexit.register(save_all)
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Local time-series cache for the metric tools.
+
+describe_db_instance_performance, describe_monitor_metrics and
+describe_rc_metric_list are usually called again and again over overlapping
+ranges ("the last 6 hours", then "the last 12 hours", ...). Samples are kept in
+a SQLite database together with the intervals already fetched for every series,
+so a repeated query only fetches the gaps:
+
+    samples, meta = (await fetch_cached([series], start, end, fetch_range))[series]
+
+A series is identified by a key built with `series_key`, normally from the
+source API, the credential, the instance, the metric and its granularity.
+Times are epoch seconds. Coverage is only recorded up to
+``now - METRIC_CACHE_SETTLE``: recent samples may still change, so that part of
+a range is fetched again on the next call.
+
+Tuning (environment variables):
+    METRIC_CACHE: set to "off" to disable the cache.
+    METRIC_CACHE_PATH: SQLite file (default: metrics.sqlite3 in RDS_MCP_CACHE_DIR).
+    METRIC_CACHE_SETTLE: seconds before a sample is considered final (default 300).
+    METRIC_CACHE_RETENTION: samples older than this many seconds are purged on start (default 30 days).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from alibabacloud_rds_openapi_mcp_server.core.openapi_executor import run_blocking
+from alibabacloud_rds_openapi_mcp_server.core.storage import cache_path
+
+logger = logging.getLogger(__name__)
+
+METRIC_CACHE_ENABLED = os.getenv('METRIC_CACHE', 'on').lower() != 'off'
+METRIC_CACHE_SETTLE = int(os.getenv('METRIC_CACHE_SETTLE', 300))
+METRIC_CACHE_RETENTION = int(os.getenv('METRIC_CACHE_RETENTION', 30 * 86400))
+
+Sample = Tuple[int, Any]
+Interval = Tuple[int, int]
+# fetch(start, end) -> {series: (samples, meta)}; series missing from the
+# result are treated as "not fetched" and stay uncovered.
+FetchRange = Callable[[int, int], Awaitable[Dict[str, Tuple[List[Sample], Optional[dict]]]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    series TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (series, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    series TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    PRIMARY KEY (series, start)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS series_meta (
+    series TEXT PRIMARY KEY,
+    meta TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def series_key(*parts: Any) -> str:
+    """Builds a series key such as ``rds_perf|<ak>|<secret digest>|rm-xxx|MySQL_Sessions|auto``."""
+    return '|'.join('' if p is None else str(p) for p in parts)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Merges overlapping or touching intervals."""
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def subtract_intervals(start: int, end: int, covered: Iterable[Interval]) -> List[Interval]:
+    """Returns the parts of [start, end] not contained in ``covered``."""
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in sorted(covered):
+        if covered_end <= cursor:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start))
+        cursor = covered_end
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _align(interval: Interval, step: int) -> Interval:
+    start, end = interval
+    return start - start % step, end + (-end) % step
+
+
+class MetricStore:
+    """SQLite-backed samples and fetched-interval bookkeeping, safe to share between threads."""
+
+    def __init__(self, path: str, settle: int = METRIC_CACHE_SETTLE):
+        self._settle = settle
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        if path != ':memory:':
+            # Several server processes may share the file.
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+
+    def missing(self, series: str, start: int, end: int) -> List[Interval]:
+        """Returns the sub-ranges of [start, end] that have not been fetched for ``series``."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT start, end FROM coverage WHERE series = ? AND start < ? AND end > ?',
+                (series, end, start),
+            ).fetchall()
+        return subtract_intervals(start, end, rows)
+
+    def save(self, series: str, start: int, end: int, samples: Iterable[Sample],
+             meta: Optional[dict] = None, now: Optional[float] = None):
+        """Stores the samples fetched for [start, end] and marks the settled part as covered."""
+        covered_end = min(end, int(time.time() if now is None else now) - self._settle)
+        rows = [(series, int(ts), json.dumps(value)) for ts, value in samples]
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO samples VALUES (?, ?, ?)', rows)
+            if meta is not None:
+                self._conn.execute('INSERT OR REPLACE INTO series_meta VALUES (?, ?)', (series, json.dumps(meta)))
+            if covered_end <= start:
+                return
+            touching = self._conn.execute(
+                'SELECT start, end FROM coverage WHERE series = ? AND start <= ? AND end >= ?',
+                (series, covered_end, start),
+            ).fetchall()
+            new_start = min([start] + [s for s, _ in touching])
+            new_end = max([covered_end] + [e for _, e in touching])
+            self._conn.execute(
+                'DELETE FROM coverage WHERE series = ? AND start <= ? AND end >= ?',
+                (series, covered_end, start),
+            )
+            self._conn.execute('INSERT INTO coverage VALUES (?, ?, ?)', (series, new_start, new_end))
+
+    def load(self, series: str, start: int, end: int) -> List[Sample]:
+        """Returns the cached samples of ``series`` in [start, end], in time order."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT ts, value FROM samples WHERE series = ? AND ts >= ? AND ts <= ? ORDER BY ts',
+                (series, start, end),
+            ).fetchall()
+        return [(ts, json.loads(value)) for ts, value in rows]
+
+    def meta(self, series: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute('SELECT meta FROM series_meta WHERE series = ?', (series,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def purge(self, before: int):
+        """Drops samples and coverage older than ``before``."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM samples WHERE ts < ?', (before,))
+            self._conn.execute('DELETE FROM coverage WHERE end <= ?', (before,))
+            self._conn.execute('UPDATE coverage SET start = ? WHERE start < ?', (before, before))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[MetricStore] = None
+_store_lock = threading.Lock()
+
+
+def get_metric_store() -> Optional[MetricStore]:
+    """Returns the process-wide store, or None when the cache is disabled."""
+    global _store
+    if not METRIC_CACHE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            path = os.getenv('METRIC_CACHE_PATH') or cache_path('metrics.sqlite3')
+            try:
+                _store = MetricStore(path)
+                _store.purge(int(time.time()) - METRIC_CACHE_RETENTION)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Metric cache at {path} is unavailable, using memory instead: {e}")
+                _store = MetricStore(':memory:')
+    return _store
+
+
+async def fetch_cached(series: Sequence[str], start: int, end: int, fetch: FetchRange,
+                       align: int = 1, store: Optional[MetricStore] = None
+                       ) -> Dict[str, Tuple[List[Sample], Optional[dict]]]:
+    """
+    Returns ``{series: (samples, meta)}`` for [start, end], fetching only what the cache lacks.
+
+    The gaps of all series are merged (and widened to multiples of ``align``
+    seconds), then every gap is fetched concurrently with one ``fetch`` call
+    that returns the samples of all series in that range.
+    """
+    store = store or get_metric_store()
+    if store is None:
+        fetched = await fetch(start, end)
+        result = {}
+        for s in series:
+            samples, meta = fetched.get(s, ([], None))
+            result[s] = (sorted(dict(samples).items()), meta)
+        return result
+
+    gaps = []
+    for s in series:
+        gaps.extend(await run_blocking(store.missing, s, start, end))
+    gaps = merge_intervals(_align(gap, align) for gap in gaps)
+    results = await asyncio.gather(*(fetch(gap_start, gap_end) for gap_start, gap_end in gaps))
+    for (gap_start, gap_end), fetched in zip(gaps, results):
+        for s in series:
+            if s in fetched:
+                samples, meta = fetched[s]
+                await run_blocking(store.save, s, gap_start, gap_end, samples, meta)
+    return {s: (await run_blocking(store.load, s, start, end), await run_blocking(store.meta, s)) for s in series}
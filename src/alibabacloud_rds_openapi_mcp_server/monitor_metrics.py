@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Pivoting of DAS GetPerformanceMetrics results.
+
+GetPerformanceMetrics returns one ``{Name, Timestamp[], Value[]}`` series per
+metric. `pivot_metrics` outer-joins them on the timestamp into a
+``(timestamps, matrix)`` pair: a sorted int64 array of epoch milliseconds and a
+float64 matrix with one column per metric, NaN where a metric has no sample.
+
+`aggregate_buckets` optionally reduces the rows to fixed-width time buckets
+(avg, max or p95 per metric), and `render_metrics` encodes the table as a
+markdown table, CSV or compact JSON (``{"columns": [...], "rows": [[...]]}``).
+
+Requests are planned with `choose_das_interval`, which picks the finest
+Interval DAS supports that keeps the whole range within a point budget per
+metric, and `split_das_windows`, which cuts the range into windows of at most
+``DAS_MAX_POINTS_PER_REQUEST`` points per metric each.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from alibabacloud_rds_openapi_mcp_server.core.metrics import RENDER_LATENCY
+from alibabacloud_rds_openapi_mcp_server.tabular import json_array_to_markdown
+
+OUTPUT_FORMATS = ('markdown', 'csv', 'json')
+AGGREGATIONS = ('none', 'avg', 'max', 'p95')
+
+# Interval values (seconds) accepted by GetPerformanceMetrics.
+DAS_INTERVALS = (5, 30, 60, 600, 1800, 3600, 7200, 21600, 86400)
+DAS_POINT_BUDGET = 300
+DAS_MAX_POINTS_PER_REQUEST = 1440
+
+
+def choose_das_interval(start_ms: int, end_ms: int, point_budget: int = DAS_POINT_BUDGET) -> int:
+    """Returns the finest supported Interval (seconds) that keeps [start_ms, end_ms] within ``point_budget`` points."""
+    span_s = max(end_ms - start_ms, 0) / 1000
+    point_budget = max(point_budget, 1)
+    return next((i for i in DAS_INTERVALS if span_s / i <= point_budget), DAS_INTERVALS[-1])
+
+
+def split_das_windows(start_ms: int, end_ms: int, interval: int,
+                      max_points_per_request: int = DAS_MAX_POINTS_PER_REQUEST) -> List[Tuple[int, int]]:
+    """Splits [start_ms, end_ms] into consecutive windows of at most ``max_points_per_request`` intervals."""
+    window_ms = interval * 1000 * max_points_per_request
+    windows = []
+    window_start = start_ms
+    while True:
+        window_end = min(window_start + window_ms, end_ms)
+        windows.append((window_start, window_end))
+        if window_end >= end_ms:
+            return windows
+        window_start = window_end
+
+
+def _as_float_array(values: Sequence) -> np.ndarray:
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.full(len(values), np.nan)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                pass
+        return out
+
+
+def pivot_metrics(series: Dict[str, Tuple[Sequence[int], Sequence]]) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    Outer-joins ``{name: (timestamps_ms, values)}`` on the timestamp.
+
+    Returns:
+        (timestamps, names, matrix): sorted unique timestamps, the metric names
+        in sorted order, and a ``(len(timestamps), len(names))`` value matrix.
+    """
+    names = sorted(series)
+    columns = [(np.asarray(series[name][0], dtype=np.int64), _as_float_array(series[name][1])) for name in names]
+    if not columns:
+        return np.empty(0, dtype=np.int64), names, np.empty((0, 0))
+    timestamps = np.unique(np.concatenate([ts for ts, _ in columns]))
+    matrix = np.full((len(timestamps), len(names)), np.nan)
+    for j, (ts, values) in enumerate(columns):
+        n = min(len(ts), len(values))
+        matrix[np.searchsorted(timestamps, ts[:n]), j] = values[:n]
+    return timestamps, names, matrix
+
+
+def aggregate_buckets(timestamps: np.ndarray, matrix: np.ndarray, bucket_ms: int,
+                      how: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Reduces rows to ``bucket_ms``-wide buckets stamped with the bucket start."""
+    if how not in AGGREGATIONS:
+        raise ValueError(f"Unsupported aggregation: {how}. Supported: {', '.join(AGGREGATIONS)}")
+    if how == 'none' or len(timestamps) == 0 or bucket_ms <= 0:
+        return timestamps, matrix
+    buckets = timestamps // bucket_ms
+    # Timestamps are sorted, so every bucket is a contiguous run of rows.
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    bucket_ts = buckets[starts] * bucket_ms
+    present = ~np.isnan(matrix)
+    if how == 'avg':
+        sums = np.add.reduceat(np.where(present, matrix, 0.0), starts, axis=0)
+        counts = np.add.reduceat(present, starts, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            reduced = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    elif how == 'max':
+        reduced = np.fmax.reduceat(matrix, starts, axis=0)
+    else:
+        ends = np.r_[starts[1:], len(timestamps)]
+        reduced = np.full((len(starts), matrix.shape[1]), np.nan)
+        for i, (s, e) in enumerate(zip(starts, ends)):
+            block = matrix[s:e]
+            has_data = present[s:e].any(axis=0)
+            if has_data.any():
+                reduced[i, has_data] = np.nanpercentile(block[:, has_data], 95, axis=0)
+    return bucket_ts, reduced
+
+
+def _format_time(timestamp_ms: int) -> str:
+    return datetime.fromtimestamp(timestamp_ms / 1000).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def render_metrics(timestamps: np.ndarray, names: List[str], matrix: np.ndarray, output_format: str = 'markdown') -> str:
+    """Encodes the pivoted table as markdown, CSV or compact JSON."""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}. Supported: {', '.join(OUTPUT_FORMATS)}")
+    with RENDER_LATENCY.time(format=output_format):
+        return _render(timestamps, names, matrix, output_format)
+
+
+def _render(timestamps: np.ndarray, names: List[str], matrix: np.ndarray, output_format: str) -> str:
+    headers = ["datetime"] + names
+    times = [_format_time(ts) for ts in timestamps.tolist()]
+    if output_format == 'json':
+        rows = np.where(np.isnan(matrix), None, matrix).tolist() if matrix.size else [[] for _ in times]
+        return json.dumps({"columns": headers, "rows": [[t] + row for t, row in zip(times, rows)]},
+                          separators=(',', ':'))
+    missing = '-' if output_format == 'markdown' else ''
+    # Plain Python floats format much faster than NumPy scalars; NaN != NaN marks gaps.
+    rows = [[t] + [repr(v) if v == v else missing for v in row] for t, row in zip(times, matrix.tolist())]
+    if output_format == 'markdown':
+        return json_array_to_markdown(headers, rows)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(headers)
+    writer.writerows(rows)
+    return output.getvalue()
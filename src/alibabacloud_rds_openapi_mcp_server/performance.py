@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Downsampling of DescribeDBInstancePerformance series.
+
+A performance key returns a list of ``PerformanceValue(date, value)`` where
+``value`` packs one or more components as ``"a&b&c"``. The series is parsed
+once into NumPy arrays (epoch seconds and an ``(n, k)`` value matrix) and then
+reduced to at most ``max_points`` rows with one of the following modes:
+
+    lttb:   Largest-Triangle-Three-Buckets on the summed components; keeps the
+            visual shape of the series, including isolated spikes.
+    minmax: min and max sample of every bucket (an envelope of the series).
+    p95:    per-bucket 95th percentile of every component.
+
+The selection modes (lttb, minmax) return original samples unchanged; p95
+returns one synthesized row per bucket stamped with the bucket start time.
+
+Long ranges are fetched in API-sized windows (`plan_time_windows`) and the
+per-window responses are stitched back into one series per key
+(`merge_performance_keys`) before downsampling. The API picks the granularity
+from the window length, so `fetch_window_span` gives every query a fixed window
+length: requests of that length always return the same granularity.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+DOWNSAMPLE_MODES = ('lttb', 'minmax', 'p95')
+
+# Window lengths performance data is requested with; see fetch_window_span.
+FETCH_WINDOW_SPANS = (timedelta(hours=1), timedelta(hours=6), timedelta(hours=24))
+
+
+@dataclass
+class PerformanceSeries:
+    """One performance key stitched together from several DescribeDBInstancePerformance responses."""
+    key: str
+    unit: str
+    value_format: str
+    values: List[Any] = field(default_factory=list)
+
+
+def fetch_window_span(start: datetime, end: datetime) -> timedelta:
+    """The shortest of FETCH_WINDOW_SPANS covering [start, end], or the longest for longer ranges."""
+    return next((span for span in FETCH_WINDOW_SPANS if end - start <= span), FETCH_WINDOW_SPANS[-1])
+
+
+def plan_time_windows(start: datetime, end: datetime, max_span: timedelta) -> List[Tuple[datetime, datetime]]:
+    """Splits [start, end] into consecutive windows no longer than ``max_span``."""
+    if end <= start:
+        return [(start, end)]
+    windows = []
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start + max_span, end)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
+
+
+def merge_performance_keys(chunks: Iterable[Sequence[Any]]) -> List[PerformanceSeries]:
+    """
+    Stitches PerformanceKey lists from windowed responses into one series per key.
+
+    Values are ordered by time and de-duplicated, since adjacent windows share
+    their boundary timestamp. Keys keep the order in which they first appear.
+    """
+    merged: Dict[str, PerformanceSeries] = {}
+    for performance_keys in chunks:
+        for perf_key in performance_keys:
+            series = merged.get(perf_key.key)
+            if series is None:
+                series = merged[perf_key.key] = PerformanceSeries(perf_key.key, perf_key.unit, perf_key.value_format)
+            series.values.extend(perf_key.values.performance_value)
+    for series in merged.values():
+        # All dates share the API's ISO 8601 UTC format, so they sort lexically.
+        by_date = {item.date: item for item in series.values}
+        series.values = [by_date[d] for d in sorted(by_date)]
+    return list(merged.values())
+
+
+def parse_series(performance_value: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """Parses PerformanceValue-like objects into (epoch_seconds, values[n, k])."""
+    dates = [item.date for item in performance_value]
+    try:
+        # The API returns UTC timestamps such as 2025-01-01T00:00:00Z.
+        timestamps = np.array([d[:-1] if d.endswith("Z") else d for d in dates], dtype="datetime64[s]")
+        timestamps = timestamps.astype(np.int64).astype(np.float64)
+    except ValueError:
+        timestamps = np.array(
+            [datetime.fromisoformat(d.replace("Z", "+00:00")).timestamp() for d in dates], dtype=np.float64
+        )
+    return timestamps, _parse_values([item.value for item in performance_value])
+
+
+def _parse_values(raw: List[str]) -> np.ndarray:
+    parts = [v.split('&') for v in raw]
+    try:
+        return np.array(parts, dtype=np.float64).reshape(len(raw), -1)
+    except ValueError:
+        # Ragged rows or non-numeric components: pad/mark them as NaN.
+        width = max((len(p) for p in parts), default=0)
+        values = np.full((len(raw), width), np.nan)
+        for i, row in enumerate(parts):
+            for j, v in enumerate(row):
+                try:
+                    values[i, j] = float(v)
+                except ValueError:
+                    pass
+        return values
+
+
+def _bucket_edges(n: int, buckets: int) -> np.ndarray:
+    return np.linspace(0, n, buckets + 1).astype(np.int64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Returns the indices selected by Largest-Triangle-Three-Buckets."""
+    n = len(x)
+    if max_points >= n:
+        return np.arange(n)
+    if max_points < 3:
+        return np.linspace(0, n - 1, max(max_points, 1)).astype(np.int64)
+    y = np.nan_to_num(y)
+    # The first and last points are always kept; the interior is split evenly.
+    edges = _bucket_edges(n - 2, max_points - 2) + 1
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for b in range(max_points - 2):
+        start, end = edges[b], edges[b + 1]
+        if b + 2 < len(edges):
+            next_x, next_y = x[edges[b + 1]:edges[b + 2]].mean(), y[edges[b + 1]:edges[b + 2]].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        px, py = x[previous], y[previous]
+        areas = np.abs((px - next_x) * (y[start:end] - py) - (px - x[start:end]) * (next_y - py))
+        previous = start + int(np.argmax(areas))
+        selected[b + 1] = previous
+    return selected
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """Returns the indices of the min and max sample of every bucket, in time order."""
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+    y = np.nan_to_num(y)
+    edges = _bucket_edges(n, max(max_points // 2, 1))
+    picked = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if start == end:
+            continue
+        window = y[start:end]
+        picked.extend(sorted({start + int(np.argmin(window)), start + int(np.argmax(window))}))
+    return np.array(picked, dtype=np.int64)
+
+
+def percentile_buckets(timestamps: np.ndarray, values: np.ndarray, max_points: int,
+                       q: float = 95) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns (bucket start times, per-bucket q-th percentile of every component)."""
+    n = len(timestamps)
+    if max_points >= n:
+        return timestamps, values
+    edges = _bucket_edges(n, max_points)
+    starts = edges[:-1][edges[:-1] < edges[1:]]
+    ends = edges[1:][edges[:-1] < edges[1:]]
+    reduced = np.array([np.nanpercentile(values[s:e], q, axis=0) for s, e in zip(starts, ends)])
+    return timestamps[starts], reduced
+
+
+def _format_date(epoch: float) -> str:
+    # Render in local time, like parse_iso_8601 does for the raw API output.
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).astimezone().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _format_value(row: np.ndarray) -> str:
+    return "&".join(format(v, "g") for v in row)
+
+
+def downsample_performance(performance_value: Sequence, max_points: int = 10,
+                           mode: str = 'lttb') -> List[Dict[str, str]]:
+    """
+    Reduces a DescribeDBInstancePerformance series to at most ``max_points`` rows.
+
+    Returns:
+        A list of ``{"Date": "YYYY-mm-dd HH:MM:SS", "Value": "a&b"}`` rows in time order.
+    """
+    if mode not in DOWNSAMPLE_MODES:
+        raise ValueError(f"Unsupported downsample mode: {mode}. Supported: {', '.join(DOWNSAMPLE_MODES)}")
+    if not performance_value:
+        return []
+    timestamps, values = parse_series(performance_value)
+    if mode == 'p95':
+        starts, reduced = percentile_buckets(timestamps, values, max_points)
+        return [{"Date": _format_date(t), "Value": _format_value(row)} for t, row in zip(starts, reduced)]
+
+    signal = np.nansum(values, axis=1)
+    if mode == 'lttb':
+        indices = lttb_indices(timestamps, signal, max_points)
+    else:
+        indices = minmax_indices(signal, max_points)
+    return [
+        {"Date": _format_date(timestamps[i]), "Value": performance_value[i].value}
+        for i in indices
+    ]
@@ -1,28 +1,25 @@
 import argparse
+import asyncio
+import hmac
 import json
 import logging
+import math
 import os
 import sys
 
 import anyio
 import uvicorn
+from mcp.server.fastmcp import Context
 from mcp.types import ToolAnnotations
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import Response, JSONResponse
+from starlette.responses import Response, JSONResponse, PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
-import time
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Union
 
-from alibabacloud_bssopenapi20171214 import models as bss_open_api_20171214_models
-from alibabacloud_openapi_util.client import Client as OpenApiUtilClient
-from alibabacloud_rds20140815 import models as rds_20140815_models
-from alibabacloud_tea_openapi import models as open_api_models
-from alibabacloud_tea_util import models as util_models
-from alibabacloud_vpc20160428 import models as vpc_20160428_models
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
@@ -31,20 +28,41 @@ src_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if src_path not in sys.path:
     sys.path.insert(0, src_path)
 
-from db_service import DBService
+from db_service import DBService, handle_sigterm
 from utils import (transform_to_iso_8601,
                    transform_to_datetime,
-                   transform_timestamp_to_datetime,
-                   parse_iso_8601,
                    transform_perf_key,
                    transform_das_key,
                    json_array_to_csv,
-                   json_array_to_markdown,
                    get_instance_max_iombps,
                    get_rds_client,
                    get_vpc_client,
-                   get_bill_client, get_das_client, convert_datetime_to_timestamp, current_request_headers)
+                   get_bill_client, get_das_client, convert_datetime_to_timestamp, current_request_headers,
+                   get_aksk)
+from alibabacloud_rds_openapi_mcp_server.bills import describe_bill_cycles
+from alibabacloud_rds_openapi_mcp_server.core.client_registry import credential_digest, credential_scope
+from alibabacloud_rds_openapi_mcp_server.core.lazy_import import lazy_module
+from alibabacloud_rds_openapi_mcp_server.core import metrics
 from alibabacloud_rds_openapi_mcp_server.core.mcp import RdsMCP
+from alibabacloud_rds_openapi_mcp_server.core.openapi_executor import call_openapi
+from alibabacloud_rds_openapi_mcp_server.core.storage import cache_dir
+from alibabacloud_rds_openapi_mcp_server.das_jobs import call_das_api, poll_das_job
+from alibabacloud_rds_openapi_mcp_server.fleet import (DISCOVERY_REGION, FAN_OUT_CONCURRENCY,
+                                                       describe_region_instances, fan_out_instances,
+                                                       list_regions, parse_regions)
+from alibabacloud_rds_openapi_mcp_server.inventory import get_inventory
+from alibabacloud_rds_openapi_mcp_server.metric_store import fetch_cached, series_key
+from alibabacloud_rds_openapi_mcp_server.monitor_metrics import (AGGREGATIONS, DAS_POINT_BUDGET, OUTPUT_FORMATS,
+                                                                 aggregate_buckets, choose_das_interval,
+                                                                 pivot_metrics, render_metrics, split_das_windows)
+from alibabacloud_rds_openapi_mcp_server.performance import (downsample_performance,
+                                                             fetch_window_span,
+                                                             merge_performance_keys,
+                                                             parse_series,
+                                                             plan_time_windows)
+
+rds_20140815_models = lazy_module('alibabacloud_rds20140815.models')
+vpc_20160428_models = lazy_module('alibabacloud_vpc20160428.models')
 
 DEFAULT_TOOL_GROUP = 'rds'
 
@@ -64,29 +82,71 @@ class OpenAPIError(Exception):
 
 READ_ONLY_TOOL = ToolAnnotations(readOnlyHint=True)
 
+# DescribeSqlInsightStatistic paging limits, per ordering.
+SQL_INSIGHT_PAGE_SIZE = 50
+SQL_INSIGHT_MAX_PAGES = 10
+SQL_INSIGHT_MAX_ROWS = 500
+
+# DescribeDBInstancePerformance is fetched in windows of one of the fixed
+# lengths of performance.FETCH_WINDOW_SPANS, with at most PERF_FETCH_CONCURRENCY
+# requests in flight per tool call.
+PERF_FETCH_CONCURRENCY = 8
+# GetPerformanceMetrics requests in flight per describe_monitor_metrics call.
+DAS_FETCH_CONCURRENCY = 4
+
+
+def _inventory():
+    return get_inventory(*get_aksk())
+
+
+async def _describe_cached(region_id: str, db_instance_id: str, column: str, fetch):
+    """Answers from the inventory snapshot while it is fresh, otherwise calls ``fetch`` and records the result."""
+    index = _inventory()
+    value = index.get(db_instance_id, column)
+    if value is None:
+        value = await fetch()
+        index.put(db_instance_id, column, value, region_id=region_id)
+    index.ensure_refresher(get_rds_client)
+    return value
+
 
 @mcp.tool(annotations=READ_ONLY_TOOL)
-async def describe_db_instances(region_id: str):
+async def describe_db_instances(region_id: Union[str, List[str]], ctx: Context = None):
     """
     Queries instances.
     Args:
-        region_id: queries instances in region id(e.g. cn-hangzhou)
+        region_id: queries instances in region id(e.g. cn-hangzhou). Pass a list of regions
+            (e.g. ["cn-hangzhou", "cn-beijing"]) or "all" to query several regions in one call.
     :return:
     """
-    client = get_rds_client(region_id)
-    try:
-        request = rds_20140815_models.DescribeDBInstancesRequest(
-            region_id=region_id,
-            page_size=100
-        )
-        response = client.describe_dbinstances(request)
-
-        res = json_array_to_csv(response.body.items.dbinstance)
+    regions = parse_regions(region_id)
+    if [r.lower() for r in regions] == ["all"]:
+        regions = await list_regions(get_rds_client(DISCOVERY_REGION))
+    index = _inventory()
+    if len(regions) == 1:
+        limiter = asyncio.Semaphore(FAN_OUT_CONCURRENCY)
+        instances = await describe_region_instances(get_rds_client(regions[0]), regions[0], limiter)
+        index.apply_listing(regions[0], instances)
+        res = json_array_to_csv(instances)
         if not res:
             return "No RDS instances found."
         return res
-    except Exception as e:
-        raise e
+
+    # Regions are listed concurrently; progress is reported as each one completes.
+    results = {}
+    async for result in fan_out_instances(regions, get_rds_client):
+        results[result.region_id] = result
+        if not result.error:
+            index.apply_listing(result.region_id, result.instances)
+        if ctx is not None:
+            status = f"failed ({result.error})" if result.error else f"{len(result.instances)} instances"
+            await ctx.report_progress(len(results), len(regions), f"{result.region_id}: {status}")
+    instances = [item for region in regions for item in results[region].instances]
+    failed = [f"{region}: {results[region].error}" for region in regions if results[region].error]
+    res = json_array_to_csv(instances) or "No RDS instances found."
+    if failed:
+        res += "\nFailed regions:\n" + "\n".join(failed)
+    return res
 
 
 @mcp.tool(annotations=READ_ONLY_TOOL)
@@ -99,9 +159,10 @@ async def describe_db_instance_attribute(region_id: str, db_instance_id: str):
     :return:
     """
     client = get_rds_client(region_id)
-    try:
+
+    async def _fetch():
         request = rds_20140815_models.DescribeDBInstanceAttributeRequest(dbinstance_id=db_instance_id)
-        response = client.describe_dbinstance_attribute(request)
+        response = await call_openapi(client.describe_dbinstance_attribute, request)
         response_map = response.body.to_map()
 
         # 计算 MaxIOMBPS
@@ -110,6 +171,20 @@ async def describe_db_instance_attribute(region_id: str, db_instance_id: str):
         if max_iombps is not None:
             instance_attribute.update({'MaxIOMBPS': max_iombps})
         return response_map
+
+    async def _fetch_tags():
+        request = rds_20140815_models.DescribeTagsRequest(region_id=region_id, dbinstance_id=db_instance_id)
+        response = await call_openapi(client.describe_tags, request)
+        return {info.tag_key: info.tag_value for info in response.body.items.tag_infos or []}
+
+    try:
+        # Tags are always part of the answer, from the inventory or fetched with the attribute.
+        response_map, tags = await asyncio.gather(
+            _describe_cached(region_id, db_instance_id, 'attribute', _fetch),
+            _describe_cached(region_id, db_instance_id, 'tags', _fetch_tags),
+        )
+        response_map['Items']['DBInstanceAttribute'][0]['Tags'] = tags
+        return response_map
     except Exception as e:
         raise e
 
@@ -120,7 +195,9 @@ async def describe_db_instance_performance(region_id: str,
                                            db_type: str,
                                            perf_keys: list[str],
                                            start_time: str,
-                                           end_time: str):
+                                           end_time: str,
+                                           max_points: int = 10,
+                                           downsample: str = "lttb"):
     """
     Queries the performance data of an instance using the RDS OpenAPI.
     This method provides performance data collected from the RDS service, such as MemCpuUsage, QPSTPS, Sessions, ThreadStatus, MBPS, etc.
@@ -132,27 +209,12 @@ async def describe_db_instance_performance(region_id: str,
         perf_keys: Performance Key  (e.g. ["MemCpuUsage", "QPSTPS", "Sessions", "COMDML", "RowDML", "ThreadStatus", "MBPS", "DetailedSpaceUsage"])
         start_time: start time(e.g. 2023-01-01 00:00)
         end_time: end time(e.g. 2023-01-01 00:00)
+        max_points: maximum number of data points returned per performance key. Default: 10.
+        downsample: how points are selected when the series is longer than max_points.
+            lttb: keep the shape of the series including spikes (default);
+            minmax: min and max value of each time bucket;
+            p95: 95th percentile of each time bucket.
     """
-
-    def _compress_performance(performance_value, max_items=10):
-        if len(performance_value) > max_items:
-            result = []
-            offset = len(performance_value) / 10
-            for i in range(0, len(performance_value), int(offset)):
-                _item = None
-                for j in range(i, min(i + int(offset), len(performance_value))):
-                    if _item is None or sum([float(v) for v in performance_value[j].value.split('&')]) > sum(
-                            [float(v) for v in _item.value.split('&')]):
-                        _item = performance_value[j]
-                
-                _item.date = parse_iso_8601(_item.date)
-                result.append(_item)
-            return result
-        else:
-            for item in performance_value:
-                item.date = parse_iso_8601(item.date)
-            return performance_value
-
     try:
         start_time = transform_to_datetime(start_time)
         end_time = transform_to_datetime(end_time)
@@ -160,16 +222,57 @@ async def describe_db_instance_performance(region_id: str,
         perf_key = transform_perf_key(db_type, perf_keys)
         if not perf_key:
             raise OpenAPIError(f"Unsupported perf_key: {perf_key}")
-        request = rds_20140815_models.DescribeDBInstancePerformanceRequest(
-            dbinstance_id=db_instance_id,
-            start_time=transform_to_iso_8601(start_time, "minutes"),
-            end_time=transform_to_iso_8601(end_time, "minutes"),
-            key=",".join(perf_key)
-        )
-        response = client.describe_dbinstance_performance(request)
+        limiter = asyncio.Semaphore(PERF_FETCH_CONCURRENCY)
+        # Cached samples are served without calling the API, so the key covers the
+        # secret and token too: a known AccessKey ID alone must not reach them.
+        ak, sk, sts = get_aksk()
+        credential = credential_digest(sk, sts)
+        # The API derives the granularity from the window length. Gaps are widened
+        # to whole windows of one fixed length, so a series holds one granularity.
+        window_span = fetch_window_span(start_time, end_time)
+        window_seconds = int(window_span.total_seconds())
+
+        async def _fetch(key, window_start, window_end):
+            request = rds_20140815_models.DescribeDBInstancePerformanceRequest(
+                dbinstance_id=db_instance_id,
+                start_time=transform_to_iso_8601(window_start, "minutes"),
+                end_time=transform_to_iso_8601(window_end, "minutes"),
+                key=key
+            )
+            async with limiter:
+                response = await call_openapi(client.describe_dbinstance_performance, request)
+            return response.body.performance_keys.performance_key
+
+        async def _fetch_range(key, series, range_start, range_end):
+            # Long ranges are split into API-sized windows, fetched concurrently.
+            windows = plan_time_windows(datetime.fromtimestamp(range_start), datetime.fromtimestamp(range_end),
+                                        window_span)
+            chunks = await asyncio.gather(*(_fetch(key, ws, we) for ws, we in windows))
+            merged = merge_performance_keys(chunks)
+            if not merged:
+                return {}
+            perf = next((m for m in merged if m.key == key), merged[0])
+            timestamps, _ = parse_series(perf.values)
+            samples = [(int(ts), v.value) for ts, v in zip(timestamps, perf.values)]
+            return {series: (samples, {"key": perf.key, "unit": perf.unit, "value_format": perf.value_format})}
+
+        async def _query(key):
+            series = series_key("rds_perf", ak, credential, db_instance_id, key, f"window={window_seconds}")
+            samples, meta = (await fetch_cached([series], int(start_time.timestamp()), int(end_time.timestamp()),
+                                                lambda s, e: _fetch_range(key, series, s, e),
+                                                align=window_seconds))[series]
+            PerformanceValue = rds_20140815_models.DescribeDBInstancePerformanceResponseBodyPerformanceKeysPerformanceKeyValuesPerformanceValue
+            values = [PerformanceValue(date=transform_to_iso_8601(datetime.fromtimestamp(ts), "seconds"), value=value)
+                      for ts, value in samples]
+            return meta, values
+
         responses = []
-        for perf_key in response.body.performance_keys.performance_key:
-            perf_key_info = f"""Key={perf_key.key}; Unit={perf_key.unit}; ValueFormat={perf_key.value_format}; Values={json_array_to_csv(_compress_performance(perf_key.values.performance_value))}"""
+        for meta, values in await asyncio.gather(*(_query(key) for key in perf_key)):
+            if meta is None and not values:
+                # The API returned nothing for this key.
+                continue
+            meta = meta or {"key": key, "unit": "", "value_format": ""}
+            perf_key_info = f"""Key={meta['key']}; Unit={meta['unit']}; ValueFormat={meta['value_format']}; Values={json_array_to_csv(downsample_performance(values, max_points, downsample))}"""
             responses.append(perf_key_info)
         return responses
     except Exception as e:
@@ -225,7 +328,8 @@ async def modify_parameter(
             request.client_token = client_token
 
         # Make the API request
-        response = client.modify_parameter(request)
+        response = await call_openapi(client.modify_parameter, request)
+        _inventory().invalidate([dbinstance_id])
         return response.body.to_map()
 
     except Exception as e:
@@ -331,7 +435,8 @@ async def modify_db_instance_spec(
             request.client_token = client_token
 
         # Make the API request
-        response = client.modify_dbinstance_spec(request)
+        response = await call_openapi(client.modify_dbinstance_spec, request)
+        _inventory().invalidate([dbinstance_id])
         return response.body.to_map()
 
     except Exception as e:
@@ -393,7 +498,7 @@ async def describe_available_classes(
             request.commodity_code = commodity_code
 
         # Make the API request
-        response = client.describe_available_classes(request)
+        response = await call_openapi(client.describe_available_classes, request)
         return response.body.to_map()
 
     except Exception as e:
@@ -516,7 +621,7 @@ async def create_db_instance(
         if serverless_config:
             request.serverless_config = json.dumps(serverless_config)
 
-        response = client.create_dbinstance(request)
+        response = await call_openapi(client.create_dbinstance, request)
         return response.body.to_map()
 
     except Exception as e:
@@ -599,7 +704,7 @@ async def describe_available_zones(
             request.category = category
 
         # Make the API request
-        response = client.describe_available_zones(request)
+        response = await call_openapi(client.describe_available_zones, request)
         return response.body.to_map()
 
     except Exception as e:
@@ -657,7 +762,7 @@ async def describe_vpcs(
             request.tag = tags
 
         # Make the API request
-        response = client.describe_vpcs(request)
+        response = await call_openapi(client.describe_vpcs, request)
         return response.to_map()
 
     except Exception as e:
@@ -720,7 +825,7 @@ async def describe_vswitches(
             request.resource_group_id = resource_group_id
 
         # Make the API request
-        response = client.describe_vswitches(request)
+        response = await call_openapi(client.describe_vswitches, request)
         return response.body.to_map()
 
     except Exception as e:
@@ -783,7 +888,7 @@ async def describe_slow_log_records(
             request.node_id = node_id
 
         # Make the API request
-        response = client.describe_slow_log_records(request)
+        response = await call_openapi(client.describe_slow_log_records, request)
         return response.body.to_map()
 
     except Exception as e:
@@ -823,7 +928,7 @@ async def describe_error_logs(
             page_size=page_size,
             page_number=page_number
         )
-        response = await client.describe_error_logs_async(request)
+        response = await call_openapi(client.describe_error_logs, request)
         return {
             "Logs": "\n".join([log.error_info for log in response.body.items.error_log]),
             "PageNumber": response.body.page_number,
@@ -850,14 +955,19 @@ async def describe_db_instance_net_info(
     """
     try:
         client = get_rds_client(region_id)
-        db_instance_net_infos = []
-        for db_instance_id in db_instance_ids:
+
+        async def _fetch(db_instance_id):
             request = rds_20140815_models.DescribeDBInstanceNetInfoRequest(
                 dbinstance_id=db_instance_id
             )
-            response = await client.describe_dbinstance_net_info_async(request)
-            db_instance_net_infos.append(response.body.to_map())
-        return db_instance_net_infos
+            response = await call_openapi(client.describe_dbinstance_net_info, request)
+            return response.body.to_map()
+
+        db_instance_net_infos = await asyncio.gather(*(
+            _describe_cached(region_id, db_instance_id, 'net_info', lambda i=db_instance_id: _fetch(i))
+            for db_instance_id in db_instance_ids
+        ))
+        return list(db_instance_net_infos)
     except Exception as e:
         raise e
 
@@ -882,7 +992,7 @@ async def describe_db_instance_ip_allowlist(
             request = rds_20140815_models.DescribeDBInstanceIPArrayListRequest(
                 dbinstance_id=db_instance_id
             )
-            response = await client.describe_dbinstance_iparray_list_async(request)
+            response = await call_openapi(client.describe_dbinstance_iparray_list, request)
             db_instance_ip_allowlist.append(response.body.to_map())
         return db_instance_ip_allowlist
     except Exception as e:
@@ -904,14 +1014,19 @@ async def describe_db_instance_databases(
     """
     try:
         client = get_rds_client(region_id)
-        db_instance_databases = []
-        for db_instance_id in db_instance_ids:
+
+        async def _fetch(db_instance_id):
             request = rds_20140815_models.DescribeDatabasesRequest(
                 dbinstance_id=db_instance_id
             )
-            response = await client.describe_databases_async(request)
-            db_instance_databases.append(response.body.to_map())
-        return db_instance_databases
+            response = await call_openapi(client.describe_databases, request)
+            return response.body.to_map()
+
+        db_instance_databases = await asyncio.gather(*(
+            _describe_cached(region_id, db_instance_id, 'databases', lambda i=db_instance_id: _fetch(i))
+            for db_instance_id in db_instance_ids
+        ))
+        return list(db_instance_databases)
     except Exception as e:
         raise e
 
@@ -931,14 +1046,19 @@ async def describe_db_instance_accounts(
     """
     try:
         client = get_rds_client(region_id)
-        db_instance_accounts = []
-        for db_instance_id in db_instance_ids:
+
+        async def _fetch(db_instance_id):
             request = rds_20140815_models.DescribeAccountsRequest(
                 dbinstance_id=db_instance_id
             )
-            response = await client.describe_accounts_async(request)
-            db_instance_accounts.append(response.body.to_map())
-        return db_instance_accounts
+            response = await call_openapi(client.describe_accounts, request)
+            return response.body.to_map()
+
+        db_instance_accounts = await asyncio.gather(*(
+            _describe_cached(region_id, db_instance_id, 'accounts', lambda i=db_instance_id: _fetch(i))
+            for db_instance_id in db_instance_ids
+        ))
+        return list(db_instance_accounts)
     except Exception as e:
         raise e
 
@@ -973,7 +1093,8 @@ async def create_db_instance_account(
             account_description=account_description,
             account_type=account_type
         )
-        response = await client.create_account_async(request)
+        response = await call_openapi(client.create_account, request)
+        _inventory().invalidate([db_instance_id])
         return response.body.to_map()
     except Exception as e:
         raise e
@@ -1001,7 +1122,7 @@ async def describe_db_instance_parameters(
             request = rds_20140815_models.DescribeParametersRequest(
                 dbinstance_id=db_instance_id
             )
-            response = await client.describe_parameters_async(request)
+            response = await call_openapi(client.describe_parameters, request)
             if paramters:
                 response.body.config_parameters.dbinstance_parameter = [
                     config_parameter for config_parameter in response.body.config_parameters.dbinstance_parameter
@@ -1039,51 +1160,9 @@ async def describe_bills(
     """
     try:
         client = get_bill_client("cn-hangzhou")
-        res = {}
-        for billing_cycle in billing_cycles:
-            has_next_token = True
-            next_token = None
-            items = []
-
-            while has_next_token:
-                describe_instance_bill_request = bss_open_api_20171214_models.DescribeInstanceBillRequest(
-                    billing_cycle=billing_cycle,
-                    product_code='rds',
-                    is_billing_item=is_billing_item,
-                    next_token=next_token
-                )
-                if db_instance_id:
-                    describe_instance_bill_request.db_instance_id = db_instance_id
-
-                response = client.describe_instance_bill(describe_instance_bill_request)
-                if not response.body.data:
-                    break
-                next_token = response.body.data.next_token
-                has_next_token = next_token is not None and next_token.strip() != ""
-                items.extend(response.body.data.items)
-            item_filters = []
-            for item in items:
-                if db_instance_id is None or db_instance_id in item.instance_id.split(";"):
-                    item_filters.append(
-                        {
-                            "Item": item.item,
-                            "AfterDiscountAmount": item.after_discount_amount,
-                            "InstanceID": item.instance_id,
-                            "BillingDate": item.billing_date,
-                            "InvoiceDiscount": item.invoice_discount,
-                            "SubscriptionType": item.subscription_type,
-                            "PretaxGrossAmount": item.pretax_gross_amount,
-                            "Currency": item.currency,
-                            "CommodityCode": item.commodity_code,
-                            "CostUnit": item.cost_unit,
-                            "NickName": item.nick_name,
-                            "PretaxAmount": item.pretax_amount,
-                            "BillingItem": item.billing_item,
-                            "BillingItemPriceUnit": item.list_price_unit,
-                            "BillingItemUsage": item.usage,
-                        }
-                    )
-            res[billing_cycle] = json_array_to_csv(item_filters)
+        cycles = await describe_bill_cycles(client, credential_scope(*get_aksk()), billing_cycles,
+                                            is_billing_item, db_instance_id)
+        res = {billing_cycle: json_array_to_csv(rows) for billing_cycle, rows in cycles.items()}
         return res
     except Exception as e:
         raise e
@@ -1110,7 +1189,8 @@ async def modify_db_instance_description(
             dbinstance_id=db_instance_id,
             dbinstance_description=description
         )
-        response = await client.modify_dbinstance_description_async(request)
+        response = await call_openapi(client.modify_dbinstance_description, request)
+        _inventory().invalidate([db_instance_id])
         return response.body.to_map()
     except Exception as e:
         raise e
@@ -1141,7 +1221,8 @@ async def allocate_instance_public_connection(
             connection_string_prefix=connection_string_prefix,
             port=port
         )
-        response = await client.allocate_instance_public_connection_async(request)
+        response = await call_openapi(client.allocate_instance_public_connection, request)
+        _inventory().invalidate([db_instance_id])
         return response.body.to_map()
     except Exception as e:
         raise e
@@ -1172,7 +1253,7 @@ async def describe_all_whitelist_template(
                 max_records_per_page=100,
                 page_numbers=page_num
             )
-            response = await client.describe_all_whitelist_template_async(request)
+            response = await call_openapi(client.describe_all_whitelist_template, request)
             next_pages = response.body.data.has_next
             page_num += 1
             all_whitelists.extend(response.body.data.templates)
@@ -1200,7 +1281,7 @@ async def describe_instance_linked_whitelist_template(
             region_id=region_id,
             ins_name=db_instance_id
         )
-        response = await client.describe_instance_linked_whitelist_template_async(request)
+        response = await call_openapi(client.describe_instance_linked_whitelist_template, request)
         return response.body.to_map()
     except Exception as e:
         raise e
@@ -1228,7 +1309,8 @@ async def attach_whitelist_template_to_instance(
             ins_name=db_instance_id,
             template_id=template_id
         )
-        response = await client.attach_whitelist_template_to_instance_async(request)
+        response = await call_openapi(client.attach_whitelist_template_to_instance, request)
+        _inventory().invalidate([db_instance_id])
         return response.body.to_map()
     except Exception as e:
         raise e
@@ -1256,7 +1338,8 @@ async def add_tags_to_db_instance(
             dbinstance_id=db_instance_id,
             tags=json.dumps(tags)
         )
-        response = await client.add_tags_to_resource_async(request)
+        response = await call_openapi(client.add_tags_to_resource, request)
+        _inventory().invalidate([db_instance_id])
         return response.body.to_map()
     except Exception as e:
         raise e
@@ -1341,7 +1424,8 @@ async def modify_security_ips(
             request.client_token = client_token
 
         # send api request
-        response = client.modify_security_ips(request)
+        response = await call_openapi(client.modify_security_ips, request)
+        _inventory().invalidate([dbinstance_id])
         return response.body.to_map()
 
     except Exception as e:
@@ -1392,7 +1476,8 @@ async def restart_db_instance(
             request.client_token = client_token
 
         # Make the API request
-        response = client.restart_dbinstance(request)
+        response = await call_openapi(client.restart_dbinstance, request)
+        _inventory().invalidate([dbinstance_id])
         return response.body.to_map()
 
     except Exception as e:
@@ -1407,6 +1492,10 @@ async def describe_monitor_metrics(
         db_type: str,
         start_time: str,
         end_time: str,
+        output_format: str = "markdown",
+        aggregate: str = "none",
+        bucket_seconds: int = 300,
+        max_points: int = DAS_POINT_BUDGET,
 ):
     """
     Queries performance and diagnostic metrics for an instance using the DAS (Database Autonomy Service) API.
@@ -1418,6 +1507,10 @@ async def describe_monitor_metrics(
         db_type (str): The type of the database. (e.g. "mysql")
         start_time(str): the start time. e.g. 2025-06-06 20:00:00
         end_time(str): the end time. e.g. 2025-06-06 20:10:00
+        output_format(str): "markdown" (default), "csv", or "json" (compact {"columns": [...], "rows": [[...]]}).
+        aggregate(str): "none" (default), or "avg", "max", "p95" to reduce each metric per time bucket.
+        bucket_seconds(int): bucket width used when aggregate is set. Default: 300.
+        max_points(int): approximate number of points per metric; selects the DAS sampling interval. Default: 300.
     Returns:
         the monitor metrics information.
     """
@@ -1428,56 +1521,52 @@ async def describe_monitor_metrics(
         metrics = transform_das_key(db_type, metrics_list)
         if not metrics:
             raise OpenAPIError(f"Unsupported das_metric_key: {metrics_list}")
+        if output_format not in OUTPUT_FORMATS:
+            raise OpenAPIError(f"Unsupported output_format: {output_format}")
+        if aggregate not in AGGREGATIONS:
+            raise OpenAPIError(f"Unsupported aggregate: {aggregate}")
         start_time = convert_datetime_to_timestamp(start_time)
         end_time = convert_datetime_to_timestamp(end_time)
 
-        # 通过 interval 控制查询粒度
-        interval = int(max((end_time - start_time) / 30000, 5))
-        body = {
-            "InstanceId": dbinstance_id,
-            "Metrics": ",".join(metrics),
-            "StartTime": start_time,
-            "EndTime": end_time,
-            "Interval": interval
-        }
-        req = open_api_models.OpenApiRequest(
-            query=OpenApiUtilClient.query({}),
-            body=OpenApiUtilClient.parse_to_map(body)
-        )
-        params = open_api_models.Params(
-            action='GetPerformanceMetrics',
-            version='2020-01-16',
-            protocol='HTTPS',
-            pathname='/',
-            method='POST',
-            auth_type='AK',
-            style='RPC',
-            req_body_type='formData',
-            body_type='json'
-        )
-        response = client.call_api(params, req, util_models.RuntimeOptions())
-        response_data = response['body']['Data']
-        timestamp_map = {}
-        resp_metrics_list = set()
-        for metric in response_data:
-            name = metric["Name"]
-            values = metric["Value"]
-            timestamps = metric["Timestamp"]
-            resp_metrics_list.add(name)
-            for timestamp, value in zip(timestamps, values):
-                dt = transform_timestamp_to_datetime(timestamp)
-                if dt not in timestamp_map:
-                    timestamp_map[dt] = {}
-                timestamp_map[dt][name] = value
-        
-        headers = sorted(list(resp_metrics_list))
-        datas = []
-        for dt in sorted(timestamp_map.keys()):
-            value_map = timestamp_map[dt]
-            value_map["datetime"] = dt
-            datas.append(value_map)
-        headers.insert(0, "datetime")
-        return json_array_to_markdown(headers, datas)
+        # 通过 interval 控制查询粒度: the finest DAS granularity within the point budget.
+        interval = choose_das_interval(start_time, end_time, max_points)
+        # As for describe_db_instance_performance, cached samples are scoped to the whole credential.
+        ak, sk, sts = get_aksk()
+        credential = credential_digest(sk, sts)
+        series = {series_key("das", ak, credential, dbinstance_id, metric, interval): metric for metric in metrics}
+        by_name = {metric: key for key, metric in series.items()}
+        limiter = asyncio.Semaphore(DAS_FETCH_CONCURRENCY)
+
+        async def _fetch_window(window_start, window_end):
+            body = {
+                "InstanceId": dbinstance_id,
+                "Metrics": ",".join(metrics),
+                "StartTime": window_start,
+                "EndTime": window_end,
+                "Interval": interval
+            }
+            async with limiter:
+                return (await call_das_api(client, 'GetPerformanceMetrics', body))['Data']
+
+        async def _fetch_range(range_start, range_end):
+            # Oversized ranges are split so that every request returns a bounded number of points.
+            windows = split_das_windows(range_start * 1000, range_end * 1000, interval)
+            fetched = {}
+            for data in await asyncio.gather(*(_fetch_window(ws, we) for ws, we in windows)):
+                for metric in data:
+                    key = by_name.get(metric["Name"])
+                    if key is not None:
+                        samples = fetched.setdefault(key, ([], None))[0]
+                        samples.extend((ts // 1000, v) for ts, v in zip(metric["Timestamp"], metric["Value"]))
+            return fetched
+
+        cached = await fetch_cached(list(series), start_time // 1000, end_time // 1000, _fetch_range, align=interval)
+        timestamps, names, matrix = pivot_metrics({
+            series[key]: ([ts * 1000 for ts, _ in samples], [value for _, value in samples])
+            for key, (samples, _) in cached.items()
+        })
+        timestamps, matrix = aggregate_buckets(timestamps, matrix, bucket_seconds * 1000, aggregate)
+        return render_metrics(timestamps, names, matrix, output_format)
     except Exception as e:
         logger.error(f"Error occurred: {str(e)}")
         raise e
@@ -1497,71 +1586,42 @@ async def describe_sql_insight_statistic(
     Returns:
         the sql insight statistic information in csv format.
     """
+    client = get_das_client()
+    base_body = {
+        "InstanceId": dbinstance_id,
+        "Asc": False,
+        "PageSize": SQL_INSIGHT_PAGE_SIZE,
+        "TemplateId": "",
+        "DbName": "",
+        "StartTime": convert_datetime_to_timestamp(start_time),
+        "EndTime": convert_datetime_to_timestamp(end_time),
+    }
 
-    def _descirbe(order_by: str):
-        try:
-            # Initialize client
-            client = get_das_client()
-            page_no = 1
-            page_size = 50
-            total = page_no * page_size + 1
-            result = []
-            while total > page_no * page_size:
-                state = "RUNNING"
-                job_id = ""
-                while state == "RUNNING":
-                    body = {
-                        "InstanceId": dbinstance_id,
-                        "OrderBy": order_by,
-                        "Asc": False,
-                        "PageNo": 1,
-                        "PageSize": 10,
-                        "TemplateId": "",
-                        "DbName": "",
-                        "StartTime": convert_datetime_to_timestamp(start_time),
-                        "EndTime": convert_datetime_to_timestamp(end_time),
-                        "JobId": job_id
-                    }
-                    req = open_api_models.OpenApiRequest(
-                        query=OpenApiUtilClient.query({}),
-                        body=OpenApiUtilClient.parse_to_map(body)
-                    )
-                    params = open_api_models.Params(
-                        action='DescribeSqlInsightStatistic',
-                        version='2020-01-16',
-                        protocol='HTTPS',
-                        pathname='/',
-                        method='POST',
-                        auth_type='AK',
-                        style='RPC',
-                        req_body_type='formData',
-                        body_type='json'
-                    )
-                    response = client.call_api(params, req, util_models.RuntimeOptions())
-                    response_data = response['body']['Data']
-                    state = response_data['State']
-                    if state == "RUNNING":
-                        job_id = response_data['ResultId']
-                        time.sleep(1)
-                        continue
-                    if state == "SUCCESS":
-                        result.extend(response_data['Data']['List'])
-                        total = response_data['Data']['Total']
-                        page_no = page_no + 1
-
-            return json_array_to_csv(result)
-        except Exception as e:
-            logger.error(f"Error occurred: {str(e)}")
-            raise e
-
-    rt_rate = _descirbe("rtRate")
-    count_rate = _descirbe("countRate")
+    async def _fetch_page(order_by: str, page_no: int):
+        body = {**base_body, "OrderBy": order_by, "PageNo": page_no}
+        return (await poll_das_job(client, "DescribeSqlInsightStatistic", body))['Data']
+
+    async def _describe(order_by: str):
+        first_page = await _fetch_page(order_by, 1)
+        result = list(first_page['List'])
+        total = min(first_page['Total'], SQL_INSIGHT_MAX_ROWS)
+        page_count = min(math.ceil(total / SQL_INSIGHT_PAGE_SIZE), SQL_INSIGHT_MAX_PAGES)
+        if page_count > 1:
+            pages = await asyncio.gather(*(_fetch_page(order_by, page_no) for page_no in range(2, page_count + 1)))
+            for page in pages:
+                result.extend(page['List'])
+        return json_array_to_csv(result[:SQL_INSIGHT_MAX_ROWS])
+
+    try:
+        rt_rate, count_rate = await asyncio.gather(_describe("rtRate"), _describe("countRate"))
+    except Exception as e:
+        logger.error(f"Error occurred: {str(e)}")
+        raise e
     return {
         "sql_log_order_by_rt_rate": rt_rate,
         "sql_log_order_by_count_rate": count_rate
     }
 
-
 @mcp.tool(annotations=READ_ONLY_TOOL)
 async def show_engine_innodb_status(
         dbinstance_id: str,
@@ -1637,7 +1697,9 @@ async def query_sql(
         region_id: str,
         dbinstance_id: str,
         db_name: str,
-        sql: str
+        sql: str,
+        max_rows: int = 1000,
+        output_format: str = "json"
 ) -> str:
     """
     execute read-only sql likes show xxx, select xxx
@@ -1646,12 +1708,14 @@ async def query_sql(
         region_id(str): the region id of instance.
         db_name(str): the db name for execute sql.
         sql(str): the sql to be executed.
+        max_rows(int): the maximum number of rows to return; larger results are truncated. Default: 1000.
+        output_format(str): the result encoding. Values: json, jsonl, csv. Default: json.
     Returns:
-        the sql result.
+        the sql result. Truncated results are marked with "truncated".
     """
     try:
         async with DBService(region_id, dbinstance_id, db_name) as service:
-            return await service.execute_sql(sql=sql)
+            return await service.execute_sql(sql=sql, max_rows=max_rows, output_format=output_format)
     except Exception as e:
         logger.error(f"Error occurred: {str(e)}")
         raise e
@@ -1697,23 +1761,58 @@ async def health_check(request: Request) -> JSONResponse:
         )
 
 
-class VerifyHeaderMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        api_key = os.getenv('API_KEY')
-        if api_key:
-            authorization = request.headers.get("authorization")
-            if not authorization:
-                return Response("Unauthorized", status_code=401)
-            request_key = authorization.split(" ")[-1]
-            if request_key != api_key:
-                return Response("Unauthorized", status_code=401)
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> Response:
+    """Tool, upstream OpenAPI and database metrics in the Prometheus text format."""
+    return Response(await asyncio.to_thread(metrics.exposition), media_type=metrics.CONTENT_TYPE)
+
+
+# Request headers read by get_aksk() and get_rds_account(), as ASGI header names.
+CREDENTIAL_HEADERS = {name.encode('latin-1'): name for name in ("ak", "sk", "sts", "rds_user", "rds_passwd")}
 
-        token = current_request_headers.set(dict(request.headers))
+
+class VerifyHeaderMiddleware:
+    """
+    Checks the API key and exposes the credential headers of the request
+    through `current_request_headers`.
+
+    A plain ASGI middleware: the response is streamed straight through, so
+    long SSE / streamable_http responses keep their backpressure and pay no
+    extra task or memory stream per request.
+    """
+
+    def __init__(self, app: ASGIApp, api_key: Optional[str] = None):
+        self.app = app
+        api_key = os.getenv('API_KEY') if api_key is None else api_key
+        self._api_key = api_key.encode('utf-8') if api_key else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        authorization = b""
+        credentials = {}
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value
+            elif name in CREDENTIAL_HEADERS:
+                credentials[CREDENTIAL_HEADERS[name]] = value.decode('latin-1')
+
+        if self._api_key is not None and not self._authorized(authorization):
+            await PlainTextResponse("Unauthorized", status_code=401)(scope, receive, send)
+            return
+
+        token = current_request_headers.set(credentials)
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send)
         finally:
             current_request_headers.reset(token)
-        return response
+
+    def _authorized(self, authorization: bytes) -> bool:
+        # Accepts "Bearer <key>" as well as the bare key.
+        request_key = authorization.rsplit(b" ", 1)[-1]
+        return bool(request_key) and hmac.compare_digest(request_key, self._api_key)
 
 
 def main(toolsets: Optional[str] = None) -> None:
@@ -1741,19 +1840,74 @@ def main(toolsets: Optional[str] = None) -> None:
     mcp.activate(enabled_groups=enabled_groups)
 
     transport = os.getenv("SERVER_TRANSPORT", "stdio")
-    if transport in ("sse", "streamable_http"):
-        app = mcp.sse_app() if transport == "sse" else mcp.streamable_http_app()
-        app.add_middleware(VerifyHeaderMiddleware)
+    if transport not in ("sse", "streamable_http"):
+        # uvicorn shuts down cleanly on SIGTERM; a stdio server is just killed.
+        handle_sigterm()
+        mcp.run(transport=transport)
+        return
+
+    host = os.getenv("SERVER_HOST", "0.0.0.0")
+    port = int(os.getenv("SERVER_PORT", 8000))
+    workers = int(os.getenv("SERVER_WORKERS", 1))
+    if workers > 1 and not (transport == "streamable_http" and mcp.settings.stateless_http):
+        # SSE sessions live in the memory of the worker that opened them; a
+        # POST /messages reaching another worker would not find its session.
+        logger.warning(f"SERVER_WORKERS={workers} is only supported for stateless streamable_http; "
+                       f"running a single {transport} worker.")
+        workers = 1
+    # Seconds in-flight requests get to finish when a worker is stopped or replaced.
+    graceful_timeout = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30))
+    if workers <= 1:
         config = uvicorn.Config(
-            app,
-            host="0.0.0.0",
-            port=8000,
+            _http_app(transport),
+            host=host,
+            port=port,
             log_level="info",
+            timeout_graceful_shutdown=graceful_timeout,
         )
         server = uvicorn.Server(config)
         anyio.run(server.serve)
-    else:
-        mcp.run(transport=transport)
+        return
+
+    # Multi-worker mode: uvicorn's supervisor binds one listening socket shared
+    # by all workers, restarts workers that die, and replaces them one at a time
+    # on SIGHUP, bringing each replacement up before draining the old worker.
+    # Workers build their app with create_http_app() from the environment.
+    os.environ["MCP_TOOLSETS"] = ",".join(enabled_groups)
+    os.environ["SERVER_TRANSPORT"] = transport
+    if not os.getenv("METRICS_WORKER_DIR"):
+        os.environ["METRICS_WORKER_DIR"] = cache_dir(f"metrics-workers-{port}")
+    metrics.clear_worker_snapshots(os.environ["METRICS_WORKER_DIR"])
+    uvicorn.run(
+        "alibabacloud_rds_openapi_mcp_server.server:create_http_app",
+        factory=True,
+        host=host,
+        port=port,
+        workers=workers,
+        log_level="info",
+        timeout_graceful_shutdown=graceful_timeout,
+    )
+
+
+def _http_app(transport: str):
+    app = mcp.sse_app() if transport == "sse" else mcp.streamable_http_app()
+    app.add_middleware(VerifyHeaderMiddleware)
+    return app
+
+
+def create_http_app():
+    """
+    Builds the HTTP app of one worker process in multi-worker mode.
+
+    Workers import this module afresh, so the enabled groups and the transport
+    come from MCP_TOOLSETS and SERVER_TRANSPORT, which `main` sets before
+    starting them.
+    """
+    mcp.activate(enabled_groups=_parse_groups_from_source(os.getenv("MCP_TOOLSETS")))
+    worker_dir = os.getenv("METRICS_WORKER_DIR")
+    if worker_dir:
+        metrics.start_worker_snapshots(worker_dir)
+    return _http_app(os.getenv("SERVER_TRANSPORT", "streamable_http"))
 
 
 def _parse_groups_from_source(source: str | None) -> List[str]:
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Tabular encoders for tool responses.
+
+Most describe_* tools return a list of SDK models or dicts rendered as CSV or
+as a markdown table. These encoders convert every item to a map exactly once,
+resolve the column order once per distinct key set, and emit the output in a
+single pass (csv.writer for CSV, one str.join for markdown).
+"""
+
+import csv
+import io
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def _as_map(item: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(item, dict):
+        return item
+    if hasattr(item, 'to_map'):
+        return item.to_map()
+    return None
+
+
+@lru_cache(maxsize=256)
+def _column_order(keys: frozenset) -> Tuple[str, ...]:
+    return tuple(sorted(keys))
+
+
+def _columns(rows: Sequence[Dict[str, Any]]) -> Tuple[str, ...]:
+    first = rows[0].keys()
+    # Rows from one API response almost always share a key set; only fall back
+    # to a union when they don't.
+    if all(row.keys() == first for row in rows):
+        return _column_order(frozenset(first))
+    keys = set()
+    for row in rows:
+        keys.update(row.keys())
+    return _column_order(frozenset(keys))
+
+
+def json_array_to_csv(data) -> str:
+    """Encodes a list of dicts/SDK models as CSV with sorted column headers."""
+    if not data or not isinstance(data, list):
+        return ""
+
+    rows = [m for m in map(_as_map, data) if m is not None]
+    if not rows:
+        return ""
+    columns = _columns(rows)
+    if not columns:
+        return ""
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(columns)
+    # csv.writer renders None as an empty field, matching the old behaviour.
+    writer.writerows([row.get(col) for col in columns] for row in rows)
+    return output.getvalue()
+
+
+def json_array_to_markdown(headers: List[str], datas: Iterable) -> str:
+    """Renders rows (dicts keyed by header, or sequences) as a markdown table."""
+    if not headers or not isinstance(headers, list):
+        return ""
+    if not datas or not isinstance(datas, list):
+        return ""
+
+    parts = [
+        "| " + " | ".join(headers) + " |\n",
+        "| " + " | ".join(["---"] * len(headers)) + " |\n",
+    ]
+    for row in datas:
+        if isinstance(row, dict):
+            cells = [str(row.get(header, '-')) for header in headers]
+        else:
+            cells = map(str, row)
+        parts.append("| " + " | ".join(cells) + " |\n")
+    return "".join(parts)
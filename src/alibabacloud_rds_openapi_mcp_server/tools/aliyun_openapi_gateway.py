@@ -1,55 +1,71 @@
 # -*- coding: utf-8 -*-
 import os
+import importlib
 import logging
-from typing import Type, TypeVar, Dict, Any
+import threading
+from typing import Type, TypeVar, Dict, Any, Optional, Tuple
 from functools import wraps
 
 # --- Core SDK Imports ---
 import alibabacloud_tea_openapi.models as OpenApiModels
 from alibabacloud_tea_util.models import RuntimeOptions
 
-try:
-    from alibabacloud_rds20140815.client import Client as RdsApiClient
-except ImportError:
-    RdsApiClient = None
-
-try:
-    from alibabacloud_ecs20140526.client import Client as EcsApiClient
-except ImportError:
-    EcsApiClient = None
-
-try:
-    from alibabacloud_das20200116.client import Client as DasApiClient
-except ImportError:
-    DasApiClient = None
+from ..core.client_registry import ClientRegistry, credential_digest
+from ..core.openapi_executor import call_openapi
 
 logger = logging.getLogger(__name__)
 
-# To add support for a new service, import its client and add it here.
+# To add support for a new service, add the module of its client here.
+# Client modules are imported when the service is first used.
 SERVICE_CLIENT_MAP = {
-    'rds': RdsApiClient,
-    'ecs': EcsApiClient,
-    'das': DasApiClient,
+    'rds': 'alibabacloud_rds20140815.client',
+    'ecs': 'alibabacloud_ecs20140526.client',
+    'das': 'alibabacloud_das20200116.client',
 }
 
 T = TypeVar('T')
 
+# Gateways are shared process-wide, keyed by (region, access key, secret digest).
+# Each one keeps its SDK clients, so tool calls reuse the clients, and the
+# connections they hold, instead of building them per call. Sharing clients
+# also lets identical concurrent calls be coalesced by call_openapi.
+_gateway_registry = ClientRegistry(
+    max_size=int(os.getenv("CLIENT_CACHE_SIZE", 64)),
+    ttl=float(os.getenv("CLIENT_CACHE_TTL", 1800))
+)
+
+
+def gateway_credential() -> Tuple[Optional[str], str]:
+    """Returns (access key ID, secret digest) of the credential gateways use."""
+    access_key_id = os.environ.get('ALIBABA_CLOUD_ACCESS_KEY_ID')
+    access_key_secret = os.environ.get('ALIBABA_CLOUD_ACCESS_KEY_SECRET')
+    security_token = os.environ.get('ALIBABA_CLOUD_SECURITY_TOKEN')
+    return access_key_id, credential_digest(access_key_secret, security_token)
+
+
+def get_gateway(region_id: str) -> "AliyunServiceGateway":
+    """Returns the shared gateway of ``region_id`` for the current credential."""
+    key = (region_id, *gateway_credential())
+    return _gateway_registry.get_or_create(key, lambda: AliyunServiceGateway(region_id))
+
 
 def _api_call_wrapper(func):
     """
     A decorator that encapsulates repetitive API call logic:
     1. Provides default RuntimeOptions.
-    2. Automatically calls .body.to_map() on the response.
-    3. Provides unified exception logging and handling.
+    2. Runs the call through call_openapi (async SDK path, per-endpoint limits,
+       coalescing of identical read-only calls).
+    3. Automatically calls .body.to_map() on the response.
+    4. Provides unified exception logging and handling.
     """
 
     @wraps(func)
-    def wrapper(request_model: T, runtime: RuntimeOptions = None) -> Dict[str, Any]:
+    async def wrapper(request_model: T, runtime: RuntimeOptions = None) -> Dict[str, Any]:
         try:
             if runtime is None:
                 runtime = RuntimeOptions()
 
-            response = func(request_model, runtime)
+            response = await call_openapi(func, request_model, runtime)
 
             return response.body.to_map()
         except Exception as e:
@@ -73,7 +89,10 @@ class _ServiceProxy:
     def __getattr__(self, method_name: str):
         if hasattr(self._service_client, method_name) and callable(getattr(self._service_client, method_name)):
             actual_method = getattr(self._service_client, method_name)
-            return _api_call_wrapper(actual_method)
+            wrapped = _api_call_wrapper(actual_method)
+            # Memoized: later lookups find the attribute without reaching __getattr__.
+            setattr(self, method_name, wrapped)
+            return wrapped
 
         raise AttributeError(
             f"'{type(self._service_client).__name__}' object has no callable attribute '{method_name}'")
@@ -86,6 +105,7 @@ class AliyunServiceGateway:
     """
 
     def __init__(self, region_id: str):
+        self._region_id = region_id
         self._config = OpenApiModels.Config(
             access_key_id=os.environ.get('ALIBABA_CLOUD_ACCESS_KEY_ID'),
             access_key_secret=os.environ.get('ALIBABA_CLOUD_ACCESS_KEY_SECRET'),
@@ -93,7 +113,8 @@ class AliyunServiceGateway:
             region_id=region_id
         )
         self._config.validate()
-        self._clients_cache: Dict[str, Any] = {}  # Cache for client instances.
+        self._proxies: Dict[str, _ServiceProxy] = {}  # Proxies of the clients created so far.
+        self._lock = threading.Lock()
 
     def rds(self) -> _ServiceProxy:
         """
@@ -126,15 +147,24 @@ class AliyunServiceGateway:
         """
         Private method to create, cache, and wrap a service client in a proxy.
         """
-        if service_name in self._clients_cache:
-            client = self._clients_cache[service_name]
-        else:
-            client_class = SERVICE_CLIENT_MAP.get(service_name)
-            if not client_class:
-                raise ValueError(
-                    f"Service '{service_name}' is not supported or its SDK (e.g., alibabacloud_{service_name}...) is not installed.")
-
-            client = client_class(self._config)
-            self._clients_cache[service_name] = client
-
-        return _ServiceProxy(client)
\ No newline at end of file
+        proxy = self._proxies.get(service_name)
+        if proxy is not None:
+            return proxy
+        with self._lock:
+            # Gateways are shared by concurrent tool calls; build each client once.
+            proxy = self._proxies.get(service_name)
+            if proxy is None:
+                proxy = _ServiceProxy(_client_class(service_name)(self._config))
+                self._proxies[service_name] = proxy
+        return proxy
+
+
+def _client_class(service_name: str) -> Type:
+    module_name = SERVICE_CLIENT_MAP.get(service_name)
+    try:
+        if module_name:
+            return importlib.import_module(module_name).Client
+    except ImportError:
+        pass
+    raise ValueError(
+        f"Service '{service_name}' is not supported or its SDK (e.g., alibabacloud_{service_name}...) is not installed.")
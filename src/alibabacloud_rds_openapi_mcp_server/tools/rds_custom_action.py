@@ -12,7 +12,7 @@ import logging
 from typing import Dict, Any, Optional, List
 import alibabacloud_rds20140815.models as RdsApiModels
 
-from .aliyun_openapi_gateway import AliyunServiceGateway
+from .aliyun_openapi_gateway import get_gateway
 from . import tool
 
 logger = logging.getLogger(__name__)
@@ -51,7 +51,7 @@ async def resize_rc_instance_disk(
         dry_run=dry_run,
         type='online'
     )
-    return AliyunServiceGateway(region_id).rds().resize_rcinstance_disk_with_options(request)
+    return await get_gateway(region_id).rds().resize_rcinstance_disk_with_options(request)
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def modify_rc_instance_attribute(
@@ -87,7 +87,7 @@ async def modify_rc_instance_attribute(
         security_group_id=security_group_id,
         deletion_protection=deletion_protection
     )
-    return AliyunServiceGateway(region_id).rds().modify_rcinstance_attribute_with_options(request)
+    return await get_gateway(region_id).rds().modify_rcinstance_attribute_with_options(request)
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def stop_rc_instances(
@@ -114,7 +114,7 @@ async def stop_rc_instances(
         force_stop=force_stop,
         batch_optimization=batch_optimization
     )
-    return AliyunServiceGateway(region_id).rds().stop_rcinstances_with_options(request)
+    return await get_gateway(region_id).rds().stop_rcinstances_with_options(request)
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def start_rc_instances(
@@ -138,7 +138,7 @@ async def start_rc_instances(
         instance_ids=instance_ids,
         batch_optimization=batch_optimization
     )
-    return AliyunServiceGateway(region_id).rds().start_rcinstances_with_options(request)
+    return await get_gateway(region_id).rds().start_rcinstances_with_options(request)
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def reboot_rc_instance(
@@ -165,7 +165,7 @@ async def reboot_rc_instance(
         force_stop=force_stop,
         dry_run=dry_run
     )
-    return AliyunServiceGateway(region_id).rds().reboot_rcinstance_with_options(request)
+    return await get_gateway(region_id).rds().reboot_rcinstance_with_options(request)
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def modify_rc_instance_description(
@@ -190,7 +190,7 @@ async def modify_rc_instance_description(
         instance_id=instance_id,
         instance_description=instance_description
     )
-    return AliyunServiceGateway(region_id).rds().modify_rcinstance_description_with_options(request)
+    return await get_gateway(region_id).rds().modify_rcinstance_description_with_options(request)
 
 
 
@@ -217,7 +217,7 @@ async def sync_rc_security_group(
         security_group_id=security_group_id
     )
 
-    return AliyunServiceGateway(region_id).rds().sync_rcsecurity_group_with_options(request)
+    return await get_gateway(region_id).rds().sync_rcsecurity_group_with_options(request)
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def associate_eip_address_with_rc_instance(
@@ -242,7 +242,7 @@ async def associate_eip_address_with_rc_instance(
         allocation_id=allocation_id
     )
 
-    return AliyunServiceGateway(region_id).rds().associate_eip_address_with_rcinstance_with_options(request)
+    return await get_gateway(region_id).rds().associate_eip_address_with_rcinstance_with_options(request)
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def create_rc_snapshot(
@@ -270,7 +270,7 @@ async def create_rc_snapshot(
         retention_days=retention_days
     )
 
-    return AliyunServiceGateway(region_id).rds().create_rcsnapshot_with_options(request)
+    return await get_gateway(region_id).rds().create_rcsnapshot_with_options(request)
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def run_rc_instances(
@@ -394,7 +394,7 @@ async def run_rc_instances(
         data_disk=data_disk_objs,
         tag=tag_objs
     )
-    return AliyunServiceGateway(region_id).rds().run_rcinstances_with_options(request)
+    return await get_gateway(region_id).rds().run_rcinstances_with_options(request)
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def unassociate_eip_address_with_rc_instance(
@@ -419,4 +419,4 @@ async def unassociate_eip_address_with_rc_instance(
         allocation_id=allocation_id
     )
 
-    return AliyunServiceGateway(region_id).rds().unassociate_eip_address_with_rcinstance_with_options(request)
+    return await get_gateway(region_id).rds().unassociate_eip_address_with_rcinstance_with_options(request)
@@ -33,16 +33,20 @@ Command-Line Examples:
 # python server.py --toolsets rds_custom_all
 """
 
+import json
 import logging
+from datetime import datetime
 from typing import Dict, Any, Optional, List
 import alibabacloud_rds20140815.models as RdsApiModels
-from .aliyun_openapi_gateway import AliyunServiceGateway
+from .aliyun_openapi_gateway import gateway_credential, get_gateway
 from . import tool
+from ..metric_store import fetch_cached, series_key
 
 
 logger = logging.getLogger(__name__)
 
 RDS_CUSTOM_GROUP_NAME = 'rds_custom_read'
+RC_METRIC_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def describe_rc_instances(region_id: str, instance_id: str|None = None) -> Dict[str, Any]:
@@ -60,8 +64,8 @@ async def describe_rc_instances(region_id: str, instance_id: str|None = None) ->
         region_id=region_id,
         instance_id=instance_id
     )
-    rds_client = AliyunServiceGateway(region_id).rds()
-    return rds_client.describe_rcinstances_with_options(request)
+    rds_client = get_gateway(region_id).rds()
+    return await rds_client.describe_rcinstances_with_options(request)
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def describe_rc_instance_attribute(region_id: str,instance_id: str) -> Dict[str, Any]:
@@ -79,7 +83,7 @@ async def describe_rc_instance_attribute(region_id: str,instance_id: str) -> Dic
         region_id=region_id,
         instance_id=instance_id
     )
-    return AliyunServiceGateway(region_id).rds().describe_rcinstance_attribute_with_options(request)
+    return await get_gateway(region_id).rds().describe_rcinstance_attribute_with_options(request)
 
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
@@ -104,7 +108,7 @@ async def describe_rc_instance_vnc_url(
         instance_id=instance_id,
         db_type=db_type
     )
-    return AliyunServiceGateway(region_id).rds().describe_rcinstance_vnc_url_with_options(request)
+    return await get_gateway(region_id).rds().describe_rcinstance_vnc_url_with_options(request)
 
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
@@ -149,7 +153,7 @@ async def describe_rc_instance_ip_address(
         page_size=page_size,
         instance_name=instance_name
     )
-    return AliyunServiceGateway(region_id).rds().describe_rcinstance_ip_address_with_options(request)
+    return await get_gateway(region_id).rds().describe_rcinstance_ip_address_with_options(request)
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def describe_rc_image_list(
@@ -189,7 +193,7 @@ async def describe_rc_image_list(
         instance_type=instance_type
     )
 
-    return AliyunServiceGateway(region_id).rds().describe_rcimage_list_with_options(request)
+    return await get_gateway(region_id).rds().describe_rcimage_list_with_options(request)
 
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
@@ -222,7 +226,7 @@ async def describe_rc_snapshots(
         page_size=page_size
     )
 
-    return AliyunServiceGateway(region_id).rds().describe_rcsnapshots_with_options(request)
+    return await get_gateway(region_id).rds().describe_rcsnapshots_with_options(request)
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def describe_rc_metric_list(
@@ -268,7 +272,61 @@ async def describe_rc_metric_list(
         express=express
     )
 
-    return AliyunServiceGateway(region_id).rds().describe_rcmetric_list_with_options(request)
+    # Plain single-instance queries over a whole range are served from the local metric cache.
+    if next_token or length or dimensions or express:
+        return await get_gateway(region_id).rds().describe_rcmetric_list_with_options(request)
+    try:
+        start = int(datetime.strptime(start_time, RC_METRIC_TIME_FORMAT).timestamp())
+        end = int(datetime.strptime(end_time, RC_METRIC_TIME_FORMAT).timestamp())
+    except ValueError:
+        return await get_gateway(region_id).rds().describe_rcmetric_list_with_options(request)
+    return await _describe_rc_metric_list_cached(region_id, instance_id, metric_name, start, end, period)
+
+
+async def _describe_rc_metric_list_cached(region_id: str, instance_id: str, metric_name: str,
+                                          start: int, end: int, period: Optional[str]) -> Dict[str, Any]:
+    """Fetches the uncached parts of [start, end] page by page and answers from the metric cache."""
+    gateway = get_gateway(region_id)
+    series = series_key('rc_metric', *gateway_credential(), instance_id, metric_name, period or 'default')
+    failures: List[Dict[str, Any]] = []
+
+    async def _fetch_range(range_start: int, range_end: int):
+        points, token = [], None
+        while True:
+            request = RdsApiModels.DescribeRCMetricListRequest(
+                region_id=region_id,
+                instance_id=instance_id,
+                metric_name=metric_name,
+                start_time=datetime.fromtimestamp(range_start).strftime(RC_METRIC_TIME_FORMAT),
+                end_time=datetime.fromtimestamp(range_end).strftime(RC_METRIC_TIME_FORMAT),
+                period=period,
+                next_token=token
+            )
+            response = await gateway.rds().describe_rcmetric_list_with_options(request)
+            if response.get('Success') is False:
+                failures.append(response)
+                return {}
+            points.extend(json.loads(response.get('Datapoints') or '[]'))
+            token = response.get('NextToken')
+            if not token:
+                break
+        # Points of several dimensions may share a timestamp, so samples hold lists.
+        by_timestamp: Dict[int, List[Dict[str, Any]]] = {}
+        for point in points:
+            by_timestamp.setdefault(int(point['timestamp']) // 1000, []).append(point)
+        # The other response fields are kept with the series, so a cache hit
+        # answers with the same fields as a fetch.
+        meta = {k: v for k, v in response.items() if k not in ('Datapoints', 'NextToken')}
+        return {series: (list(by_timestamp.items()), meta)}
+
+    align = int(period) if period and period.isdigit() else 1
+    samples, meta = (await fetch_cached([series], start, end, _fetch_range, align=align))[series]
+    if failures:
+        return failures[0]
+    result = dict(meta or {}, Success=True)
+    result['Datapoints'] = json.dumps([point for _, group in samples for point in group])
+    result['Period'] = result.get('Period') or period
+    return result
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def describe_rc_disks(
@@ -301,7 +359,7 @@ async def describe_rc_disks(
         page_size=page_size,
         tag=tag
     )
-    return AliyunServiceGateway(region_id).rds().describe_rcdisks_with_options(request)
+    return await get_gateway(region_id).rds().describe_rcdisks_with_options(request)
 
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
@@ -327,7 +385,7 @@ async def describe_rc_instance_ddos_count(
         instance_type=instance_type
     )
 
-    return AliyunServiceGateway(region_id).rds().describe_rcinstance_ddos_count_with_options(request)
+    return await get_gateway(region_id).rds().describe_rcinstance_ddos_count_with_options(request)
 
 @tool(group=RDS_CUSTOM_GROUP_NAME)
 async def get_current_time() -> Dict[str, Any]:
@@ -1,19 +1,33 @@
-import csv
 import os
 from contextvars import ContextVar
 from datetime import datetime, timezone
-from io import StringIO
 import tzlocal
 import time
+from typing import TYPE_CHECKING
 
-from alibabacloud_bssopenapi20171214.client import Client as BssOpenApi20171214Client
-from alibabacloud_rds20140815.client import Client as RdsClient
-from alibabacloud_tea_openapi.models import Config
-from alibabacloud_vpc20160428.client import Client as VpcClient
-from alibabacloud_das20200116.client import Client as DAS20200116Client
+from alibabacloud_rds_openapi_mcp_server.core.client_registry import ClientRegistry, credential_digest
+from alibabacloud_rds_openapi_mcp_server.core.lazy_import import lazy_module
+from alibabacloud_rds_openapi_mcp_server.tabular import json_array_to_csv, json_array_to_markdown
+
+if TYPE_CHECKING:
+    from alibabacloud_tea_openapi.models import Config
+    from alibabacloud_vpc20160428.client import Client as VpcClient
+
+# SDK packages are only imported once a client of the service is needed.
+open_api_models = lazy_module('alibabacloud_tea_openapi.models')
+rds_client = lazy_module('alibabacloud_rds20140815.client')
+vpc_client = lazy_module('alibabacloud_vpc20160428.client')
+bss_client = lazy_module('alibabacloud_bssopenapi20171214.client')
+das_client = lazy_module('alibabacloud_das20200116.client')
 
 current_request_headers: ContextVar[dict] = ContextVar("current_request_headers", default={})
 
+# SDK clients are reused across tool calls; see core/client_registry.py.
+_client_registry = ClientRegistry(
+    max_size=int(os.getenv("CLIENT_CACHE_SIZE", 64)),
+    ttl=float(os.getenv("CLIENT_CACHE_TTL", 1800))
+)
+
 PERF_KEYS = {
     "mysql": {
         "MemCpuUsage": ["MySQL_MemCpuUsage"],
@@ -196,48 +210,6 @@ def transform_das_key(db_type: str, das_keys: list[str]):
     return das_key_after_transform
 
 
-def json_array_to_csv(data):
-    if not data or not isinstance(data, list):
-        return ""
-
-    fieldnames = set()
-    for item in data:
-        if isinstance(item, dict):
-            fieldnames.update(item.keys())
-        elif hasattr(item, 'to_map'):
-            fieldnames.update(item.to_map().keys())
-
-    if not fieldnames:
-        return ""
-
-    output = StringIO()
-    writer = csv.DictWriter(output, fieldnames=sorted(fieldnames))
-
-    writer.writeheader()
-    for item in data:
-        if isinstance(item, dict):
-            writer.writerow({k: v if v is not None else '' for k, v in item.items()})
-        elif hasattr(item, 'to_map'):
-            writer.writerow({k: v if v is not None else '' for k, v in item.to_map().items()})
-
-    return output.getvalue()
-
-
-def json_array_to_markdown(headers, datas):
-    if not headers or not isinstance(headers, list):
-        return ""
-    if not datas or not isinstance(datas, list):
-        return ""
-    
-    markdown_table = "| " + " | ".join(headers) + " |\n"
-    markdown_table += "| " + " | ".join(["---"] * len(headers)) + " |\n"
-    for row in datas:
-        if isinstance(row, dict):
-            markdown_table += "| " + " | ".join(str(row.get(header, '-')) for header in headers) + " |\n"
-        else:
-            markdown_table += "| " + " | ".join(map(str, row)) + " |\n"
-    return markdown_table
-
 def get_instance_max_iombps(instance_attribute):
     """
         计算规则参考 https://help.aliyun.com/zh/rds/product-overview/primary-apsaradb-rds-instance-types?spm=a2c4g.11186623.help-menu-26090.d_0_0_6_1.1ca8798519jnKx#af0e23b6e5t6w
@@ -312,9 +284,8 @@ def get_aksk():
     return ak, sk, sts
 
 
-def get_rds_client(region_id: str):
-    ak, sk, sts = get_aksk()
-    config = Config(
+def _build_config(region_id: str, ak: str, sk: str, sts: str) -> "Config":
+    return open_api_models.Config(
         access_key_id=ak,
         access_key_secret=sk,
         security_token=sts,
@@ -323,11 +294,22 @@ def get_rds_client(region_id: str):
         connect_timeout=10 * 1000,
         read_timeout=300 * 1000
     )
-    client = RdsClient(config)
-    return client
 
 
-def get_vpc_client(region_id: str) -> VpcClient:
+def _get_cached_client(service: str, client_class, region_id: str):
+    """Returns a pooled SDK client for the current credential, creating it on first use."""
+    ak, sk, sts = get_aksk()
+    key = (service, region_id, ak, credential_digest(sk, sts))
+    return _client_registry.get_or_create(
+        key, lambda: client_class(_build_config(region_id, ak, sk, sts))
+    )
+
+
+def get_rds_client(region_id: str):
+    return _get_cached_client('rds', rds_client.Client, region_id)
+
+
+def get_vpc_client(region_id: str) -> "VpcClient":
     """Get VPC client instance.
 
     Args:
@@ -336,44 +318,12 @@ def get_vpc_client(region_id: str) -> VpcClient:
     Returns:
         VpcClient: The VPC client instance for the specified region.
     """
-    ak, sk, sts = get_aksk()
-    config = Config(
-        access_key_id=ak,
-        access_key_secret=sk,
-        security_token=sts,
-        region_id=region_id,
-        protocol="https",
-        connect_timeout=10 * 1000,
-        read_timeout=300 * 1000
-    )
-    return VpcClient(config)
+    return _get_cached_client('vpc', vpc_client.Client, region_id)
 
 
 def get_bill_client(region_id: str):
-    ak, sk, sts = get_aksk()
-    config = Config(
-        access_key_id=ak,
-        access_key_secret=sk,
-        security_token=sts,
-        region_id=region_id,
-        protocol="https",
-        connect_timeout=10 * 1000,
-        read_timeout=300 * 1000
-    )
-    client = BssOpenApi20171214Client(config)
-    return client
+    return _get_cached_client('bss', bss_client.Client, region_id)
 
 
 def get_das_client():
-    ak, sk, sts = get_aksk()
-    config = Config(
-        access_key_id=ak,
-        access_key_secret=sk,
-        security_token=sts,
-        region_id='cn-shanghai',
-        protocol="https",
-        connect_timeout=10 * 1000,
-        read_timeout=300 * 1000
-    )
-    client = DAS20200116Client(config)
-    return client
+    return _get_cached_client('das', das_client.Client, 'cn-shanghai')
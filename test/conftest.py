@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+# Benchmarks compare wall-clock timings against the implementations they
+# replaced. They are slow and depend on the machine, so they only run on request.
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-perf", action="store_true", default=False,
+                     help="run tests marked perf (also enabled by RUN_PERF_TESTS=1)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "perf: benchmark against a previous implementation; opt-in")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-perf") or os.getenv("RUN_PERF_TESTS") == "1":
+        return
+    skip = pytest.mark.skip(reason="benchmark; run with --run-perf or RUN_PERF_TESTS=1")
+    for item in items:
+        if "perf" in item.keywords:
+            item.add_marker(skip)
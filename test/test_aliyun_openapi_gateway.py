@@ -0,0 +1,88 @@
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds_openapi_mcp_server.core.context import set_mcp_instance
+from alibabacloud_rds_openapi_mcp_server.core.mcp import RdsMCP
+
+# The tools package registers its modules with the current RdsMCP on import.
+RdsMCP("gateway_test")
+from alibabacloud_rds_openapi_mcp_server.tools import aliyun_openapi_gateway as gateway_module
+from alibabacloud_rds_openapi_mcp_server.tools.aliyun_openapi_gateway import get_gateway
+set_mcp_instance(None)
+
+
+class FakeBody:
+    def __init__(self, request):
+        self.request = request
+
+    def to_map(self):
+        return {"request": self.request}
+
+
+class FakeResponse:
+    def __init__(self, request):
+        self.body = FakeBody(request)
+
+
+class FakeRdsClient:
+    _endpoint = "rds.aliyuncs.com"
+    created = 0
+
+    def __init__(self, config):
+        FakeRdsClient.created += 1
+        self.config = config
+
+    def modify_thing_with_options(self, request, runtime):
+        raise AssertionError("the async variant should have been used")
+
+    async def modify_thing_with_options_async(self, request, runtime):
+        return FakeResponse(request)
+
+
+@pytest.fixture
+def fake_sdk(monkeypatch):
+    monkeypatch.setenv("ALIBABA_CLOUD_ACCESS_KEY_ID", "gateway-ak")
+    monkeypatch.setenv("ALIBABA_CLOUD_ACCESS_KEY_SECRET", "gateway-sk")
+    monkeypatch.delenv("ALIBABA_CLOUD_SECURITY_TOKEN", raising=False)
+    monkeypatch.setattr(gateway_module, "_client_class", lambda service: FakeRdsClient)
+    FakeRdsClient.created = 0
+    yield
+    gateway_module._gateway_registry.invalidate()
+
+
+def test_gateways_should_be_shared_per_region_and_credential(fake_sdk, monkeypatch):
+    gateway = get_gateway("cn-hangzhou")
+    assert get_gateway("cn-hangzhou") is gateway
+    assert get_gateway("cn-beijing") is not gateway
+
+    monkeypatch.setenv("ALIBABA_CLOUD_SECURITY_TOKEN", "rotated")
+    assert get_gateway("cn-hangzhou") is not gateway
+
+
+def test_service_proxy_should_be_built_once_and_memoize_methods(fake_sdk):
+    gateway = get_gateway("cn-hangzhou")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        proxies = list(pool.map(lambda _: gateway.rds(), range(32)))
+    assert all(proxy is proxies[0] for proxy in proxies)
+    assert FakeRdsClient.created == 1
+
+    proxy = proxies[0]
+    assert proxy.modify_thing_with_options is proxy.modify_thing_with_options
+    with pytest.raises(AttributeError):
+        proxy.missing_action
+
+
+def test_with_options_calls_should_use_the_async_sdk_path(fake_sdk):
+    result = asyncio.run(get_gateway("cn-hangzhou").rds().modify_thing_with_options("req"))
+    assert result == {"request": "req"}
+
+
+def test_unknown_service_should_be_rejected():
+    with pytest.raises(ValueError, match="not supported"):
+        gateway_module._client_class("unknown")
@@ -0,0 +1,87 @@
+import asyncio
+import sys
+from collections import OrderedDict
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from alibabacloud_rds_openapi_mcp_server import bills
+from alibabacloud_rds_openapi_mcp_server.bills import BillCache, describe_bill_cycles, is_settled_cycle
+
+
+class FakeBssClient:
+    """Serves two pages per cycle and records every request."""
+
+    def __init__(self):
+        self.requests = []
+
+    def describe_instance_bill(self, request):
+        self.requests.append(request)
+        page = 0 if request.next_token is None else 1
+        items = [
+            SimpleNamespace(item="PayAsYouGoBill", after_discount_amount=1.0, instance_id=f"rm-{page};cn-hangzhou",
+                            billing_date=None, invoice_discount=0, subscription_type="PayAsYouGo",
+                            pretax_gross_amount=1.0, currency="CNY", commodity_code="rds", cost_unit=None,
+                            nick_name=None, pretax_amount=1.0, billing_item="cpu", list_price_unit=None, usage="1")
+        ]
+        return SimpleNamespace(body=SimpleNamespace(data=SimpleNamespace(
+            account_id="1234", items=items, next_token="page-2" if page == 0 else "")))
+
+
+@pytest.fixture(autouse=True)
+def account_memo(monkeypatch):
+    monkeypatch.setattr(bills, "_accounts", OrderedDict())
+
+
+def test_is_settled_cycle():
+    today = date(2025, 3, 10)
+    assert is_settled_cycle("2025-01", today)
+    assert is_settled_cycle("2025-02", today)
+    assert not is_settled_cycle("2025-02", date(2025, 3, 2))
+    assert not is_settled_cycle("2025-03", today)
+    assert not is_settled_cycle("bad", today)
+
+
+def test_settled_cycles_should_be_served_from_cache(tmp_path):
+    client = FakeBssClient()
+    cache = BillCache(str(tmp_path / "bills.sqlite3"))
+    cycles = ["2020-01", "2020-02", "2999-01"]
+
+    first = asyncio.run(describe_bill_cycles(client, "scope", cycles, False, cache=cache))
+    # One request resolves the account, then two pages per cycle.
+    assert client.requests[0].max_results == 1
+    assert len(client.requests) == 7
+    assert all(r.max_results == 300 for r in client.requests[1:])
+    assert [len(first[c]) for c in cycles] == [2, 2, 2]
+
+    second = asyncio.run(describe_bill_cycles(client, "scope", cycles, False, cache=cache))
+    assert second == first
+    # Only the open cycle was fetched again.
+    assert [r.billing_cycle for r in client.requests[7:]] == ["2999-01", "2999-01"]
+
+    filtered = asyncio.run(describe_bill_cycles(client, "scope", ["2020-01"], False, "rm-1", cache=cache))
+    assert [row["InstanceID"] for row in filtered["2020-01"]] == ["rm-1;cn-hangzhou"]
+    assert len(client.requests) == 9
+
+
+def test_rotated_credentials_of_the_same_account_should_share_cached_cycles(tmp_path):
+    client = FakeBssClient()
+    cache = BillCache(str(tmp_path / "bills.sqlite3"))
+    asyncio.run(describe_bill_cycles(client, "sts-token-1", ["2020-01"], False, cache=cache))
+
+    asyncio.run(describe_bill_cycles(client, "sts-token-2", ["2020-01"], False, cache=cache))
+    # The new credential is only checked against the bill API, not served a full fetch.
+    assert [r.max_results for r in client.requests] == [1, 300, 300, 1]
+
+
+def test_bill_cache_should_drop_old_entries(tmp_path):
+    cache = BillCache(str(tmp_path / "bills.sqlite3"))
+    cache.put(("1234", "2020-01", False, ""), [])
+    cache.prune(max_age=3600)
+    assert cache.get(("1234", "2020-01", False, "")) == []
+    cache.prune(max_age=-1)
+    assert cache.get(("1234", "2020-01", False, "")) is None
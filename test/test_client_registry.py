@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds_openapi_mcp_server.core.client_registry import ClientRegistry, credential_digest
+
+
+def _key(region="cn-hangzhou", ak="ak", sk="sk", sts=None):
+    return ("rds", region, ak, credential_digest(sk, sts))
+
+
+def test_get_or_create_should_reuse_client_for_same_credential():
+    registry = ClientRegistry()
+    first = registry.get_or_create(_key(), object)
+    second = registry.get_or_create(_key(), object)
+    assert first is second
+    assert len(registry) == 1
+
+
+def test_get_or_create_should_not_share_client_across_secrets():
+    registry = ClientRegistry()
+    first = registry.get_or_create(_key(sk="sk1"), object)
+    second = registry.get_or_create(_key(sk="sk2"), object)
+    assert first is not second
+
+
+def test_rotated_sts_token_should_evict_previous_client():
+    registry = ClientRegistry()
+    registry.get_or_create(_key(sts="token-1"), object)
+    registry.get_or_create(_key(region="cn-beijing", sts="token-1"), object)
+    registry.get_or_create(_key(sts="token-2"), object)
+    # The cn-hangzhou client built with token-1 is gone; cn-beijing is untouched.
+    assert len(registry) == 2
+    assert registry.invalidate(lambda k: k == _key(sts="token-1")) == 0
+
+
+def test_lru_and_ttl_eviction():
+    registry = ClientRegistry(max_size=2)
+    a = registry.get_or_create(_key(region="a"), object)
+    registry.get_or_create(_key(region="b"), object)
+    registry.get_or_create(_key(region="a"), object)
+    registry.get_or_create(_key(region="c"), object)
+    assert registry.get_or_create(_key(region="a"), object) is a
+    assert len(registry) == 2
+
+    expired = ClientRegistry(ttl=0)
+    first = expired.get_or_create(_key(), object)
+    assert expired.get_or_create(_key(), object) is not first
@@ -0,0 +1,43 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds_openapi_mcp_server.das_jobs import DasJobError, poll_das_job
+
+
+class FakeDasClient:
+    def __init__(self, states):
+        self.states = list(states)
+        self.job_ids = []
+
+    def call_api(self, params, request, runtime):
+        self.job_ids.append(request.body["JobId"])
+        state = self.states.pop(0)
+        data = {"State": state, "ResultId": "job-1"}
+        if state == "SUCCESS":
+            data["Data"] = {"Total": 1, "List": [{"Sql": "select 1"}]}
+        return {"body": {"Data": data}}
+
+
+def test_poll_das_job_should_resume_job_until_success():
+    client = FakeDasClient(["RUNNING", "RUNNING", "SUCCESS"])
+    data = asyncio.run(poll_das_job(client, "DescribeSqlInsightStatistic", {"InstanceId": "rm-x"},
+                                    initial_delay=0.01))
+    assert data["Data"]["Total"] == 1
+    assert client.job_ids == ["", "job-1", "job-1"]
+
+
+def test_poll_das_job_should_raise_on_failed_job():
+    client = FakeDasClient(["RUNNING", "FAIL"])
+    with pytest.raises(DasJobError, match="FAIL"):
+        asyncio.run(poll_das_job(client, "DescribeSqlInsightStatistic", {}, initial_delay=0.01))
+
+
+def test_poll_das_job_should_give_up_after_timeout():
+    client = FakeDasClient(["RUNNING"] * 10)
+    with pytest.raises(DasJobError, match="did not finish"):
+        asyncio.run(poll_das_job(client, "DescribeSqlInsightStatistic", {}, initial_delay=1, timeout=0.1))
@@ -0,0 +1,326 @@
+import asyncio
+import json
+import signal
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+
+PACKAGE_DIR = Path(__file__).resolve().parents[1] / "src" / "alibabacloud_rds_openapi_mcp_server"
+sys.path.insert(0, str(PACKAGE_DIR.parent))
+sys.path.append(str(PACKAGE_DIR))
+
+import db_service
+
+
+class FakeRdsClient:
+    def __init__(self):
+        self.calls = []
+
+    def create_account(self, request):
+        self.calls.append(("CreateAccount", request.account_name))
+
+    def grant_account_privilege(self, request):
+        self.calls.append(("GrantAccountPrivilege", request.account_name))
+
+    def delete_account(self, request):
+        self.calls.append(("DeleteAccount", request.account_name))
+
+
+class ExpiredTokenError(Exception):
+    code = "InvalidSecurityToken.Expired"
+
+
+class ExpiredRdsClient(FakeRdsClient):
+    def delete_account(self, request):
+        self.calls.append(("DeleteAccount", request.account_name))
+        raise ExpiredTokenError("the security token has expired")
+
+
+class FakeMySQLConnection:
+    def __init__(self):
+        self.open = True
+
+    def ping(self, reconnect=False):
+        if not self.open:
+            raise ConnectionError("closed")
+
+    def close(self):
+        self.open = False
+
+
+@pytest.fixture
+def fake_backend(monkeypatch, tmp_path):
+    from alibabacloud_rds_openapi_mcp_server.core import storage
+
+    monkeypatch.setattr(storage, "CACHE_DIR", str(tmp_path))
+    client = FakeRdsClient()
+    connections = []
+
+    async def fake_instance_info(self):
+        self.db_type, self.host, self.port = "mysql", "rm-1.mysql.rds.aliyuncs.com", 3306
+
+    def fake_connect(**kwargs):
+        connections.append(FakeMySQLConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(db_service, "get_rds_client", lambda region_id: client)
+    monkeypatch.setattr(db_service, "get_rds_account", lambda: (None, None))
+    monkeypatch.setattr(db_service, "get_inventory", lambda *credential: None)
+    monkeypatch.setattr(db_service.DBService, "_get_db_instance_info", fake_instance_info)
+    monkeypatch.setattr(db_service.pymysql, "connect", fake_connect)
+    monkeypatch.setattr(db_service.DBConn, "execute_sql", lambda self, sql, *args: self.conn)
+    monkeypatch.setattr(db_service, "_account_pool", db_service._TempAccountPool())
+    monkeypatch.setattr(db_service, "_connection_pool", db_service._ConnectionPool())
+    return client, connections
+
+
+async def _query(database="db"):
+    async with db_service.DBService("cn-hangzhou", "rm-1", database) as service:
+        await asyncio.sleep(0.01)
+        return await service.execute_sql("select 1")
+
+
+def test_repeated_sessions_should_share_account_and_connection(fake_backend):
+    client, connections = fake_backend
+
+    async def run():
+        first = await _query()
+        second = await _query()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second
+    assert len(connections) == 1
+    assert [name for name, _ in client.calls] == ["CreateAccount", "GrantAccountPrivilege"]
+
+
+def test_connection_pool_should_cap_connections_per_instance(fake_backend, monkeypatch):
+    _, connections = fake_backend
+    monkeypatch.setattr(db_service, "DB_POOL_MAX_PER_INSTANCE", 2)
+
+    async def run():
+        await asyncio.gather(*(_query() for _ in range(6)))
+        await _query("other_db")
+
+    asyncio.run(run())
+    assert sum(conn.open for conn in connections) == 2
+    assert db_service._connection_pool._open == {"rm-1": 2}
+
+
+def test_temporary_accounts_should_invalidate_cached_account_lists(fake_backend, monkeypatch):
+    invalidated = []
+
+    class FakeInventory:
+        def invalidate(self, instance_ids, columns):
+            invalidated.append((list(instance_ids), tuple(columns)))
+
+    monkeypatch.setattr(db_service, "get_inventory", lambda *credential: FakeInventory())
+
+    async def run():
+        await _query()
+        await _query()
+        assert invalidated == [(["rm-1"], ("accounts",))]
+        monkeypatch.setattr(db_service, "ACCOUNT_IDLE_TIMEOUT", -1)
+        await db_service._account_pool.reap()
+
+    asyncio.run(run())
+    assert invalidated == [(["rm-1"], ("accounts",))] * 2
+
+
+def test_pooled_connections_should_not_be_shared_across_passwords_or_credentials(fake_backend, monkeypatch):
+    _, connections = fake_backend
+    caller = {"account": ("reader", "right"), "aksk": ("ak", "sk", None)}
+    monkeypatch.setattr(db_service, "get_rds_account", lambda: caller["account"])
+    monkeypatch.setattr(db_service, "get_aksk", lambda: caller["aksk"])
+
+    async def query_as(account, aksk):
+        caller.update(account=account, aksk=aksk)
+        return await _query()
+
+    async def run():
+        first = await query_as(("reader", "right"), ("ak", "sk", None))
+        assert await query_as(("reader", "right"), ("ak", "sk", None)) is first
+        assert await query_as(("reader", "wrong"), ("ak", "sk", None)) is not first
+        assert await query_as(("reader", "right"), ("ak", "other-sk", None)) is not first
+
+    asyncio.run(run())
+    assert len(connections) == 3
+
+
+def test_reaper_should_close_connections_and_delete_idle_account(fake_backend, monkeypatch):
+    client, connections = fake_backend
+
+    async def run():
+        await _query()
+        monkeypatch.setattr(db_service, "ACCOUNT_IDLE_TIMEOUT", -1)
+        await db_service._account_pool.reap()
+
+    asyncio.run(run())
+    assert client.calls[-1][0] == "DeleteAccount"
+    assert not connections[0].open
+
+
+def test_deleting_with_an_expired_credential_should_fall_back_to_a_newer_client(fake_backend, monkeypatch):
+    creator, fresh = ExpiredRdsClient(), FakeRdsClient()
+    pool = db_service._account_pool
+
+    async def run():
+        monkeypatch.setattr(db_service, "get_rds_client", lambda region_id: creator)
+        await _query()
+        monkeypatch.setattr(db_service, "get_rds_client", lambda region_id: fresh)
+        await _query("other_db")
+        monkeypatch.setattr(db_service, "ACCOUNT_IDLE_TIMEOUT", -1)
+        await pool.reap()
+
+    asyncio.run(run())
+    assert [name for name, _ in fresh.calls].count("DeleteAccount") == 2
+    assert pool._load_orphans() == []
+    assert pool._locks == {} and pool._clients == {}
+
+
+def test_undeletable_accounts_should_be_deleted_by_a_later_run(fake_backend, monkeypatch, tmp_path):
+    expired, fresh = ExpiredRdsClient(), FakeRdsClient()
+    monkeypatch.setattr(db_service, "get_rds_client", lambda region_id: expired)
+
+    async def run():
+        await _query()
+        monkeypatch.setattr(db_service, "ACCOUNT_IDLE_TIMEOUT", -1)
+        await db_service._account_pool.reap()
+
+    asyncio.run(run())
+    account_name = expired.calls[0][1]
+    orphans = json.loads((tmp_path / "orphaned_accounts.json").read_text())
+    assert orphans == [["cn-hangzhou", "rm-1", account_name]]
+
+    later_run = db_service._TempAccountPool()
+    monkeypatch.setattr(db_service, "get_rds_client", lambda region_id: fresh)
+    asyncio.run(later_run.reap())
+    assert fresh.calls == [("DeleteAccount", account_name)]
+    assert json.loads((tmp_path / "orphaned_accounts.json").read_text()) == []
+
+
+def test_accounts_of_sts_credentials_should_expire_before_the_token(fake_backend, monkeypatch):
+    client, _ = fake_backend
+    monkeypatch.setattr(db_service, "get_aksk", lambda: ("STS.ak", "sk", "token"))
+    monkeypatch.setattr(db_service, "ACCOUNT_STS_MAX_LIFETIME", 0)
+
+    async def run():
+        await _query()
+        await _query()
+
+    asyncio.run(run())
+    assert [name for name, _ in client.calls].count("CreateAccount") == 2
+
+
+def test_sigterm_should_delete_accounts_before_terminating(monkeypatch):
+    events = []
+    monkeypatch.setattr(db_service._account_pool, "close_all", lambda: events.append("close_all"))
+    monkeypatch.setattr(db_service.os, "kill", lambda pid, signum: events.append(signum))
+    previous = signal.getsignal(signal.SIGTERM)
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        db_service.handle_sigterm()
+        signal.getsignal(signal.SIGTERM)(signal.SIGTERM, None)
+        assert signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+    assert events == ["close_all", signal.SIGTERM]
+
+
+def test_race_endpoints_should_return_reachable_endpoint():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    unused = socket.socket()
+    unused.bind(("127.0.0.1", 0))
+    closed_port = unused.getsockname()[1]
+    unused.close()
+    try:
+        open_port = listener.getsockname()[1]
+        endpoints = [("127.0.0.1", closed_port), ("127.0.0.1", open_port)]
+        assert asyncio.run(db_service.race_endpoints(endpoints)) == ("127.0.0.1", open_port)
+        assert asyncio.run(db_service.race_endpoints(endpoints[:1])) is None
+    finally:
+        listener.close()
+
+
+class FakeStreamingCursor:
+    def __init__(self, rows, name=None):
+        self.rows = list(rows)
+        self.name = name
+        self.closed = False
+        self.description = None
+
+    def execute(self, sql):
+        # Like psycopg2, a named cursor only learns its columns on the first fetch.
+        if self.name is None:
+            self.description = [("id",), ("name",)]
+
+    def fetchmany(self, size):
+        self.description = [("id",), ("name",)]
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+def _fake_conn(dbtype, cursor):
+    conn = db_service.DBConn.__new__(db_service.DBConn)
+    conn.dbtype = dbtype
+    conn.conn = type("Conn", (), {"cursor": lambda self, *a, **kw: cursor, "close": lambda self: None})()
+    return conn
+
+
+def test_execute_sql_should_stop_at_max_rows_and_mark_truncation():
+    cursor = FakeStreamingCursor((i, f"row{i}") for i in range(10_000))
+    conn = _fake_conn("sqlserver", cursor)
+
+    result = conn.execute_sql("select * from t", max_rows=3, output_format="jsonl")
+
+    lines = result.splitlines()
+    assert len(lines) == 4
+    assert lines[0] == '{"id": 0, "name": "row0"}'
+    assert '"truncated": true' in lines[-1]
+    # Only the first fetch batch was read from the server.
+    assert len(cursor.rows) == 10_000 - db_service.FETCH_BATCH_SIZE
+
+
+@pytest.mark.parametrize("sql, server_side", [
+    ("select * from t", True),
+    ("WITH recent AS (SELECT * FROM t) SELECT * FROM recent", True),
+    ("\n  values (1), (2)", True),
+    ("show server_version", False),
+    ("update t set a = 1", False),
+])
+def test_postgresql_queries_should_use_a_server_side_cursor(sql, server_side):
+    opened = []
+    conn = db_service.DBConn.__new__(db_service.DBConn)
+    conn.dbtype = "postgresql"
+    conn.conn = type("Conn", (), {"cursor": lambda self, **kwargs: opened.append(kwargs)})()
+
+    conn._open_cursor(sql)
+    assert ("name" in opened[0]) is server_side
+
+
+def test_postgresql_named_cursor_should_return_rows():
+    cursor = FakeStreamingCursor([(1, "a"), (2, "b")], name="mcp_cursor")
+    conn = _fake_conn("postgresql", cursor)
+
+    result = conn.execute_sql("WITH t AS (SELECT 1) SELECT * FROM t", output_format="jsonl")
+
+    assert result.splitlines() == ['{"id": 1, "name": "a"}', '{"id": 2, "name": "b"}']
+    assert cursor.closed
+
+
+def test_execute_sql_should_drop_mysql_connection_instead_of_draining():
+    cursor = FakeStreamingCursor({"id": i} for i in range(10))
+    conn = _fake_conn("mysql", cursor)
+
+    result = conn.execute_sql("select * from t", max_bytes=30)
+
+    assert result.startswith('{"rows": [{"id": 0}, {"id": 1}]')
+    assert conn.conn is None
+    assert not cursor.closed
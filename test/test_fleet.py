@@ -0,0 +1,75 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds_openapi_mcp_server.fleet import describe_region_instances, fan_out_instances, parse_regions
+
+
+class FakeRdsClient:
+    """Serves ``total`` instances in pages and records concurrency."""
+
+    def __init__(self, region_id, total, stats, fail=False):
+        self.region_id = region_id
+        self.total = total
+        self.stats = stats
+        self.fail = fail
+
+    def describe_dbinstances(self, request):
+        with self.stats["lock"]:
+            self.stats["in_flight"] += 1
+            self.stats["peak"] = max(self.stats["peak"], self.stats["in_flight"])
+        try:
+            time.sleep(0.02)
+            if self.fail:
+                raise RuntimeError("InvalidAccessKeyId")
+            start = (request.page_number - 1) * request.page_size
+            ids = [f"rm-{self.region_id}-{i}" for i in range(start, min(start + request.page_size, self.total))]
+            return SimpleNamespace(body=SimpleNamespace(
+                items=SimpleNamespace(dbinstance=[{"DBInstanceId": i, "RegionId": self.region_id} for i in ids]),
+                total_record_count=self.total,
+            ))
+        finally:
+            with self.stats["lock"]:
+                self.stats["in_flight"] -= 1
+
+
+@pytest.fixture
+def stats():
+    return {"lock": threading.Lock(), "in_flight": 0, "peak": 0}
+
+
+def test_parse_regions():
+    assert parse_regions("cn-hangzhou") == ["cn-hangzhou"]
+    assert parse_regions("cn-hangzhou, cn-beijing,cn-hangzhou") == ["cn-hangzhou", "cn-beijing"]
+    assert parse_regions(["cn-beijing", " all "]) == ["cn-beijing", "all"]
+
+
+def test_describe_region_instances_should_fetch_every_page(stats):
+    client = FakeRdsClient("cn-hangzhou", 250, stats)
+    instances = asyncio.run(describe_region_instances(client, "cn-hangzhou", asyncio.Semaphore(8)))
+    assert len(instances) == 250
+    assert len({i["DBInstanceId"] for i in instances}) == 250
+
+
+def test_fan_out_should_report_failed_regions_and_respect_limit(stats):
+    clients = {
+        "cn-hangzhou": FakeRdsClient("cn-hangzhou", 350, stats),
+        "cn-beijing": FakeRdsClient("cn-beijing", 10, stats),
+        "cn-shanghai": FakeRdsClient("cn-shanghai", 0, stats, fail=True),
+    }
+
+    async def run():
+        return [result async for result in fan_out_instances(list(clients), clients.get, concurrency=2)]
+
+    results = {r.region_id: r for r in asyncio.run(run())}
+    assert len(results["cn-hangzhou"].instances) == 350
+    assert len(results["cn-beijing"].instances) == 10
+    assert isinstance(results["cn-shanghai"].error, RuntimeError)
+    assert stats["peak"] == 2
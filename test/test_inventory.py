@@ -0,0 +1,187 @@
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds_openapi_mcp_server import inventory
+from alibabacloud_rds_openapi_mcp_server.core.invalidation_log import InvalidationLog
+from alibabacloud_rds_openapi_mcp_server.inventory import InventoryIndex
+
+
+def _listing(**overrides):
+    item = {"DBInstanceId": "rm-1", "DBInstanceStatus": "Running", "DBInstanceClass": "mysql.n2.medium.1"}
+    item.update(overrides)
+    return [item]
+
+
+def _age(index, instance_id, column, seconds):
+    row = index._rows[instance_id]
+    index._fetched_at[column][row] -= seconds
+
+
+def test_cells_should_expire_and_be_invalidated():
+    index = InventoryIndex()
+    index.put("rm-1", "attribute", {"Items": {}}, region_id="cn-hangzhou")
+    index.put("rm-1", "accounts", {"Accounts": []})
+
+    cached = index.get("rm-1", "attribute")
+    cached["Items"]["mutated"] = True
+    assert index.get("rm-1", "attribute") == {"Items": {}}
+
+    _age(index, "rm-1", "accounts", inventory.INVENTORY_TTL + 1)
+    assert index.get("rm-1", "accounts") is None
+
+    index.invalidate(["rm-1"])
+    assert index.get("rm-1", "attribute") is None
+    assert index.regions() == ["cn-hangzhou"]
+
+
+def test_listing_should_refresh_unchanged_rows_and_invalidate_changed_ones():
+    index = InventoryIndex()
+    index.apply_listing("cn-hangzhou", _listing())
+    index.put("rm-1", "attribute", {"v": 1})
+    index.put("rm-1", "net_info", {"v": 1})
+    _age(index, "rm-1", "attribute", inventory.INVENTORY_TTL - 1)
+
+    index.apply_listing("cn-hangzhou", _listing())
+    _age(index, "rm-1", "attribute", 2)
+    assert index.get("rm-1", "attribute") == {"v": 1}
+
+    index.apply_listing("cn-hangzhou", _listing(DBInstanceClass="mysql.n4.large.1"))
+    assert index.get("rm-1", "attribute") is None
+    assert index.get("rm-1", "net_info") is None
+
+    index.put("rm-1", "attribute", {"v": 2})
+    index.apply_listing("cn-hangzhou", [])
+    assert index.get("rm-1", "attribute") is None
+
+
+def test_tags_should_replace_previous_tags_of_region():
+    index = InventoryIndex()
+    index.apply_listing("cn-hangzhou", _listing() + _listing(DBInstanceId="rm-2"))
+    tag = SimpleNamespace(tag_key="env", tag_value="prod",
+                          dbinstance_ids=SimpleNamespace(dbinstance_ids=["rm-1"]))
+    index.apply_tags("cn-hangzhou", [tag])
+    assert index.get("rm-1", "tags") == {"env": "prod"}
+    assert index.get("rm-2", "tags") == {}
+
+    index.apply_tags("cn-hangzhou", [])
+    assert index.get("rm-1", "tags") == {}
+
+
+def test_snapshot_should_round_trip(tmp_path):
+    path = str(tmp_path / "inventory.json.gz")
+    index = InventoryIndex(path)
+    index.put("rm-1", "attribute", {"v": 1}, region_id="cn-hangzhou")
+    index.save()
+
+    restored = InventoryIndex(path)
+    assert restored.get("rm-1", "attribute") == {"v": 1}
+    assert restored.regions() == ["cn-hangzhou"]
+    assert time.time() - restored._fetched_at["attribute"][0] < 5
+
+    Path(path).write_bytes(b"not gzip")
+    assert len(InventoryIndex(path)) == 0
+
+
+def test_invalidations_should_reach_other_workers(tmp_path):
+    path = str(tmp_path / "invalidations.sqlite3")
+    worker_a = InventoryIndex(shared=InvalidationLog(path, "scope"))
+    worker_b = InventoryIndex(shared=InvalidationLog(path, "scope"))
+    other_credential = InventoryIndex(shared=InvalidationLog(path, "other"))
+    for index in (worker_a, worker_b, other_credential):
+        index.put("rm-1", "attribute", {"v": 1})
+        index.put("rm-1", "accounts", {"v": 1})
+
+    worker_a.invalidate(["rm-1"], columns=("attribute",))
+    assert worker_b.get("rm-1", "attribute") is None
+    assert worker_b.get("rm-1", "accounts") == {"v": 1}
+    assert other_credential.get("rm-1", "attribute") == {"v": 1}
+
+    # A value fetched after the invalidation is kept.
+    worker_b.put("rm-1", "attribute", {"v": 2})
+    assert worker_b.get("rm-1", "attribute") == {"v": 2}
+
+
+def test_indexes_should_survive_token_rotation_and_be_evicted_with_their_snapshot(tmp_path, monkeypatch):
+    from collections import OrderedDict
+
+    monkeypatch.setattr(inventory, "cache_path", lambda name: str(tmp_path / name))
+    monkeypatch.setattr(inventory, "_indexes", OrderedDict())
+    monkeypatch.setattr(inventory, "INVENTORY_MAX_INDEXES", 2)
+    monkeypatch.setattr(inventory, "_snapshots_pruned", False)
+    stale = tmp_path / "inventory-expired.json.gz"
+    stale.write_text("")
+    os.utime(stale, (0, 0))
+
+    first = inventory.get_inventory("ak", "sk", "token-1")
+    assert inventory.get_inventory("ak", "sk", "token-2") is first
+    assert inventory.get_inventory("ak", "other-sk", None) is not first
+    assert not stale.exists()
+
+    first.put("rm-1", "attribute", {"DBInstanceId": "rm-1"})
+    first.save()
+    snapshot = Path(first._path)
+    assert snapshot.exists()
+    inventory.get_inventory("ak-2", "sk", None)
+    assert first not in inventory._indexes.values()
+    assert not snapshot.exists()
+
+
+def test_refresher_should_be_opt_in_and_stop_when_unused(monkeypatch):
+    index = InventoryIndex()
+    index.put("rm-1", "attribute", {"v": 1}, region_id="cn-hangzhou")
+    refreshed = []
+
+    async def fake_refresh(region_id, client):
+        refreshed.append(region_id)
+
+    monkeypatch.setattr(index, "refresh_region", fake_refresh)
+    monkeypatch.setattr(inventory, "INVENTORY_REFRESH_INTERVAL", 0)
+
+    async def run():
+        index.ensure_refresher(lambda region_id: None)
+        assert index._refresher is None
+
+        monkeypatch.setattr(inventory, "INVENTORY_REFRESH_ENABLED", True)
+        index.ensure_refresher(lambda region_id: None)
+        while not refreshed:
+            await asyncio.sleep(0)
+        monkeypatch.setattr(inventory, "INVENTORY_REFRESH_IDLE", -1)
+        await asyncio.wait_for(index._refresher, 1)
+
+    asyncio.run(run())
+    assert refreshed and set(refreshed) == {"cn-hangzhou"}
+
+
+def test_instance_attribute_should_always_carry_tags(monkeypatch):
+    from alibabacloud_rds_openapi_mcp_server import server
+
+    calls = []
+    attribute = {"DBInstanceId": "rm-1", "DBInstanceClass": "mysql.n2.medium.1",
+                 "DBInstanceStorageType": "cloud_essd", "DBInstanceStorage": 100}
+
+    class FakeRdsClient:
+        def describe_dbinstance_attribute(self, request):
+            calls.append("DescribeDBInstanceAttribute")
+            body = {"Items": {"DBInstanceAttribute": [dict(attribute)]}}
+            return SimpleNamespace(body=SimpleNamespace(to_map=lambda: body))
+
+        def describe_tags(self, request):
+            calls.append("DescribeTags")
+            infos = [SimpleNamespace(tag_key="env", tag_value="prod")] if request.dbinstance_id == "rm-1" else []
+            return SimpleNamespace(body=SimpleNamespace(items=SimpleNamespace(tag_infos=infos)))
+
+    index = InventoryIndex()
+    monkeypatch.setattr(server, "get_rds_client", lambda region_id: FakeRdsClient())
+    monkeypatch.setattr(server, "_inventory", lambda: index)
+
+    first = asyncio.run(server.describe_db_instance_attribute("cn-hangzhou", "rm-1"))
+    second = asyncio.run(server.describe_db_instance_attribute("cn-hangzhou", "rm-1"))
+    assert first == second
+    assert first["Items"]["DBInstanceAttribute"][0]["Tags"] == {"env": "prod"}
+    assert sorted(calls) == ["DescribeDBInstanceAttribute", "DescribeTags"]
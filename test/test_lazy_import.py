@@ -0,0 +1,117 @@
+import os
+import re
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC))
+
+from alibabacloud_rds_openapi_mcp_server.core.context import set_mcp_instance
+from alibabacloud_rds_openapi_mcp_server.core.lazy_import import lazy_module, module_groups, scan_groups
+from alibabacloud_rds_openapi_mcp_server.core.mcp import FastMCP, RdsMCP
+
+# SDK modules the server used to import eagerly.
+SDK_MODULES = ("alibabacloud_rds20140815.models", "alibabacloud_vpc20160428.models",
+               "alibabacloud_bssopenapi20171214.client", "alibabacloud_das20200116.client",
+               "alibabacloud_openapi_util.client")
+
+
+def test_module_groups_should_be_read_from_decorators():
+    source = textwrap.dedent("""
+        GROUP = "custom_read"
+
+        @tool
+        def a(): pass
+
+        @tool(group="custom_action", annotations=None)
+        async def b(): pass
+
+        @mcp.tool(group=GROUP)
+        def c(): pass
+
+        @other(group="ignored")
+        def d(): pass
+    """)
+    assert module_groups(source, "tool") == {"rds", "custom_action", "custom_read"}
+    assert module_groups(source, "prompt") == set()
+    assert module_groups("@tool(group=make_group())\ndef a(): pass\n", "tool") is None
+
+
+def test_lazy_module_should_import_on_first_attribute_access():
+    name = "json.tool"
+    sys.modules.pop(name, None)
+    module = lazy_module(name)
+    assert name not in sys.modules
+    assert module.main is sys.modules[name].main
+    assert "main" in vars(module)
+
+
+@pytest.fixture
+def component_package(tmp_path, monkeypatch):
+    package = tmp_path / "lazy_components"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "reads.py").write_text(textwrap.dedent("""
+        from alibabacloud_rds_openapi_mcp_server.core.context import global_mcp_instance
+
+        @global_mcp_instance().tool(group="lazy_read")
+        def lazy_read_tool(): pass
+    """))
+    (package / "actions.py").write_text(textwrap.dedent("""
+        from alibabacloud_rds_openapi_mcp_server.core.context import global_mcp_instance
+
+        @global_mcp_instance().tool(group="lazy_action")
+        def lazy_action_tool(): pass
+    """))
+    (package / "helpers.py").write_text("raise RuntimeError('helpers must not be imported')\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(FastMCP, "add_tool", MagicMock())
+    yield package
+    for name in [m for m in sys.modules if m.startswith("lazy_components")]:
+        del sys.modules[name]
+    set_mcp_instance(None)
+
+
+def test_activate_should_only_import_modules_of_enabled_groups(component_package):
+    manifest = scan_groups([str(component_package)], "lazy_components", "tool")
+    assert manifest == {"lazy_read": ["lazy_components.reads"], "lazy_action": ["lazy_components.actions"]}
+
+    server = RdsMCP("lazy_test")
+    server.defer_modules(manifest)
+    with pytest.raises(ValueError, match="Unknown group"):
+        server.activate(["lazy_missing"])
+    server.activate(["lazy_read"])
+
+    assert "lazy_components.reads" in sys.modules
+    assert "lazy_components.actions" not in sys.modules
+    assert [call.kwargs["name"] for call in FastMCP.add_tool.call_args_list] == ["lazy_read_tool"]
+
+
+def _import_time(statement: str) -> dict:
+    """Runs ``statement`` under ``-X importtime`` and returns the cumulative microseconds per module."""
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            capture_output=True, text=True, env=env, check=True)
+    times = {}
+    for match in re.finditer(r"^import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)$", result.stderr, re.M):
+        times.setdefault(match.group(3), int(match.group(1)))
+    return times
+
+
+def test_server_import_should_not_load_sdk_packages():
+    lazy = _import_time("import alibabacloud_rds_openapi_mcp_server.server")
+    loaded = sorted(m for m in lazy if m.split(".")[0].startswith(("alibabacloud_", "Tea"))
+                    and not m.startswith("alibabacloud_rds_openapi_mcp_server"))
+    assert loaded == []
+
+    eager = _import_time("import alibabacloud_rds_openapi_mcp_server.server; " +
+                         "; ".join(f"import {name}" for name in SDK_MODULES))
+    lazy_ms = lazy["alibabacloud_rds_openapi_mcp_server.server"] / 1000
+    sdk_ms = sum(eager[name] for name in SDK_MODULES if name in eager) / 1000
+    print(f"\nserver import: {lazy_ms:.0f}ms; deferred SDK modules: {sdk_ms:.0f}ms")
+    assert sdk_ms > 0
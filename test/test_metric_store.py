@@ -0,0 +1,214 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds_openapi_mcp_server.metric_store import (MetricStore, fetch_cached, merge_intervals,
+                                                              subtract_intervals)
+
+DAY = 86400
+
+
+def test_interval_helpers():
+    assert subtract_intervals(0, 100, [(10, 20), (15, 30), (50, 60)]) == [(0, 10), (30, 50), (60, 100)]
+    assert subtract_intervals(0, 100, [(0, 100)]) == []
+    assert subtract_intervals(0, 100, []) == [(0, 100)]
+    assert merge_intervals([(50, 60), (0, 10), (10, 20), (55, 70)]) == [(0, 20), (50, 70)]
+
+
+def _fake_source(calls):
+    async def fetch(start, end):
+        calls.append((start, end))
+        samples = [(ts, ts // 60) for ts in range(start - start % 60, end + 1, 60) if start <= ts <= end]
+        return {"cpu": (samples, {"unit": "%"})}
+    return fetch
+
+
+def test_fetch_cached_should_only_fetch_gaps(tmp_path):
+    store = MetricStore(str(tmp_path / "metrics.sqlite3"))
+    calls = []
+    fetch = _fake_source(calls)
+    base = int(time.time()) - 10 * DAY
+    base -= base % 60
+
+    first = asyncio.run(fetch_cached(["cpu"], base, base + DAY, fetch, align=60, store=store))
+    second = asyncio.run(fetch_cached(["cpu"], base - DAY, base + 2 * DAY, fetch, align=60, store=store))
+    third = asyncio.run(fetch_cached(["cpu"], base, base + 2 * DAY, fetch, align=60, store=store))
+
+    assert calls == [(base, base + DAY), (base - DAY, base), (base + DAY, base + 2 * DAY)]
+    samples, meta = second["cpu"]
+    assert meta == {"unit": "%"}
+    assert len(samples) == 3 * DAY // 60 + 1
+    assert samples[DAY // 60:2 * DAY // 60 + 1] == first["cpu"][0]
+    assert third["cpu"][0] == samples[DAY // 60:]
+
+
+def test_recent_samples_should_be_refetched(tmp_path):
+    store = MetricStore(str(tmp_path / "metrics.sqlite3"), settle=300)
+    calls = []
+    fetch = _fake_source(calls)
+    now = int(time.time())
+
+    asyncio.run(fetch_cached(["cpu"], now - 3600, now, fetch, store=store))
+    asyncio.run(fetch_cached(["cpu"], now - 3600, now, fetch, store=store))
+
+    assert calls[0] == (now - 3600, now)
+    assert calls[1][0] >= now - 300
+
+
+def test_series_without_data_should_stay_uncovered(tmp_path):
+    store = MetricStore(":memory:")
+    calls = []
+
+    async def fetch(start, end):
+        calls.append((start, end))
+        return {}
+
+    base = int(time.time()) - 10 * DAY
+    for _ in range(2):
+        asyncio.run(fetch_cached(["missing"], base, base + 600, fetch, store=store))
+    assert len(calls) == 2
+    assert store.missing("missing", base, base + 600) == [(base, base + 600)]
+
+
+def test_cached_performance_should_not_be_served_to_another_secret(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+    from alibabacloud_rds_openapi_mcp_server import metric_store, server
+
+    calls = []
+    base = int(time.time()) - 10 * DAY
+    base -= base % 3600
+
+    class FakeRdsClient:
+        def describe_dbinstance_performance(self, request):
+            calls.append(request.key)
+            values = [SimpleNamespace(date=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts)), value="1")
+                      for ts in range(base, base + 3600, 60)]
+            key = SimpleNamespace(key=request.key, unit="%", value_format="cpu",
+                                  values=SimpleNamespace(performance_value=values))
+            return SimpleNamespace(body=SimpleNamespace(performance_keys=SimpleNamespace(performance_key=[key])))
+
+    monkeypatch.setattr(metric_store, "_store", MetricStore(str(tmp_path / "metrics.sqlite3")))
+    monkeypatch.setattr(server, "get_rds_client", lambda region_id: FakeRdsClient())
+    secret = {"sk": "right"}
+    monkeypatch.setattr(server, "get_aksk", lambda: ("ak", secret["sk"], None))
+
+    def query():
+        start, end = (time.strftime("%Y-%m-%d %H:%M", time.localtime(ts)) for ts in (base, base + 3600))
+        return asyncio.run(server.describe_db_instance_performance(
+            "cn-hangzhou", "rm-1", "mysql", ["MemCpuUsage"], start, end))
+
+    query()
+    query()
+    assert len(calls) == 1
+    secret["sk"] = "wrong"
+    query()
+    assert len(calls) == 2
+
+
+def test_cached_performance_should_not_mix_granularities(tmp_path, monkeypatch):
+    from datetime import datetime
+    from types import SimpleNamespace
+    from alibabacloud_rds_openapi_mcp_server import metric_store, server
+
+    windows, served = [], []
+    base = int(time.time()) - 10 * DAY
+    base -= base % DAY
+
+    class FakeRdsClient:
+        # Like the API, the granularity follows the length of the requested window.
+        def describe_dbinstance_performance(self, request):
+            start, end = (int(datetime.strptime(t, "%Y-%m-%dT%H:%MZ").timestamp()) for t in
+                          (request.start_time, request.end_time))
+            windows.append(end - start)
+            step = 60 if end - start <= 3600 else 3600
+            values = [SimpleNamespace(date=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts)), value="1")
+                      for ts in range(start, end + 1, step)]
+            key = SimpleNamespace(key=request.key, unit="%", value_format="cpu",
+                                  values=SimpleNamespace(performance_value=values))
+            return SimpleNamespace(body=SimpleNamespace(performance_keys=SimpleNamespace(performance_key=[key])))
+
+    monkeypatch.setattr(metric_store, "_store", MetricStore(str(tmp_path / "metrics.sqlite3")))
+    monkeypatch.setattr(server, "get_rds_client", lambda region_id: FakeRdsClient())
+    monkeypatch.setattr(server, "get_aksk", lambda: ("ak", "sk", None))
+    monkeypatch.setattr(server, "downsample_performance", lambda values, *args: served.append(values) or values)
+
+    def query(start, end):
+        start, end = (time.strftime("%Y-%m-%d %H:%M", time.localtime(ts)) for ts in (start, end))
+        asyncio.run(server.describe_db_instance_performance("cn-hangzhou", "rm-1", "mysql", ["MemCpuUsage"],
+                                                            start, end))
+
+    query(base + 3600, base + 7200)
+    query(base, base + 2 * DAY)
+    assert windows == [3600, DAY, DAY]
+    timestamps = [datetime.strptime(v.date, "%Y-%m-%dT%H:%M:%SZ").timestamp() for v in served[-1]]
+    assert {b - a for a, b in zip(timestamps, timestamps[1:])} == {3600}
+
+
+def test_cached_das_metrics_should_not_be_served_to_another_secret(tmp_path, monkeypatch):
+    from alibabacloud_rds_openapi_mcp_server import metric_store, server
+
+    calls = []
+    base = int(time.time()) - 10 * DAY
+    base -= base % 3600
+
+    async def fake_call_das_api(client, action, body):
+        calls.append(body["Metrics"])
+        timestamps = list(range(body["StartTime"], body["EndTime"] + 1, body["Interval"] * 1000))
+        return {"Data": [{"Name": name, "Timestamp": timestamps, "Value": [1.0] * len(timestamps)}
+                         for name in body["Metrics"].split(",")]}
+
+    monkeypatch.setattr(metric_store, "_store", MetricStore(str(tmp_path / "metrics.sqlite3")))
+    monkeypatch.setattr(server, "get_das_client", lambda: None)
+    monkeypatch.setattr(server, "call_das_api", fake_call_das_api)
+    secret = {"sk": "right"}
+    monkeypatch.setattr(server, "get_aksk", lambda: ("ak", secret["sk"], None))
+
+    def query():
+        start, end = (time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)) for ts in (base, base + 3600))
+        return asyncio.run(server.describe_monitor_metrics("rm-1", ["IOPSUsage"], "mysql", start, end))
+
+    query()
+    query()
+    assert len(calls) == 1
+    secret["sk"] = "wrong"
+    query()
+    assert len(calls) == 2
+
+
+def test_cached_rc_metrics_should_keep_the_response_fields(tmp_path, monkeypatch):
+    import json
+    from types import SimpleNamespace
+    from alibabacloud_rds_openapi_mcp_server import metric_store
+    from alibabacloud_rds_openapi_mcp_server.core.context import set_mcp_instance
+    from alibabacloud_rds_openapi_mcp_server.core.mcp import RdsMCP
+
+    # The tools package registers its modules with the current RdsMCP on import.
+    RdsMCP("rc_metric_test")
+    from alibabacloud_rds_openapi_mcp_server.tools import rds_custom_read
+    set_mcp_instance(None)
+
+    calls = []
+    base = int(time.time()) - 10 * DAY
+    base -= base % 3600
+
+    async def describe_rcmetric_list_with_options(request):
+        calls.append(request)
+        points = [{"timestamp": ts * 1000, "Average": 1} for ts in range(base, base + 3600, 60)]
+        return {"RequestId": "req-1", "InstanceId": "rc-1", "Period": "60", "NextToken": None,
+                "Datapoints": json.dumps(points)}
+
+    rds = SimpleNamespace(describe_rcmetric_list_with_options=describe_rcmetric_list_with_options)
+    monkeypatch.setattr(metric_store, "_store", MetricStore(str(tmp_path / "metrics.sqlite3")))
+    monkeypatch.setattr(rds_custom_read, "get_gateway", lambda region_id: SimpleNamespace(rds=lambda: rds))
+
+    def query():
+        return asyncio.run(rds_custom_read._describe_rc_metric_list_cached(
+            "cn-hangzhou", "rc-1", "CPUUtilization", base, base + 3600, "60"))
+
+    miss, hit = query(), query()
+    assert len(calls) == 1
+    assert hit == miss
+    assert set(hit) == {"RequestId", "InstanceId", "Period", "Success", "Datapoints"}
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds_openapi_mcp_server.core import metrics
+from alibabacloud_rds_openapi_mcp_server.core.context import set_mcp_instance
+from alibabacloud_rds_openapi_mcp_server.core.mcp import RdsMCP
+from alibabacloud_rds_openapi_mcp_server.core.metrics import Counter, Gauge, Histogram, Registry
+from alibabacloud_rds_openapi_mcp_server.core.openapi_executor import call_openapi
+
+
+def test_registry_should_render_prometheus_text_format():
+    registry = Registry()
+    calls = registry.register(Counter("calls_total", "Calls.", ("tool",)))
+    in_flight = registry.register(Gauge("in_flight", "Running."))
+    latency = registry.register(Histogram("latency_seconds", "Latency.", ("tool",), buckets=(0.1, 1)))
+
+    calls.inc(tool='say "hi"\n')
+    in_flight.inc()
+    latency.observe(0.05, tool="a")
+    latency.observe(0.5, tool="a")
+    latency.observe(5, tool="a")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE calls_total counter" in lines
+    assert 'calls_total{tool="say \\"hi\\"\\n"} 1.0' in lines
+    assert "in_flight 1.0" in lines
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{tool="a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{tool="a",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{tool="a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{tool="a"} 5.55' in lines
+    assert 'latency_seconds_count{tool="a"} 3' in lines
+
+    with pytest.raises(ValueError):
+        calls.inc(other="x")
+    with pytest.raises(ValueError):
+        registry.register(Counter("calls_total", "Again."))
+
+
+def test_call_tool_should_record_latency_outcome_and_payload():
+    server = RdsMCP("metrics_test")
+
+    @server.tool(group="metrics_test")
+    async def metrics_echo(text: str) -> str:
+        return text * 2
+
+    @server.tool(group="metrics_test")
+    async def metrics_fail() -> str:
+        raise KeyError("missing")
+
+    try:
+        server.activate(["metrics_test"])
+        asyncio.run(server.call_tool("metrics_echo", {"text": "abc"}))
+        with pytest.raises(ToolError):
+            asyncio.run(server.call_tool("metrics_fail", {}))
+    finally:
+        set_mcp_instance(None)
+
+    assert metrics.TOOL_CALLS.value(tool="metrics_echo", status="ok") == 1
+    assert metrics.TOOL_LATENCY.count(tool="metrics_echo") == 1
+    assert metrics.TOOL_IN_FLIGHT.value(tool="metrics_echo") == 0
+    assert metrics.TOOL_PAYLOAD_BYTES.count(tool="metrics_echo", direction="response") == 1
+    assert metrics.TOOL_CALLS.value(tool="metrics_fail", status="error") == 1
+    assert metrics.TOOL_ERRORS.value(tool="metrics_fail", error="KeyError") == 1
+    assert 'rds_mcp_tool_calls_total{tool="metrics_echo",status="ok"} 1.0' in metrics.REGISTRY.render()
+
+
+def test_call_openapi_should_record_upstream_latency_and_errors():
+    class MeteredClient:
+        _endpoint = "metered.aliyuncs.com"
+
+        async def create_thing_async(self, request):
+            if request == "bad":
+                raise ValueError(request)
+            return request
+
+        def create_thing(self, request):
+            raise AssertionError("the async variant should have been used")
+
+    client = MeteredClient()
+    asyncio.run(call_openapi(client.create_thing, "ok"))
+    with pytest.raises(ValueError):
+        asyncio.run(call_openapi(client.create_thing, "bad"))
+
+    assert metrics.OPENAPI_LATENCY.count(service="metered", action="create_thing") == 2
+    assert metrics.OPENAPI_ERRORS.value(service="metered", action="create_thing", error="ValueError") == 1
+    assert metrics.OPENAPI_QUEUE_DELAY.count(service="metered", action="create_thing") == 2
+    assert metrics.OPENAPI_IN_FLIGHT.value(service="metered") == 0
+
+
+def test_payload_size():
+    assert metrics.payload_size("héllo") == 6
+    assert metrics.payload_size({"a": 1}) == len('{"a": 1}')
+    assert metrics.payload_size([b"abc", "de"]) == 5
+    assert metrics.payload_size(None) == 0
+
+
+def test_worker_snapshots_should_merge_into_one_exposition(tmp_path):
+    metrics.TOOL_CALLS.inc(tool="snapshot_tool", status="ok")
+    metrics.write_worker_snapshot(str(tmp_path), worker="101")
+    metrics.write_worker_snapshot(str(tmp_path), worker="102")
+    stale = tmp_path / "103.prom"
+    stale.write_text("# HELP gone Gone.\n# TYPE gone counter\ngone 1.0\n")
+    os.utime(stale, (0, 0))
+
+    lines = metrics.collect_worker_snapshots(str(tmp_path)).splitlines()
+    assert lines.count("# TYPE rds_mcp_tool_calls_total counter") == 1
+    for worker in ("101", "102"):
+        assert f'rds_mcp_tool_calls_total{{worker="{worker}",tool="snapshot_tool",status="ok"}} 1.0' in lines
+    assert not any(line.startswith("gone") for line in lines)
+    assert not stale.exists()
+
+    # Samples of a family stay contiguous, right after its header.
+    header = lines.index("# TYPE rds_mcp_tool_calls_total counter")
+    assert lines[header + 1].startswith("rds_mcp_tool_calls_total{")
+    assert lines[header + 2].startswith("rds_mcp_tool_calls_total{")
@@ -0,0 +1,129 @@
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds_openapi_mcp_server.monitor_metrics import (aggregate_buckets, choose_das_interval, pivot_metrics,
+                                                                 render_metrics, split_das_windows)
+from alibabacloud_rds_openapi_mcp_server.tabular import json_array_to_markdown
+
+BASE_MS = 1_735_689_600_000
+
+
+# --- Previous implementation, kept as the reference for output and speed ---
+
+def legacy_pivot(response_data):
+    timestamp_map = {}
+    resp_metrics_list = set()
+    for metric in response_data:
+        name = metric["Name"]
+        resp_metrics_list.add(name)
+        for timestamp, value in zip(metric["Timestamp"], metric["Value"]):
+            dt = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
+            timestamp_map.setdefault(dt, {})[name] = value
+    headers = sorted(resp_metrics_list)
+    datas = []
+    for dt in sorted(timestamp_map.keys()):
+        value_map = timestamp_map[dt]
+        value_map["datetime"] = dt
+        datas.append(value_map)
+    headers.insert(0, "datetime")
+    return json_array_to_markdown(headers, datas)
+
+
+def _response(n, metrics=("cpu", "iops", "mdl"), step_ms=5000):
+    data = []
+    for k, name in enumerate(metrics):
+        # Every metric skips a different subset of timestamps.
+        timestamps = [BASE_MS + i * step_ms for i in range(n) if (i + k) % 7]
+        data.append({"Name": name, "Timestamp": timestamps, "Value": [(i % 13) + 0.25 * k for i in range(len(timestamps))]})
+    return data
+
+
+def _pivot(data):
+    return pivot_metrics({m["Name"]: (m["Timestamp"], m["Value"]) for m in data})
+
+
+def test_markdown_should_match_previous_pivot():
+    data = _response(200)
+    assert render_metrics(*_pivot(data)) == legacy_pivot(data)
+
+
+def test_csv_and_json_formats():
+    data = [{"Name": "b", "Timestamp": [BASE_MS, BASE_MS + 5000], "Value": [1, 2.5]},
+            {"Name": "a", "Timestamp": [BASE_MS + 5000], "Value": [None]}]
+    timestamps, names, matrix = _pivot(data)
+
+    csv_lines = render_metrics(timestamps, names, matrix, "csv").splitlines()
+    assert csv_lines[0] == "datetime,a,b"
+    assert csv_lines[1].endswith(",,1.0")
+    assert csv_lines[2].endswith(",,2.5")
+
+    compact = json.loads(render_metrics(timestamps, names, matrix, "json"))
+    assert compact["columns"] == ["datetime", "a", "b"]
+    assert [row[1:] for row in compact["rows"]] == [[None, 1.0], [None, 2.5]]
+
+    with pytest.raises(ValueError):
+        render_metrics(timestamps, names, matrix, "xml")
+
+
+def test_aggregate_buckets():
+    timestamps = np.array([0, 1000, 2000, 60_000, 61_000], dtype=np.int64)
+    matrix = np.array([[1, np.nan], [3, np.nan], [5, 7], [10, np.nan], [20, np.nan]])
+
+    ts, avg = aggregate_buckets(timestamps, matrix, 60_000, "avg")
+    assert ts.tolist() == [0, 60_000]
+    assert avg[:, 0].tolist() == [3, 15]
+    assert avg[0, 1] == 7 and np.isnan(avg[1, 1])
+
+    _, mx = aggregate_buckets(timestamps, matrix, 60_000, "max")
+    assert mx[:, 0].tolist() == [5, 20]
+
+    _, p95 = aggregate_buckets(timestamps, matrix, 60_000, "p95")
+    assert p95[0, 0] == pytest.approx(4.8)
+    assert np.isnan(p95[1, 1])
+
+    assert aggregate_buckets(timestamps, matrix, 60_000, "none")[1] is matrix
+
+
+def _best_of(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.perf
+def test_benchmark_pivot_against_previous_implementation():
+    data = _response(20000, metrics=[f"metric_{i}" for i in range(8)])
+    new = _best_of(lambda d: render_metrics(*_pivot(d), "csv"), data)
+    old = _best_of(legacy_pivot, data)
+    # The NumPy pivot was measured several times faster; the bound leaves room for noise.
+    assert new <= old * 0.8
+
+
+def test_choose_das_interval_should_respect_point_budget():
+    minute, day = 60_000, 86_400_000
+    assert choose_das_interval(0, 10 * minute) == 5
+    assert choose_das_interval(0, day) == 600
+    assert choose_das_interval(0, 30 * day) == 21600
+    assert choose_das_interval(0, 365 * day) == 86400
+    assert choose_das_interval(0, day, point_budget=2000) == 60
+    assert choose_das_interval(0, 0) == 5
+
+
+def test_split_das_windows_should_bound_points_per_request():
+    day = 86_400_000
+    windows = split_das_windows(0, 30 * day, 60, max_points_per_request=1440)
+    assert len(windows) == 30
+    assert windows[0] == (0, day) and windows[-1][1] == 30 * day
+    assert all(a[1] == b[0] for a, b in zip(windows, windows[1:]))
+    assert split_das_windows(5, 5, 60) == [(5, 5)]
@@ -0,0 +1,135 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds_openapi_mcp_server.core import openapi_executor
+from alibabacloud_rds_openapi_mcp_server.core.openapi_executor import call_openapi
+
+
+class FakeClient:
+    _endpoint = "rds.aliyuncs.com"
+
+    def __init__(self):
+        self.sync_threads = []
+
+    def describe_sync_only(self, request):
+        self.sync_threads.append(threading.get_ident())
+        return request
+
+    def describe_both(self, request):
+        raise AssertionError("the async variant should have been used")
+
+    async def describe_both_async(self, request):
+        return "async:" + request
+
+
+def test_call_openapi_should_prefer_async_variant():
+    client = FakeClient()
+    assert asyncio.run(call_openapi(client.describe_both, "req")) == "async:req"
+
+
+def test_call_openapi_should_run_sync_method_off_the_event_loop():
+    client = FakeClient()
+
+    async def run():
+        return await call_openapi(client.describe_sync_only, "req"), threading.get_ident()
+
+    result, loop_thread = asyncio.run(run())
+    assert result == "req"
+    assert client.sync_threads and client.sync_threads[0] != loop_thread
+
+
+def test_call_openapi_should_cap_in_flight_calls_per_endpoint(monkeypatch):
+    monkeypatch.setattr(openapi_executor, "ENDPOINT_CONCURRENCY", 2)
+    in_flight = []
+    peak = []
+
+    class SlowClient:
+        _endpoint = "slow.aliyuncs.com"
+
+        def describe(self, request):
+            in_flight.append(request)
+            peak.append(len(in_flight))
+            time.sleep(0.02)
+            in_flight.pop()
+
+    client = SlowClient()
+
+    async def run():
+        await asyncio.gather(*(call_openapi(client.describe, i) for i in range(8)))
+
+    asyncio.run(run())
+    assert max(peak) <= 2
+
+
+class CountingClient:
+    _endpoint = "rds.aliyuncs.com"
+
+    def __init__(self, credential):
+        self._credential = credential
+        self.calls = []
+
+    async def describe_attribute_async(self, request):
+        self.calls.append(request)
+        await asyncio.sleep(0.02)
+        return {"request": request}
+
+    async def modify_attribute_async(self, request):
+        self.calls.append(request)
+        await asyncio.sleep(0.02)
+        return {"request": request}
+
+    def describe_attribute(self, request):
+        raise AssertionError("the async variant should have been used")
+
+    def modify_attribute(self, request):
+        raise AssertionError("the async variant should have been used")
+
+
+def test_identical_read_calls_should_share_one_upstream_request():
+    credential = object()
+    client, same_credential = CountingClient(credential), CountingClient(credential)
+
+    async def run():
+        return await asyncio.gather(
+            call_openapi(client.describe_attribute, "rm-1"),
+            call_openapi(same_credential.describe_attribute, "rm-1"),
+            call_openapi(client.describe_attribute, "rm-2"),
+        )
+
+    first, second, other = asyncio.run(run())
+    assert len(client.calls) + len(same_credential.calls) == 2
+    assert first == second and first is not second
+    assert other == {"request": "rm-2"}
+
+
+def test_coalescing_should_respect_credentials_and_skip_writes():
+    client, other_account = CountingClient(object()), CountingClient(object())
+
+    async def run():
+        await asyncio.gather(call_openapi(client.describe_attribute, "rm-1"),
+                             call_openapi(other_account.describe_attribute, "rm-1"))
+        await asyncio.gather(*(call_openapi(client.modify_attribute, "rm-1") for _ in range(3)))
+
+    asyncio.run(run())
+    assert other_account.calls == ["rm-1"]
+    assert client.calls == ["rm-1"] * 4
+
+
+def test_cancelled_caller_should_not_cancel_shared_call():
+    client = CountingClient(object())
+
+    async def run():
+        leader = asyncio.ensure_future(call_openapi(client.describe_attribute, "rm-1"))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(call_openapi(client.describe_attribute, "rm-1"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == {"request": "rm-1"}
+    assert client.calls == ["rm-1"]
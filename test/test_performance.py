@@ -0,0 +1,86 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds20140815 import models as rds_20140815_models
+
+from alibabacloud_rds_openapi_mcp_server.performance import (downsample_performance,
+                                                             merge_performance_keys,
+                                                             plan_time_windows)
+
+PerformanceKey = rds_20140815_models.DescribeDBInstancePerformanceResponseBodyPerformanceKeysPerformanceKey
+PerformanceValues = rds_20140815_models.DescribeDBInstancePerformanceResponseBodyPerformanceKeysPerformanceKeyValues
+PerformanceValue = rds_20140815_models.DescribeDBInstancePerformanceResponseBodyPerformanceKeysPerformanceKeyValuesPerformanceValue
+
+
+def _series(values):
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        PerformanceValue(date=(start + timedelta(seconds=5 * i)).strftime("%Y-%m-%dT%H:%M:%SZ"), value=v)
+        for i, v in enumerate(values)
+    ]
+
+
+def test_lttb_should_bound_points_and_keep_spike():
+    values = ["1&1"] * 20000
+    values[12345] = "90&5"
+    series = _series(values)
+
+    rows = downsample_performance(series, max_points=10)
+
+    assert len(rows) == 10
+    assert "90&5" in [row["Value"] for row in rows]
+    assert rows == sorted(rows, key=lambda r: r["Date"])
+
+
+def test_point_count_should_not_depend_on_input_length():
+    for n in (11, 57, 1000, 12345):
+        assert len(downsample_performance(_series(["1"] * n), max_points=10)) == 10
+    assert len(downsample_performance(_series(["1"] * 7), max_points=10)) == 7
+
+
+def test_minmax_should_return_bucket_extremes():
+    rows = downsample_performance(_series([str(v) for v in [1, 9, 2, 3, 0, 4]]), max_points=4, mode="minmax")
+    assert [row["Value"] for row in rows] == ["1", "9", "0", "4"]
+
+
+def test_p95_should_aggregate_each_component():
+    rows = downsample_performance(_series([f"{i}&{2 * i}" for i in range(100)]), max_points=1, mode="p95")
+    assert rows[0]["Value"] == "94.05&188.1"
+
+
+def test_should_not_mutate_sdk_objects_and_reject_unknown_mode():
+    series = _series(["1", "2", "3"])
+    downsample_performance(series, max_points=2)
+    assert series[0].date == "2025-01-01T00:00:00Z"
+    with pytest.raises(ValueError):
+        downsample_performance(series, mode="avg")
+
+
+def test_plan_time_windows_should_cover_range_without_gaps():
+    start, end = datetime(2025, 1, 1), datetime(2025, 1, 31, 12)
+    windows = plan_time_windows(start, end, timedelta(days=1))
+    assert len(windows) == 31
+    assert windows[0][0] == start and windows[-1][1] == end
+    assert all(a[1] == b[0] for a, b in zip(windows, windows[1:]))
+    assert plan_time_windows(start, start, timedelta(days=1)) == [(start, start)]
+
+
+def test_merge_performance_keys_should_stitch_windows_in_time_order():
+    def chunk(key, values):
+        return [PerformanceKey(key=key, unit="%", value_format="cpu&mem",
+                               values=PerformanceValues(performance_value=values))]
+
+    series = _series([str(i) for i in range(6)])
+    chunks = [chunk("MySQL_MemCpuUsage", series[3:]), chunk("MySQL_MemCpuUsage", series[:4]),
+              chunk("MySQL_Sessions", series[:2])]
+
+    merged = merge_performance_keys(chunks)
+
+    assert [s.key for s in merged] == ["MySQL_MemCpuUsage", "MySQL_Sessions"]
+    assert [v.value for v in merged[0].values] == ["0", "1", "2", "3", "4", "5"]
+    assert merged[0].unit == "%"
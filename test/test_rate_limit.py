@@ -0,0 +1,153 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from alibabacloud_tea_openapi import exceptions as openapi_exceptions
+from Tea.exceptions import UnretryableException
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds_openapi_mcp_server.core import rate_limit
+from alibabacloud_rds_openapi_mcp_server.core.openapi_executor import call_openapi
+from alibabacloud_rds_openapi_mcp_server.core.rate_limit import (TokenBucket, bucket_for, classify_error, parse_quotas,
+                                                                 quota_for)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_should_queue_callers_at_the_refill_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=2, clock=clock)
+    assert [bucket.reserve() for _ in range(4)] == pytest.approx([0, 0, 0.1, 0.2])
+    clock.now = 1.0
+    assert bucket.reserve() == 0
+    assert bucket.stats.calls == 5 and bucket.stats.delayed == 2
+    assert bucket.stats.max_wait == pytest.approx(0.2)
+
+    bucket.pause(0.5)
+    bucket.pause(0.5)
+    assert bucket.reserve() == pytest.approx(0.6)
+
+
+def test_quotas_should_fall_back_from_action_to_service():
+    quotas = {'*': 5, 'rds': 50, **parse_quotas("rds:DescribeDBInstances=20, das=bad,=3")}
+    assert quota_for('rds', 'describe_dbinstances', quotas) == 20
+    assert quota_for('rds', 'DescribeDBInstances', quotas) == 20
+    assert quota_for('rds', 'describe_regions', quotas) == 50
+    assert quota_for('vpc', 'describe_vpcs', quotas) == 5
+
+
+def test_classify_error_should_only_accept_retryable_failures():
+    throttled = openapi_exceptions.ThrottlingException(code='Throttling.User', status_code=400, retry_after=1500)
+    assert classify_error(throttled) == rate_limit.THROTTLED
+    assert rate_limit.retry_after_of(throttled) == 1.5
+    unavailable = openapi_exceptions.ServerException(code='ServiceUnavailable', status_code=503)
+    assert classify_error(unavailable) == rate_limit.UNAVAILABLE
+    assert classify_error(openapi_exceptions.ServerException(code='InternalError', status_code=500)) == \
+        rate_limit.TRANSIENT
+    assert classify_error(UnretryableException(None, ConnectionResetError())) == rate_limit.TRANSIENT
+    assert classify_error(openapi_exceptions.ClientException(code='InvalidParameter', status_code=400)) is None
+    assert classify_error(ValueError("bad input")) is None
+
+
+class FlakyClient:
+    _endpoint = "flaky.aliyuncs.com"
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def _respond(self, request):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return request
+
+    async def describe_thing_async(self, request):
+        return await self._respond(request)
+
+    async def modify_thing_async(self, request):
+        return await self._respond(request)
+
+    def describe_thing(self, request):
+        raise AssertionError("the async variant should have been used")
+
+    def modify_thing(self, request):
+        raise AssertionError("the async variant should have been used")
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(rate_limit, "backoff_delay", lambda attempt: 0)
+
+
+def _throttled():
+    return openapi_exceptions.ThrottlingException(code='Throttling.User', status_code=400)
+
+
+def _internal_error():
+    return openapi_exceptions.ServerException(code='InternalError', status_code=500)
+
+
+def test_call_openapi_should_retry_throttled_calls(no_backoff):
+    client = FlakyClient([_throttled(), _throttled()])
+    assert asyncio.run(call_openapi(client.modify_thing, "req")) == "req"
+    assert client.calls == 3
+    assert bucket_for("flaky", "modify_thing", "").stats.throttled == 2
+
+
+def test_call_openapi_should_retry_transient_errors_of_reads_only(no_backoff):
+    reader = FlakyClient([_internal_error()])
+    assert asyncio.run(call_openapi(reader.describe_thing, "req")) == "req"
+
+    writer = FlakyClient([_internal_error()])
+    with pytest.raises(openapi_exceptions.ServerException):
+        asyncio.run(call_openapi(writer.modify_thing, "req"))
+    assert writer.calls == 1
+
+    invalid = FlakyClient([openapi_exceptions.ClientException(code='InvalidParameter', status_code=400)])
+    with pytest.raises(openapi_exceptions.ClientException):
+        asyncio.run(call_openapi(invalid.describe_thing, "req"))
+    assert invalid.calls == 1
+
+
+def test_call_openapi_should_give_up_after_max_retries(no_backoff, monkeypatch):
+    monkeypatch.setattr(rate_limit, "MAX_RETRIES", 2)
+    client = FlakyClient([_throttled() for _ in range(5)])
+    with pytest.raises(openapi_exceptions.ThrottlingException):
+        asyncio.run(call_openapi(client.describe_thing, "req"))
+    assert client.calls == 3
+
+
+def test_sustained_calls_should_be_paced_at_the_quota(monkeypatch):
+    monkeypatch.setitem(rate_limit.QUOTAS, "paced", 50)
+
+    class PacedClient:
+        _endpoint = "paced.aliyuncs.com"
+
+        async def describe_thing_async(self, request):
+            return request
+
+        def describe_thing(self, request):
+            raise AssertionError("the async variant should have been used")
+
+    client = PacedClient()
+
+    async def run():
+        return await asyncio.gather(*(call_openapi(client.describe_thing, i) for i in range(60)))
+
+    start = time.perf_counter()
+    assert asyncio.run(run()) == list(range(60))
+    elapsed = time.perf_counter() - start
+    # 50 calls fit the burst, the other 10 are spaced 20ms apart.
+    assert 0.18 <= elapsed < 1.0
+    stats = rate_limit.rate_limit_stats()[("paced", "describething", "")]
+    assert stats["calls"] == 60 and stats["delayed"] == 10
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from alibabacloud_rds_openapi_mcp_server import server
+from alibabacloud_rds_openapi_mcp_server.server import VerifyHeaderMiddleware
+
+
+# --- Previous implementation, kept as the reference for the benchmark ---
+
+class LegacyVerifyHeaderMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        token = server.current_request_headers.set(dict(request.headers))
+        try:
+            response = await call_next(request)
+        finally:
+            server.current_request_headers.reset(token)
+        return response
+
+
+async def _headers(request):
+    return JSONResponse(server.current_request_headers.get())
+
+
+STREAM_EVENTS = 2000
+
+
+async def _stream(request):
+    async def events():
+        for i in range(STREAM_EVENTS):
+            yield f"event: message\ndata: {i}\n\n".encode()
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def _app(middleware, **options):
+    app = Starlette(routes=[Route("/headers", _headers), Route("/sse", _stream)])
+    app.add_middleware(middleware, **options)
+    return app
+
+
+async def _request(app, path, headers=()):
+    scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+             "headers": [(k.encode(), v.encode()) for k, v in headers], "http_version": "1.1",
+             "scheme": "http", "server": ("test", 80), "client": ("test", 1234), "root_path": ""}
+    sent = []
+    requested = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    disconnected.set()
+    status = sent[0]["status"]
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return status, body
+
+
+def test_api_key_should_be_required_when_configured():
+    app = _app(VerifyHeaderMiddleware, api_key="secret")
+
+    async def run():
+        return [await _request(app, "/headers", headers)
+                for headers in ([], [("authorization", "Bearer wrong")], [("authorization", "Bearer secret")],
+                                [("authorization", "secret")])]
+
+    statuses = [status for status, _ in asyncio.run(run())]
+    assert statuses == [401, 401, 200, 200]
+
+
+def test_only_credential_headers_should_be_exposed():
+    app = _app(VerifyHeaderMiddleware, api_key="")
+    headers = [("ak", "id"), ("sk", "secret"), ("rds_user", "u"), ("cookie", "c"), ("authorization", "x")]
+    status, body = asyncio.run(_request(app, "/headers", headers))
+    assert status == 200
+    assert json.loads(body) == {"ak": "id", "sk": "secret", "rds_user": "u"}
+    assert server.current_request_headers.get() == {}
+
+
+def _streams_per_second(app, repeat=10):
+    async def run():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            status, body = await _request(app, "/sse", [("ak", "id"), ("user-agent", "bench")])
+            assert status == 200 and body.count(b"\n\n") == STREAM_EVENTS
+        return repeat / (time.perf_counter() - start)
+
+    return max(asyncio.run(run()) for _ in range(3))
+
+
+@pytest.mark.perf
+def test_benchmark_long_sse_streams_against_previous_middleware():
+    new = _streams_per_second(_app(VerifyHeaderMiddleware, api_key=""))
+    old = _streams_per_second(_app(LegacyVerifyHeaderMiddleware))
+    # The pure ASGI middleware must not fall behind BaseHTTPMiddleware; the bound leaves room for noise.
+    assert new >= old * 0.9
+
+
+@pytest.mark.parametrize("transport, multi_worker", [("sse", False), ("streamable_http", True)])
+def test_multiple_workers_should_only_run_for_stateless_streamable_http(transport, multi_worker, monkeypatch,
+                                                                         tmp_path):
+    started = []
+    monkeypatch.setenv("SERVER_TRANSPORT", transport)
+    monkeypatch.setenv("SERVER_WORKERS", "2")
+    monkeypatch.setenv("METRICS_WORKER_DIR", str(tmp_path))
+    monkeypatch.delenv("MCP_TOOLSETS", raising=False)
+    monkeypatch.setattr(server.mcp, "activate", lambda enabled_groups: None)
+    monkeypatch.setattr(server.uvicorn, "run", lambda *args, **kwargs: started.append(kwargs["workers"]))
+    monkeypatch.setattr(server.anyio, "run", lambda serve: started.append(1))
+
+    server.main()
+    assert started == [2 if multi_worker else 1]
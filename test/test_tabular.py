@@ -0,0 +1,112 @@
+import csv
+import sys
+import time
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds20140815 import models as rds_20140815_models
+
+from alibabacloud_rds_openapi_mcp_server.tabular import json_array_to_csv, json_array_to_markdown
+
+
+# --- Previous implementations, kept as the reference for output and speed ---
+
+def legacy_json_array_to_csv(data):
+    if not data or not isinstance(data, list):
+        return ""
+    fieldnames = set()
+    for item in data:
+        if isinstance(item, dict):
+            fieldnames.update(item.keys())
+        elif hasattr(item, 'to_map'):
+            fieldnames.update(item.to_map().keys())
+    if not fieldnames:
+        return ""
+    output = StringIO()
+    writer = csv.DictWriter(output, fieldnames=sorted(fieldnames))
+    writer.writeheader()
+    for item in data:
+        if isinstance(item, dict):
+            writer.writerow({k: v if v is not None else '' for k, v in item.items()})
+        elif hasattr(item, 'to_map'):
+            writer.writerow({k: v if v is not None else '' for k, v in item.to_map().items()})
+    return output.getvalue()
+
+
+def legacy_json_array_to_markdown(headers, datas):
+    if not headers or not isinstance(headers, list):
+        return ""
+    if not datas or not isinstance(datas, list):
+        return ""
+    markdown_table = "| " + " | ".join(headers) + " |\n"
+    markdown_table += "| " + " | ".join(["---"] * len(headers)) + " |\n"
+    for row in datas:
+        if isinstance(row, dict):
+            markdown_table += "| " + " | ".join(str(row.get(header, '-')) for header in headers) + " |\n"
+        else:
+            markdown_table += "| " + " | ".join(map(str, row)) + " |\n"
+    return markdown_table
+
+
+def _instances(n):
+    return [
+        rds_20140815_models.DescribeDBInstancesResponseBodyItemsDBInstance(
+            dbinstance_id=f"rm-{i:06d}",
+            dbinstance_description=f"instance, {i}",
+            engine="MySQL",
+            engine_version="8.0",
+            region_id="cn-hangzhou",
+            dbinstance_status="Running",
+            dbinstance_class="mysql.n2.medium.1",
+            create_time="2024-01-01T00:00:00Z",
+            lock_reason=None,
+        )
+        for i in range(n)
+    ]
+
+
+def _best_of(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_json_array_to_csv_should_match_previous_output():
+    models = _instances(20)
+    assert json_array_to_csv(models) == legacy_json_array_to_csv(models)
+
+    mixed = [{"b": 1, "a": None}, {"c": "x,y"}, models[0]]
+    assert json_array_to_csv(mixed) == legacy_json_array_to_csv(mixed)
+
+    assert json_array_to_csv([]) == legacy_json_array_to_csv([]) == ""
+    assert json_array_to_csv([{}]) == legacy_json_array_to_csv([{}]) == ""
+
+
+def test_json_array_to_markdown_should_match_previous_output():
+    headers = ["datetime", "cpu", "mem"]
+    rows = [{"datetime": "2025-01-01 00:00:00", "cpu": 1.5}, ["2025-01-01 00:00:05", 2, 3]]
+    assert json_array_to_markdown(headers, rows) == legacy_json_array_to_markdown(headers, rows)
+    assert json_array_to_markdown([], rows) == ""
+
+
+@pytest.mark.perf
+def test_benchmark_tabular_encoders_against_previous_implementation():
+    models = _instances(2000)
+    new_csv = _best_of(json_array_to_csv, models)
+    old_csv = _best_of(legacy_json_array_to_csv, models)
+
+    headers = ["datetime"] + [f"metric_{i}" for i in range(8)]
+    rows = [dict({"datetime": str(i)}, **{h: i * 0.5 for h in headers[1:]}) for i in range(20000)]
+    new_md = _best_of(json_array_to_markdown, headers, rows)
+    old_md = _best_of(legacy_json_array_to_markdown, headers, rows)
+
+    # Bounds leave room for timing noise; the encoders were measured well below them.
+    assert new_csv <= old_csv * 1.1
+    assert new_md <= old_md * 1.5
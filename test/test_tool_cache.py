@@ -0,0 +1,113 @@
+import asyncio
+import importlib
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds_openapi_mcp_server.core.context import set_mcp_instance
+from alibabacloud_rds_openapi_mcp_server.core.mcp import RdsMCP
+from alibabacloud_rds_openapi_mcp_server.core.tool_cache import CachedTool
+
+TOOL_SOURCE = '''
+from typing import Optional
+
+from mcp.server.fastmcp import Context
+
+
+async def cached_describe(region_id: str, page_size: int = 30, ctx: Optional[Context] = None) -> dict:
+    """Describes things {version}."""
+    return {{"region_id": region_id, "page_size": page_size}}
+'''
+
+
+@pytest.fixture
+def tool_module(tmp_path, monkeypatch):
+    monkeypatch.setenv("TOOL_SCHEMA_CACHE", str(tmp_path / "tool_schemas.json"))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    path = tmp_path / "cached_tools.py"
+
+    def load(version: str):
+        path.write_text(textwrap.dedent(TOOL_SOURCE.format(version=version)))
+        sys.modules.pop("cached_tools", None)
+        return importlib.import_module("cached_tools")
+
+    yield load
+    sys.modules.pop("cached_tools", None)
+    set_mcp_instance(None)
+
+
+def _activate(module):
+    server = RdsMCP("tool_cache_test")
+    server.tool(group="cached")(module.cached_describe)
+    server.activate(["cached"])
+    return server
+
+
+def _listing(server):
+    return [tool.model_dump(mode="json") for tool in asyncio.run(server.list_tools())]
+
+
+def test_second_activation_should_restore_tools_from_the_cache(tool_module):
+    module = tool_module("v1")
+    cold = _activate(module)
+    assert cold._tool_manager.cache.misses == 1
+
+    warm = _activate(module)
+    assert warm._tool_manager.cache.hits == 1
+    tool = warm._tool_manager.get_tool("cached_describe")
+    assert isinstance(tool, CachedTool) and tool.fn_metadata is None
+    assert tool.context_kwarg == "ctx"
+    assert _listing(warm) == _listing(cold)
+
+    result = asyncio.run(warm.call_tool("cached_describe", {"region_id": "cn-hangzhou", "page_size": "10"}))
+    assert '"page_size": 10' in result[0].text
+    with pytest.raises(ToolError):
+        asyncio.run(warm.call_tool("cached_describe", {"page_size": 10}))
+
+
+def test_editing_the_source_should_invalidate_its_entries(tool_module):
+    _activate(tool_module("v1"))
+    # A different length keeps a same-second .pyc from being reused.
+    server = _activate(tool_module("v2, edited"))
+    assert server._tool_manager.cache.misses == 1
+    assert _listing(server)[0]["description"] == "Describes things v2, edited."
+
+
+def test_tool_listing_should_be_reused_until_tools_change(tool_module):
+    server = _activate(tool_module("v1"))
+    first = asyncio.run(server.list_tools())
+    assert asyncio.run(server.list_tools())[0] is first[0]
+
+    server.add_tool(lambda: None, name="cached_extra")
+    assert [tool.name for tool in asyncio.run(server.list_tools())] == ["cached_describe", "cached_extra"]
+    server.remove_tool("cached_extra")
+    assert [tool.name for tool in asyncio.run(server.list_tools())] == ["cached_describe"]
+
+
+def test_unusable_cache_directory_should_disable_the_cache(tool_module, tmp_path, monkeypatch):
+    from alibabacloud_rds_openapi_mcp_server.core import storage
+
+    blocker = tmp_path / "not_a_directory"
+    blocker.write_text("")
+    monkeypatch.delenv("TOOL_SCHEMA_CACHE")
+    monkeypatch.setattr(storage, "CACHE_DIR", str(blocker / "cache"))
+
+    server = _activate(tool_module("v1"))
+    assert server._tool_manager.cache is None
+    assert [tool["name"] for tool in _listing(server)] == ["cached_describe"]
+
+
+def test_mcp_without_the_restore_apis_should_disable_the_cache(tool_module, monkeypatch):
+    from alibabacloud_rds_openapi_mcp_server.core import tool_cache
+
+    monkeypatch.setattr(tool_cache, "_RESTORE_OPTIONS", tool_cache._RESTORE_OPTIONS + ("unreleased_option",))
+
+    server = _activate(tool_module("v1"))
+    assert server._tool_manager.cache is None
+    result = asyncio.run(server.call_tool("cached_describe", {"region_id": "cn-hangzhou"}))
+    assert '"page_size": 30' in result[0].text
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from alibabacloud_rds_openapi_mcp_server.core import tracing
+from alibabacloud_rds_openapi_mcp_server.core.context import set_mcp_instance
+from alibabacloud_rds_openapi_mcp_server.core.mcp import RdsMCP
+from alibabacloud_rds_openapi_mcp_server.core.openapi_executor import call_openapi
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.configure("file", str(path))
+    yield path
+    tracing.configure("none")
+
+
+def _spans(path):
+    tracing.configure("none")  # flushes the file exporter
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TracedClient:
+    _endpoint = "traced.aliyuncs.com"
+
+    async def describe_traced_async(self, request):
+        if request == "boom":
+            raise RuntimeError("upstream failed")
+        return request
+
+    def describe_traced(self, request):
+        raise AssertionError("the async variant should have been used")
+
+
+def test_tool_call_should_produce_a_span_tree(trace_file):
+    server = RdsMCP("tracing_test")
+    client = TracedClient()
+
+    @server.tool(group="tracing_test")
+    async def traced_tool(region_id: str) -> str:
+        return await call_openapi(client.describe_traced, region_id)
+
+    try:
+        server.activate(["tracing_test"])
+        asyncio.run(server.call_tool("traced_tool", {"region_id": "cn-hangzhou"}))
+    finally:
+        set_mcp_instance(None)
+
+    spans = {span["name"]: span for span in _spans(trace_file)}
+    tool, action, http = spans["tool traced_tool"], spans["openapi describe_traced"], spans["http traced.aliyuncs.com"]
+    assert tool["parentSpanId"] == ""
+    assert action["parentSpanId"] == tool["spanId"]
+    assert http["parentSpanId"] == action["spanId"]
+    assert tool["traceId"] == action["traceId"] == http["traceId"]
+    assert tool["attributes"]["rds.region_id"] == "cn-hangzhou"
+    assert http["attributes"]["openapi.attempt"] == 1
+    assert tool["startTimeUnixNano"] <= http["startTimeUnixNano"] <= http["endTimeUnixNano"] <= tool["endTimeUnixNano"]
+
+
+def test_failed_call_should_mark_spans_as_errors(trace_file):
+    client = TracedClient()
+    with pytest.raises(RuntimeError):
+        asyncio.run(call_openapi(client.describe_traced, "boom"))
+
+    spans = _spans(trace_file)
+    assert {span["name"] for span in spans} == {"openapi describe_traced", "http traced.aliyuncs.com"}
+    for span in spans:
+        assert span["status"]["code"] == "ERROR"
+        assert span["events"][0]["attributes"]["exception.type"] == "RuntimeError"
+
+
+def test_tracing_should_be_a_no_op_when_disabled(tmp_path):
+    tracing.configure("none")
+    with tracing.start_span("ignored", key="value") as span:
+        span.set_attribute("other", 1)
+    assert not tracing.enabled()
+    assert not list(tmp_path.iterdir())